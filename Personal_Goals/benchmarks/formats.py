@@ -0,0 +1,91 @@
+import argparse
+import os
+import statistics
+import sys
+import time
+import tracemalloc
+
+import storage
+from benchmarks import run
+
+# Save/load cost of each storage format (see serializers.py). Run from
+# Personal_Goals/:
+#
+#     python3 -m benchmarks.formats --sizes 100k
+#     python3 -m benchmarks.formats --sizes 1m --trackers reads
+#
+# For each tracker and size, synthetic data is generated once, then rewritten
+# with storage.convert() in every format. save_s times that rewrite, load_s
+# times storage.load() on the result and peak_bytes is the load's peak Python
+# memory. The parsed-snapshot cache is switched off so every load decodes the
+# file. jsonl is only measured for trackers with a STREAM_KEY.
+
+
+def measure_format(module, data, fmt, repeat):
+    stream = getattr(module, "STREAM_KEY", None)
+    saves, loads = [], []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        storage.convert(module.DATA_FILE, data, fmt, stream)
+        saves.append(time.perf_counter() - start)
+        start = time.perf_counter()
+        storage.load(module.DATA_FILE, None)
+        loads.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        storage.load(module.DATA_FILE, None)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"file_bytes": os.path.getsize(module.DATA_FILE),
+            "save_s": round(min(saves), 6), "load_s": round(min(loads), 6),
+            "load_median_s": round(statistics.median(loads), 6), "peak_bytes": peak}
+
+
+def run_tracker(name, size, formats, repeat, seed):
+    cache_min_bytes = storage.CACHE_MIN_BYTES
+    storage.CACHE_MIN_BYTES = float('inf')
+    try:
+        with run.generated(name, size, seed) as (module, _, _):
+            data = storage.load(module.DATA_FILE, None)
+            result = {"records": run.SIZES[size], "formats": {}}
+            for fmt in formats:
+                if fmt == "jsonl" and not hasattr(module, "STREAM_KEY"):
+                    continue
+                try:
+                    result["formats"][fmt] = measure_format(module, data, fmt, repeat)
+                except ImportError as e:
+                    print(f"  skipping {fmt}: {e}", file=sys.stderr)
+    finally:
+        storage.CACHE_MIN_BYTES = cache_min_bytes
+    return result
+
+
+def print_table(report, file=sys.stderr):
+    print(f"{'benchmark':<28}{'size':>12}{'save':>10}{'load':>10}{'peak':>12}", file=file)
+    for tracker, sizes in report["results"].items():
+        for size, result in sizes.items():
+            for fmt, row in result["formats"].items():
+                print(f"{f'{tracker} {fmt} @{size}':<28}{row['file_bytes'] / 1e6:>10.1f}MB"
+                      f"{row['save_s']:>9.3f}s{row['load_s']:>9.3f}s{row['peak_bytes'] / 1e6:>10.1f}MB", file=file)
+
+
+def build_parser(prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Benchmark saving and loading tracker data in each storage format.")
+    run.add_common_arguments(parser, "100k", "Timed saves and loads per format; the minimum is reported")
+    parser.add_argument("--formats", nargs='+', choices=storage.FORMATS, default=storage.FORMATS, help="Formats to run (default: all).")
+    return parser
+
+
+def main(argv=None, prog=None):
+    args = build_parser(prog).parse_args(argv)
+    report = run.run_all(args, lambda tracker, size: run_tracker(tracker, size, args.formats, args.repeat, args.seed),
+                         run.new_report(args, ("orjson", "msgpack")))
+    print_table(report)
+    run.write_report(report, args.output)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
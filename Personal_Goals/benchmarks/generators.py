@@ -0,0 +1,87 @@
+from datetime import datetime, timedelta
+
+import records
+
+# Synthetic data for each tracker, at any size.
+#
+# Every generator takes the tracker module (with DATA_FILE already pointed at
+# a scratch directory), a record count and a random.Random, and writes the
+# data through the module's own save_data()/helpers, so snapshot formatting,
+# skill shards and sidecar paths are exactly what the tracker itself writes.
+# Indexes (date index, search/idea indexes, skill rollups) are left for the
+# tracker to build on first use, like after an import.
+
+SYLLABLES = ["ka", "lo", "mi", "ren", "tas", "vo", "bri", "den", "ful", "gor", "shi", "pen", "tro", "zel"]
+WORDS = [a + b + c for a in SYLLABLES for b in SYLLABLES for c in SYLLABLES]
+UNITS = ["g", "g", "ml", "", "tsp", "tbsp", "cup", "kg"]
+
+WORKOUTS = [f"Workout {i}" for i in range(20)]
+SKILLS = [f"Skill {i}" for i in range(20)]
+
+
+def words(rng, low, high):
+    return ' '.join(rng.choices(WORDS, k=rng.randint(low, high)))
+
+
+def past_days(rng, n, span):
+    # n ISO dates over the `span` days before today, oldest first.
+    today = datetime.now().date()
+    return [(today - timedelta(days=offset)).isoformat()
+            for offset in sorted((rng.randint(1, span) for _ in range(n)), reverse=True)]
+
+
+def workouts(module, n, rng):
+    data = {"workouts": {name: [words(rng, 1, 2) for _ in range(rng.randint(3, 6))] for name in WORKOUTS},
+            "logs": [{"date": day, "workout_name": rng.choice(WORKOUTS)} for day in past_days(rng, n, max(n // 2, 30))]}
+    module.save_data(data)
+
+
+def skills(module, n, rng):
+    data, logs = {}, {name: [] for name in SKILLS}
+    for day in past_days(rng, n, max(n // 4, 30)):
+        moment = f"{day} {rng.randint(6, 22):02d}:{rng.randint(0, 59):02d}:00"
+        logs[rng.choice(SKILLS)].append(records.SkillLog(date=moment, time_spent=rng.choice([0.25, 0.5, 1.0, 1.5, 2.0]),
+                                                         note=words(rng, 0, 5)))
+    for name in SKILLS:
+        entry = module.new_skill_entry(data, name)
+        entry.update(total_time=sum(log.time_spent for log in logs[name]), log_count=len(logs[name]),
+                     last_date=logs[name][-1].date if logs[name] else None)
+        module.write_logs(entry, logs[name], mode='w')
+        data[name] = entry
+    module.save_data(data)
+
+
+def meals(module, n, rng):
+    # Enough distinct ingredients that recipes overlap but aren't all alike.
+    ingredients = [f"{rng.choice(WORDS)} {rng.choice(WORDS)}" for _ in range(max(50, int(n ** 0.5) * 2))]
+    recipes = {}
+    for i in range(n):
+        chosen = rng.sample(ingredients, rng.randint(3, 8))
+        recipes[f"Recipe {i}"] = {"ingredients": chosen,
+                                  "quantities": [[float(rng.randint(1, 500)), rng.choice(UNITS)] for _ in chosen]}
+    names = list(recipes)
+    data = {"recipes": recipes,
+            "current_plan": [{"day": day + 1, "meal": rng.choice(names)} for day in range(7)],
+            "pantry": rng.sample(ingredients, 15),
+            "nutrition": {ingredient: {"per": [100.0, "g"], "calories": rng.randint(20, 600), "protein": rng.randint(0, 30)}
+                          for ingredient in rng.sample(ingredients, len(ingredients) // 5)}}
+    module.save_data(data)
+
+
+def reads(module, n, rng):
+    items = []
+    for i in range(1, n + 1):
+        item_type = rng.choice(module.READING_ITEM_TYPES)
+        items.append(module.build_reading_item(i, item_type, words(rng, 2, 6).title(), author=words(rng, 2, 2).title(),
+                                               content=words(rng, 8, 20), source=rng.choice(WORDS),
+                                               status=rng.choice(["not started", "in progress", "completed"]),
+                                               total_progress=rng.randint(1, 40)))
+    module.save_data({"reading_items": items})
+
+
+def ideas(module, n, rng):
+    topics = list(module.TOPIC_KEYWORDS)
+    data = {"topics": topics,
+            "saved_ideas": [{"id": i, "idea": f"{rng.choice(topics)}: {words(rng, 5, 12)}", "status": "saved"}
+                            for i in range(1, n + 1)]}
+    module.save_data(data)
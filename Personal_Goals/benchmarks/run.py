@@ -0,0 +1,252 @@
+import argparse
+import contextlib
+import importlib
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from datetime import datetime
+
+from benchmarks import generators
+
+# Benchmarks for the Personal_Goals trackers. Run from Personal_Goals/:
+#
+#     python3 -m benchmarks.run --sizes 1k 100k
+#     python3 -m benchmarks.run --sizes 1k --save-baseline
+#
+# For each tracker and size, synthetic data is generated into a scratch
+# directory (the module's DATA_FILE/DB_FILE are pointed there; every sidecar
+# path derives from them) and each public function is called once to warm up
+# (first_s: includes building any missing index), `--repeat` times for wall
+# time, and once more under tracemalloc for peak Python memory, which is kept
+# out of the timed runs because tracing slows everything down. Output goes to
+# the functions' own stdout sink (/dev/null), so printing is part of the cost.
+#
+# The JSON report is compared against a saved baseline when there is one; a
+# function regresses when it is more than --threshold times slower (and at
+# least NOISE_FLOOR_S slower) or uses more than --threshold times the memory.
+
+SIZES = {"1k": 1_000, "100k": 100_000, "1m": 1_000_000}
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baseline.json')
+NOISE_FLOOR_S = 0.001
+
+# tracker -> (module, generator, [(function, call)]). Each call gets the module
+# and the run number, so mutating functions get fresh arguments every time.
+TRACKERS = {
+    "workout": ("workout_tracker", generators.workouts, [
+        ("log_workout", lambda m, i: m.log_workout(generators.WORKOUTS[i % len(generators.WORKOUTS)])),
+        ("show_history", lambda m, i: m.show_history(limit=20)),
+        ("show_status", lambda m, i: m.show_status()),
+        ("show_analytics", lambda m, i: m.show_analytics()),
+        ("list_workouts", lambda m, i: m.list_workouts()),
+    ]),
+    "skills": ("skills", generators.skills, [
+        ("log_time", lambda m, i: m.log_time(generators.SKILLS[i % len(generators.SKILLS)], 0.5, "benchmark")),
+        ("show_skill", lambda m, i: m.show_skill(generators.SKILLS[0], limit=20)),
+        ("show_report", lambda m, i: m.show_report()),
+        ("show_report_by_week", lambda m, i: m.show_report(by="week")),
+        ("list_skills", lambda m, i: m.list_skills()),
+    ]),
+    "meals": ("meal_planner", generators.meals, [
+        ("add_recipe", lambda m, i: m.add_recipe(f"Benchmark Recipe {i}", ["flour: 200 g", "eggs: 2", "salt"])),
+        ("list_recipes", lambda m, i: m.list_recipes()),
+        ("generate_plan", lambda m, i: m.generate_plan(7, seed=i)),
+        ("generate_plan_optimized", lambda m, i: m.generate_plan(7, optimize=True, seed=i)),
+        ("generate_shopping_list", lambda m, i: m.generate_shopping_list(households=2, nutrition=True)),
+        ("what_can_i_cook", lambda m, i: m.what_can_i_cook()),
+        ("recipes_using", lambda m, i: m.recipes_using(["flour", "eggs"])),
+    ]),
+    "reads": ("daily_reads_manager", generators.reads, [
+        ("add_reading_item", lambda m, i: m.add_reading_item("article", f"Benchmark article {i}", source="benchmark")),
+        ("list_reading_items", lambda m, i: m.list_reading_items(item_type="book")),
+        ("stream_reading_items", lambda m, i: m.stream_reading_items(item_type="book")),
+        ("search_reading_items", lambda m, i: m.search_reading_items(generators.WORDS[i])),
+    ]),
+    "ideas": ("content_idea_generator", generators.ideas, [
+        ("save_idea", lambda m, i: m.save_idea(f"benchmark idea {i}: {' '.join(generators.WORDS[i:i + 6])}")),
+        ("generate_ideas", lambda m, i: m.generate_ideas(next(iter(m.TOPIC_KEYWORDS)), 5, seed=i)),
+        ("list_ideas", lambda m, i: m.list_ideas()),
+        ("search_ideas", lambda m, i: m.search_ideas(generators.WORDS[i])),
+    ]),
+}
+
+
+@contextlib.contextmanager
+def quiet():
+    with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+        yield
+
+
+def measure(call, repeat):
+    start = time.perf_counter()
+    call(0)
+    first = time.perf_counter() - start
+
+    times = []
+    for i in range(1, repeat + 1):
+        start = time.perf_counter()
+        call(i)
+        times.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    try:
+        call(repeat + 1)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"first_s": round(first, 6), "min_s": round(min(times), 6),
+            "median_s": round(statistics.median(times), 6), "peak_bytes": peak}
+
+
+def directory_size(directory):
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(directory) for name in names)
+
+
+@contextlib.contextmanager
+def generated(name, size, seed):
+    # Yields (tracker module, scratch directory, generate seconds) with the
+    # module's files pointed at freshly generated data, restored afterwards.
+    module_name, generate, _ = TRACKERS[name]
+    module = importlib.import_module(module_name)
+    originals = {attr: getattr(module, attr) for attr in ("DATA_FILE", "DB_FILE") if hasattr(module, attr)}
+    directory = tempfile.mkdtemp(prefix=f"lifeos-bench-{name}-")
+    try:
+        for attr, path in originals.items():
+            setattr(module, attr, os.path.join(directory, os.path.basename(path)))
+        with quiet():
+            start = time.perf_counter()
+            generate(module, SIZES[size], random.Random(seed))
+        yield module, directory, time.perf_counter() - start
+    finally:
+        for attr, value in originals.items():
+            setattr(module, attr, value)
+        shutil.rmtree(directory, ignore_errors=True)
+
+
+def run_tracker(name, size, repeat, seed):
+    with generated(name, size, seed) as (module, directory, generate_s):
+        result = {"records": SIZES[size], "generate_s": round(generate_s, 3),
+                  "data_bytes": directory_size(directory), "functions": {}}
+        with quiet():
+            for function, call in TRACKERS[name][2]:
+                result["functions"][function] = measure(lambda i: call(module, i), repeat)
+    return result
+
+
+def compare(report, baseline, threshold):
+    rows = []
+    for tracker, sizes in report["results"].items():
+        for size, result in sizes.items():
+            before = baseline.get("results", {}).get(tracker, {}).get(size)
+            if not before:
+                continue
+            for function, now in result["functions"].items():
+                old = before["functions"].get(function)
+                if not old:
+                    continue
+                time_ratio = now["min_s"] / old["min_s"] if old["min_s"] else None
+                memory_ratio = now["peak_bytes"] / old["peak_bytes"] if old["peak_bytes"] else None
+                slower = time_ratio is not None and time_ratio > threshold and now["min_s"] - old["min_s"] > NOISE_FLOOR_S
+                bigger = memory_ratio is not None and memory_ratio > threshold
+                rows.append({"tracker": tracker, "size": size, "function": function,
+                             "time_ratio": time_ratio and round(time_ratio, 3),
+                             "memory_ratio": memory_ratio and round(memory_ratio, 3),
+                             "regressed": slower or bigger})
+    return rows
+
+
+def print_comparison(rows, file=sys.stderr):
+    print(f"{'benchmark':<44}{'time':>9}{'memory':>9}", file=file)
+    for row in rows:
+        label = f"{row['tracker']}.{row['function']} @{row['size']}"
+        ratios = ''.join(f"{ratio:>8.2f}x" if ratio is not None else f"{'-':>9}"
+                         for ratio in (row["time_ratio"], row["memory_ratio"]))
+        print(f"{label:<44}{ratios}{'  REGRESSED' if row['regressed'] else ''}", file=file)
+
+
+# --- Shared with the other benchmark scripts (benchmarks/formats.py) ---
+
+def positive_int(value):
+    number = int(value)
+    if number < 1:
+        raise argparse.ArgumentTypeError(f"must be at least 1, not {number}")
+    return number
+
+
+def add_common_arguments(parser, default_size="1k", repeat_help="Timed runs per function; the minimum and median are reported"):
+    parser.add_argument("--sizes", nargs='+', choices=SIZES, default=[default_size], help=f"Data sizes to run (default: {default_size}).")
+    parser.add_argument("--trackers", nargs='+', choices=TRACKERS, default=list(TRACKERS), help="Trackers to run (default: all).")
+    parser.add_argument("--repeat", type=positive_int, default=3, help=f"{repeat_help} (default: 3).")
+    parser.add_argument("--seed", type=int, default=0, help="Seed for the data generators (default: 0).")
+    parser.add_argument("--output", help="Write the JSON report here instead of stdout.")
+
+
+def new_report(args, modules=("numpy",)):
+    # An empty report whose meta records the run and the versions of `modules` (None if missing).
+    versions = {}
+    for name in modules:
+        try:
+            versions[name] = importlib.import_module(name).__version__
+        except ImportError:
+            versions[name] = None
+    return {"meta": {"created": datetime.now().isoformat(timespec="seconds"), "python": platform.python_version(),
+                     "platform": platform.platform(), **versions, "repeat": args.repeat, "seed": args.seed},
+            "results": {}}
+
+
+def run_all(args, run, report):
+    # Fills report["results"][tracker][size] with run(tracker, size).
+    for tracker in args.trackers:
+        for size in args.sizes:
+            print(f"{tracker} @{size}...", file=sys.stderr, flush=True)
+            report["results"].setdefault(tracker, {})[size] = run(tracker, size)
+    return report
+
+
+def write_report(report, output=None):
+    text = json.dumps(report, indent=2)
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+    else:
+        print(text)
+    return text
+
+
+def build_parser(prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Benchmark the Personal_Goals trackers on synthetic data.")
+    add_common_arguments(parser)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline report to compare against (default: benchmarks/baseline.json).")
+    parser.add_argument("--save-baseline", action="store_true", help="Save this report as the new baseline.")
+    parser.add_argument("--threshold", type=float, default=1.25, help="Slowdown/memory ratio that counts as a regression (default: 1.25).")
+    return parser
+
+
+def main(argv=None, prog=None):
+    args = build_parser(prog).parse_args(argv)
+    report = run_all(args, lambda tracker, size: run_tracker(tracker, size, args.repeat, args.seed), new_report(args))
+
+    regressed = False
+    if os.path.exists(args.baseline) and not args.save_baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            rows = compare(report, json.load(f), args.threshold)
+        report["comparison"] = {"baseline": args.baseline, "threshold": args.threshold, "rows": rows}
+        print_comparison(rows)
+        regressed = any(row["regressed"] for row in rows)
+
+    text = write_report(report, args.output)
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as f:
+            f.write(text + '\n')
+        print(f"Saved baseline to {args.baseline}.", file=sys.stderr)
+    return 1 if regressed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,128 @@
+import contextlib
+import csv
+import json
+import os
+import sys
+from datetime import datetime
+
+# Streaming CSV/JSONL readers and writers for the trackers' import/export
+# commands. Records flow through generators, so an import holds only the
+# validated records (which it commits with a single write) and an export
+# never builds its output in memory.
+
+FORMATS = ["csv", "jsonl"]
+# CSV has no lists, so list fields (tags, ingredients) are joined with this.
+LIST_SEPARATOR = ';'
+
+
+class ValidationError(ValueError):
+    pass
+
+
+def detect_format(path, fmt=None):
+    if fmt:
+        return fmt
+    ext = os.path.splitext(path)[1].lower().lstrip('.')
+    if ext in ("jsonl", "ndjson"):
+        return "jsonl"
+    if ext == "csv":
+        return "csv"
+    raise ValidationError(f"Cannot tell the format of '{path}'; pass --format ({' or '.join(FORMATS)}).")
+
+
+def _open(path, mode):
+    if path == '-':
+        return contextlib.nullcontext(sys.stdin if 'r' in mode else sys.stdout)
+    return open(path, mode, encoding='utf-8', newline='')
+
+
+# Yields (line_number, record) pairs from a CSV or JSONL file ('-' for stdin).
+def read_records(path, fmt=None):
+    fmt = detect_format(path, fmt)
+    with _open(path, 'r') as f:
+        if fmt == "csv":
+            reader = csv.DictReader(f)
+            for record in reader:
+                yield reader.line_num, {k: v for k, v in record.items() if v not in (None, "")}
+        else:
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    record = json.loads(line)
+                except ValueError as e:
+                    yield line_number, ValidationError(f"invalid JSON ({e})")
+                    continue
+                yield line_number, record
+
+
+def write_records(records, path, fields, fmt=None):
+    fmt = detect_format(path, fmt)
+    count = 0
+    with _open(path, 'w') as f:
+        if fmt == "csv":
+            writer = csv.DictWriter(f, fieldnames=fields, extrasaction='ignore')
+            writer.writeheader()
+            for record in records:
+                writer.writerow({k: LIST_SEPARATOR.join(v) if isinstance(v, list) else v
+                                 for k, v in record.items()})
+                count += 1
+        else:
+            for record in records:
+                f.write(json.dumps(record, ensure_ascii=False) + '\n')
+                count += 1
+    return count
+
+
+# Runs validate() over read_records() output, reporting and skipping bad rows.
+def validated(records, validate):
+    for line_number, record in records:
+        try:
+            if isinstance(record, Exception):
+                raise record
+            if not isinstance(record, dict):
+                raise ValidationError("expected an object")
+            yield validate(record)
+        except (ValidationError, ValueError, TypeError) as e:
+            print(f"Skipping record on line {line_number}: {e}", file=sys.stderr)
+
+
+# --- Field helpers for validate() functions ---
+
+def require(record, field):
+    value = record.get(field)
+    if value in (None, ""):
+        raise ValidationError(f"missing required field '{field}'")
+    return value
+
+
+def as_list(value):
+    if value is None:
+        return None
+    if isinstance(value, list):
+        return [str(v).strip() for v in value if str(v).strip()]
+    return [v.strip() for v in str(value).split(LIST_SEPARATOR) if v.strip()]
+
+
+def as_int(value, field):
+    if value is None:
+        return None
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise ValidationError(f"'{field}' must be an integer, got {value!r}")
+
+
+def as_float(value, field):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        raise ValidationError(f"'{field}' must be a number, got {value!r}")
+
+
+def as_date(value, field, date_format="%Y-%m-%d"):
+    try:
+        datetime.strptime(str(value), date_format)
+    except ValueError:
+        raise ValidationError(f"'{field}' must look like {datetime(2025, 1, 31, 9, 30).strftime(date_format)}, got {value!r}")
+    return str(value)
@@ -1,9 +1,24 @@
-import json
 import argparse
+import bisect
+import itertools
+import hashlib
+from math import prod
 import os
 import random
+from string import Formatter
+import sys
+
+import bulk
+import daemon
+import idea_index
+import profiling
+import search_index
+import storage
 
 DATA_FILE = os.path.join(os.path.dirname(__file__), 'content_data.json')
+# The list a JSONL snapshot keeps one idea per line (see storage.py).
+STREAM_KEY = "saved_ideas"
+IDEA_FIELDS = ["id", "idea", "status"]
 
 # Templates for idea generation
 IDEA_TEMPLATES = [
@@ -65,20 +80,18 @@ TOPIC_KEYWORDS = {
 
 
 def load_data():
-    if not os.path.exists(DATA_FILE):
-        return {"topics": [], "saved_ideas": []}
-    with open(DATA_FILE, 'r') as f:
-        return json.load(f)
+    return storage.load(DATA_FILE, {"topics": [], "saved_ideas": []})
 
 def save_data(data):
-    with open(DATA_FILE, 'w') as f:
-        json.dump(data, f, indent=4)
+    storage.save(DATA_FILE, data, indent=4)
+
+def record(data, *ops):
+    storage.record(DATA_FILE, data, ops, indent=4)
 
 def add_topic(topic):
     data = load_data()
     if topic not in data["topics"]:
-        data["topics"].append(topic)
-        save_data(data)
+        record(data, storage.op_append(["topics"], topic))
         print(f"Topic '{topic}' added.")
     else:
         print(f"Topic '{topic}' already exists.")
@@ -93,58 +106,230 @@ def list_topics():
         print(f"- {topic}")
     print("----------------")
 
-def generate_ideas(topic, number=5):
+# --- Idea space ---
+#
+# Every idea is one template plus one keyword choice for each placeholder the
+# template actually uses, so the space of distinct ideas can be counted and
+# indexed directly. Sampling picks distinct indexes instead of retrying
+# random draws until enough unique ideas turn up.
+
+def template_fields(template):
+    # Unique placeholders in order of first use ("{noun} vs. {noun}" is one field)
+    return list(dict.fromkeys(name for _, name, _, _ in Formatter().parse(template) if name))
+
+def idea_space(topic):
+    keywords = TOPIC_KEYWORDS[topic]
+    space = []
+    for template in IDEA_TEMPLATES:
+        fields = template_fields(template)
+        choices = []
+        for field in fields:
+            value = keywords.get(field, [""])
+            choices.append(value if isinstance(value, list) else [value])
+        space.append((template, fields, choices, prod(len(c) for c in choices)))
+    return space
+
+def count_ideas(topic):
+    return sum(size for _, _, _, size in idea_space(topic))
+
+def idea_at(space, offsets, index):
+    # Decode a flat index: pick the template, then read the keyword choices
+    # as the digits of a mixed-radix number.
+    t = bisect.bisect_right(offsets, index) - 1
+    template, fields, choices, _ = space[t]
+    index -= offsets[t]
+    values = {}
+    for field, options in zip(fields, choices):
+        index, digit = divmod(index, len(options))
+        values[field] = options[digit]
+    return template.format(**values)
+
+FEISTEL_ROUNDS = 6
+
+def shuffled_indexes(total, rng):
+    # A keyed Feistel network permutes the 4**k indexes covering `total`;
+    # cycle-walking re-encrypts anything past the end until it lands inside,
+    # which still leaves a permutation of range(total). Each step is O(1)
+    # state, so the first draws come out without touching the rest of the
+    # space, and the order has none of the stride structure of an affine map.
+    half_bits = max(1, ((total - 1).bit_length() + 1) // 2)
+    mask = (1 << half_bits) - 1
+    keys = [rng.getrandbits(64).to_bytes(8, 'little') for _ in range(FEISTEL_ROUNDS)]
+
+    def encrypt(value):
+        left, right = value >> half_bits, value & mask
+        for key in keys:
+            digest = hashlib.blake2b(right.to_bytes(8, 'little'), digest_size=8, key=key).digest()
+            left, right = right, left ^ (int.from_bytes(digest, 'little') & mask)
+        return (left << half_bits) | right
+
+    for index in range(total):
+        value = encrypt(index)
+        while value >= total:
+            value = encrypt(value)
+        yield value
+
+def iter_ideas(topic, number, seed=None):
+    space = idea_space(topic)
+    offsets = [0]
+    for _, _, _, size in space:
+        offsets.append(offsets[-1] + size)
+    total = offsets.pop()
+    for index in itertools.islice(shuffled_indexes(total, random.Random(seed)), number):
+        yield idea_at(space, offsets, index)
+
+def generate_ideas(topic, number=5, seed=None, save=False):
     if topic not in TOPIC_KEYWORDS:
         print(f"I don't have specific idea templates for '{topic}' yet, but you can still add it as a topic.")
         return
 
-    keywords = TOPIC_KEYWORDS[topic]
-    generated_ideas = set() # Use a set to avoid duplicate ideas
-
-    while len(generated_ideas) < number:
-        template = random.choice(IDEA_TEMPLATES)
-        idea = template.format(
-            verb=random.choice(keywords.get("verb", [""])),
-            noun=random.choice(keywords.get("noun", [""])),
-            gerund=random.choice(keywords.get("gerund", [""])),
-            role=random.choice(keywords.get("role", [""])),
-            activity=random.choice(keywords.get("activity", [""])),
-            topic=keywords.get("topic", "")
-        )
-        generated_ideas.add(idea)
+    total = count_ideas(topic)
+    if number > total:
+        print(f"Only {total} distinct ideas exist for '{topic}'; showing all of them.")
 
+    # A drawn seed makes the sequence replayable, so --save stores exactly the
+    # ideas shown without holding them in a list.
+    if seed is None:
+        seed = random.getrandbits(64)
     print(f"\n--- Ideas for {topic} ---")
-    for idea in generated_ideas:
+    for idea in iter_ideas(topic, number, seed):
         print(f"- {idea}")
     print("--------------------------")
+    if save:
+        save_ideas(iter_ideas(topic, number, seed))
+
+# --- Saved idea dedup index (see idea_index.py) ---
+
+def index_file():
+    return os.path.splitext(DATA_FILE)[0] + '_index.sqlite'
+
+def load_idea_index(data):
+    conn = idea_index.connect(index_file())
+    if idea_index.count(conn) != len(data["saved_ideas"]):
+        idea_index.rebuild(conn, data["saved_ideas"])
+    return conn
+
+def search_index_file():
+    return os.path.splitext(DATA_FILE)[0] + '_search_index.sqlite'
+
+def load_search_index(data):
+    index = search_index.connect(search_index_file())
+    if search_index.count(index) != len(data["saved_ideas"]):
+        search_index.rebuild(index, ((idea["id"], idea["idea"]) for idea in data["saved_ideas"]))
+    return index
+
+def _new_idea(conn, idea_text):
+    # Returns (idea, signature, near-duplicates), or None for an exact duplicate.
+    if idea_index.contains(conn, idea_text):
+        return None
+    sig = idea_index.signature(idea_text)
+    near = idea_index.near_duplicates(conn, sig)
+    idea = {"id": idea_index.next_id(conn), "idea": idea_text, "status": "saved"}
+    return idea, sig, near
+
+def _warn_near(near):
+    similar = ', '.join(f"[{idea_id}] ({similarity:.0%})" for similarity, idea_id in near[:3])
+    print(f"  Warning: looks similar to saved idea(s) {similar}.")
 
 def save_idea(idea_text):
     data = load_data()
-    # Simple check to avoid duplicates
-    for idea in data["saved_ideas"]:
-        if idea["idea"] == idea_text:
-            print("This idea is already saved.")
-            return
-
-    new_id = max([idea.get("id", 0) for idea in data["saved_ideas"]] + [0]) + 1
-    data["saved_ideas"].append({"id": new_id, "idea": idea_text, "status": "saved"})
-    save_data(data)
+    conn = load_idea_index(data)
+    new = _new_idea(conn, idea_text)
+    if new is None:
+        conn.close()
+        print("This idea is already saved.")
+        return
+
+    idea, sig, near = new
+    text_index = load_search_index(data)
+    record(data, storage.op_append(["saved_ideas"], idea))
+    with conn:
+        idea_index.add(conn, idea["id"], idea_text, sig)
+    conn.close()
+    with text_index:
+        search_index.update(text_index, idea["id"], idea_text)
+    text_index.close()
     print(f"Saved idea: '{idea_text}'")
+    if near:
+        _warn_near(near)
 
-def list_ideas():
+def save_ideas(idea_texts):
+    # Bulk variant: one load, indexed dedup per idea, one write for each file.
     data = load_data()
-    if not data["saved_ideas"]:
+    conn = load_idea_index(data)
+    text_index = load_search_index(data)
+    saved = duplicates = 0
+    for idea_text in idea_texts:
+        idea_text = idea_text.strip()
+        if not idea_text:
+            continue
+        new = _new_idea(conn, idea_text)
+        if new is None:
+            duplicates += 1
+            continue
+        idea, sig, near = new
+        data["saved_ideas"].append(idea)
+        idea_index.add(conn, idea["id"], idea_text, sig)
+        search_index.update(text_index, idea["id"], idea_text)
+        saved += 1
+        if near:
+            print(f"Saved [{idea['id']}] '{idea_text}'")
+            _warn_near(near)
+    if saved:
+        save_data(data)
+        conn.commit()
+        text_index.commit()
+    conn.close()
+    text_index.close()
+    print(f"Saved {saved} ideas ({duplicates} duplicates skipped).")
+
+def list_ideas(fmt="text"):
+    ideas = storage.iter_stream(DATA_FILE, STREAM_KEY, load_data)
+    if fmt != "text":
+        bulk.write_records(ideas, '-', IDEA_FIELDS, fmt)
+        return
+
+    first = next(ideas, None)
+    if first is None:
         print("No ideas saved yet.")
         return
 
     print("\n--- Saved Ideas ---")
-    for idea in data["saved_ideas"]:
+    for idea in itertools.chain([first], ideas):
         print(f"[{idea['id']}] {idea['idea']} (Status: {idea['status']})")
     print("---------------------")
 
+def search_ideas(query, limit=10):
+    data = load_data()
+    index = load_search_index(data)
+    hits = search_index.search(index, query, limit)
+    index.close()
+    if not hits:
+        print(f"No saved ideas match '{query}'.")
+        return hits
+
+    ideas = {idea["id"]: idea for idea in data["saved_ideas"]}
+    print(f"\n--- Ideas matching '{query}' ---")
+    for score, idea_id in hits:
+        idea = ideas[idea_id]
+        print(f"[{idea_id}] {idea['idea']} (Status: {idea['status']}, score {score:.2f})")
+    print("---------------------")
+    return hits
 
-def main():
-    parser = argparse.ArgumentParser(description="A content idea generator.")
+
+def convert_storage(fmt):
+    data = load_data()
+    try:
+        storage.convert(DATA_FILE, data, fmt, STREAM_KEY, indent=4)
+    except ImportError as e:
+        print(f"Error: {e}")
+        return
+    print(f"Converted {os.path.basename(DATA_FILE)} to {fmt}.")
+
+
+def build_parser(prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="A content idea generator.")
+    profiling.add_arguments(parser)
     subparsers = parser.add_subparsers(dest="command", help="Available commands")
 
     # Add Topic command
@@ -157,28 +342,65 @@ def main():
     # Generate Ideas command
     generate_ideas_parser = subparsers.add_parser("generate-ideas", help="Generate content ideas for a topic.")
     generate_ideas_parser.add_argument("topic", type=str, help="The topic to generate ideas for.")
+    generate_ideas_parser.add_argument("--number", type=int, default=5, help="How many distinct ideas to generate (default: 5).")
+    generate_ideas_parser.add_argument("--seed", type=int, help="Random seed for reproducible ideas.")
+    generate_ideas_parser.add_argument("--save", action="store_true", help="Also save every generated idea.")
 
     # Save Idea command
     save_idea_parser = subparsers.add_parser("save-idea", help="Save a generated idea.")
     save_idea_parser.add_argument("idea_text", type=str, help="The full text of the idea to save.")
 
+    # Save Ideas command
+    save_ideas_parser = subparsers.add_parser("save-ideas", help="Bulk-save ideas from a file, one per line.")
+    save_ideas_parser.add_argument("file", type=str, help="Path to the file, or '-' for stdin.")
+
     # List Ideas command
     list_ideas_parser = subparsers.add_parser("list-ideas", help="List all saved ideas.")
+    list_ideas_parser.add_argument("--format", choices=["text"] + bulk.FORMATS, default="text", help="Output format (default: text; jsonl and csv print one idea per line).")
 
-    args = parser.parse_args()
-
-    if args.command == "add-topic":
-        add_topic(args.topic)
-    elif args.command == "list-topics":
-        list_topics()
-    elif args.command == "generate-ideas":
-        generate_ideas(args.topic)
-    elif args.command == "save-idea":
-        save_idea(args.idea_text)
-    elif args.command == "list-ideas":
-        list_ideas()
-    else:
-        parser.print_help()
+    # Search command
+    search_parser = subparsers.add_parser("search", help="Full-text search over saved ideas, best matches first.")
+    search_parser.add_argument("query", nargs='+', help="Words to search for.")
+    search_parser.add_argument("--limit", type=int, default=10, help="Maximum number of results (default: 10).")
+
+    # Convert command
+    convert_parser = subparsers.add_parser("convert", help="Rewrite the data file as pretty or compact JSON, orjson, MessagePack, or JSONL (one idea per line, streamed by 'list-ideas').")
+    convert_parser.add_argument("format", choices=storage.FORMATS, help="Storage format.")
+    return parser
+
+def main(argv=None, prog=None):
+    if daemon.forward("content_idea_generator", argv, prog):
+        return
+
+    parser = build_parser(prog)
+    args = parser.parse_args(argv)
+
+    with profiling.profile("content_idea_generator", args):
+        if args.command == "add-topic":
+            add_topic(args.topic)
+        elif args.command == "list-topics":
+            list_topics()
+        elif args.command == "generate-ideas":
+            generate_ideas(args.topic, args.number, args.seed, args.save)
+        elif args.command == "save-idea":
+            save_idea(args.idea_text)
+        elif args.command == "save-ideas":
+            try:
+                if args.file == '-':
+                    save_ideas(sys.stdin)
+                else:
+                    with open(args.file, 'r', encoding='utf-8') as f:
+                        save_ideas(f)
+            except OSError as e:
+                print(f"Error: {e}")
+        elif args.command == "list-ideas":
+            list_ideas(args.format)
+        elif args.command == "search":
+            search_ideas(' '.join(args.query), args.limit)
+        elif args.command == "convert":
+            convert_storage(args.format)
+        else:
+            parser.print_help()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,246 @@
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import os
+import signal
+import socket
+import socketserver
+import sys
+import threading
+import time
+import traceback
+
+import profiling
+import storage
+
+# Resident daemon for the Personal_Goals trackers.
+#
+# `python3 daemon.py serve` imports every tracker once, keeps their parsed
+# state in memory (see storage.enable_resident) and listens on a Unix domain
+# socket. Each tracker's main() first calls forward(): if a daemon is
+# listening, the command line is sent over the socket and executed there, so
+# the client skips argparse and the JSON parse entirely. Without a daemon,
+# forward() returns False and the script runs against the files as usual.
+# Profiled commands are forwarded too (with the client's LIFEOS_PROFILE), so
+# they never write the files behind the daemon's queued writes; the report
+# then describes the command as the daemon ran it.
+
+SOCKET_PATH = os.environ.get("LIFEOS_SOCKET", os.path.join(os.path.dirname(os.path.abspath(__file__)), '.lifeos.sock'))
+FLUSH_INTERVAL = 1.0
+
+TRACKERS = [
+    "workout_tracker",
+    "skills",
+    "meal_planner",
+    "daily_reads_manager",
+    "content_idea_generator",
+]
+
+
+# --- Client ---
+
+def _connect(timeout=None):
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    sock.settimeout(timeout)
+    try:
+        sock.connect(SOCKET_PATH)
+    except OSError:
+        sock.close()
+        raise
+    return sock
+
+
+def _exchange(sock, payload):
+    with sock:
+        sock.sendall(json.dumps(payload).encode('utf-8') + b'\n')
+        sock.shutdown(socket.SHUT_WR)
+        chunks = []
+        while True:
+            chunk = sock.recv(65536)
+            if not chunk:
+                break
+            chunks.append(chunk)
+    return json.loads(b''.join(chunks))
+
+
+def forward(module_name, argv=None, prog=None):
+    if argv is None:
+        argv = sys.argv[1:]
+    if os.environ.get("LIFEOS_NO_DAEMON") or not os.path.exists(SOCKET_PATH):
+        return False
+
+    try:
+        sock = _connect()
+    except OSError:
+        return False  # Stale socket file; nothing is listening.
+
+    payload = {"module": module_name, "prog": prog or os.path.basename(sys.argv[0]), "argv": list(argv), "cwd": os.getcwd(),
+               "profile_env": os.environ.get(profiling.ENV_VAR)}
+    if argv[:1] in (["import"], ["save-ideas"]) and '-' in argv:
+        payload["stdin"] = sys.stdin.read()
+    try:
+        response = _exchange(sock, payload)
+    except (OSError, ValueError) as e:
+        # The command may already have run, so don't retry it locally.
+        print(f"Error talking to the Life OS daemon: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    sys.stdout.write(response["stdout"])
+    sys.stderr.write(response["stderr"])
+    if response["code"]:
+        sys.exit(response["code"])
+    return True
+
+
+# --- Server ---
+
+def _run_command(module_name, prog, argv, cwd, stdin, profile_env=None):
+    if module_name not in TRACKERS:
+        return {"stdout": "", "stderr": f"Unknown tracker '{module_name}'.\n", "code": 2}
+
+    module = importlib.import_module(module_name)
+    out, err = io.StringIO(), io.StringIO()
+    code = 0
+    saved_argv, saved_cwd, saved_stdin = sys.argv, os.getcwd(), sys.stdin
+    saved_profile_env = os.environ.pop(profiling.ENV_VAR, None)
+    sys.argv = [prog] + argv
+    sys.stdin = io.StringIO(stdin or "")
+    if profile_env:
+        os.environ[profiling.ENV_VAR] = profile_env
+    try:
+        # Relative paths (e.g. import/export files) resolve against the client's cwd.
+        os.chdir(cwd or saved_cwd)
+        with contextlib.redirect_stdout(out), contextlib.redirect_stderr(err):
+            try:
+                module.main(argv, prog or None)
+            except SystemExit as e:
+                if e.code is None or isinstance(e.code, int):
+                    code = e.code or 0
+                else:
+                    print(e.code, file=sys.stderr)
+                    code = 1
+            except Exception:
+                traceback.print_exc()
+                code = 1
+    finally:
+        sys.argv, sys.stdin = saved_argv, saved_stdin
+        os.chdir(saved_cwd)
+        os.environ.pop(profiling.ENV_VAR, None)
+        if saved_profile_env is not None:
+            os.environ[profiling.ENV_VAR] = saved_profile_env
+    return {"stdout": out.getvalue(), "stderr": err.getvalue(), "code": code}
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        try:
+            request = json.loads(self.rfile.readline())
+        except ValueError:
+            return
+
+        control = request.get("control")
+        if control == "status":
+            response = {"pid": os.getpid(), "pending_writes": storage.pending_writes(),
+                        "uptime": round(time.monotonic() - self.server.started, 1)}
+        elif control == "stop":
+            # shutdown() blocks until serve_forever() returns, so call it off this thread.
+            threading.Thread(target=self.server.shutdown).start()
+            response = {"stopping": True}
+        else:
+            response = _run_command(request.get("module"), request.get("prog", ""), request.get("argv", []),
+                                    request.get("cwd"), request.get("stdin"), request.get("profile_env"))
+            if storage.pending_writes() and self.server.dirty_since is None:
+                self.server.dirty_since = time.monotonic()
+        self.wfile.write(json.dumps(response).encode('utf-8'))
+
+
+class _Server(socketserver.UnixStreamServer):
+    def __init__(self, path, flush_interval):
+        super().__init__(path, _Handler)
+        self.flush_interval = flush_interval
+        self.started = time.monotonic()
+        self.dirty_since = None
+
+    def service_actions(self):
+        # Batch disk writes: flush at most once per flush_interval.
+        if self.dirty_since is not None and time.monotonic() - self.dirty_since >= self.flush_interval:
+            self.dirty_since = None
+            try:
+                storage.flush()
+            except storage.JournalConflictError as e:
+                # Writes stay queued; the next command that touches the file reports it too.
+                print(f"Error: {e}", file=sys.stderr)
+
+
+def serve(flush_interval=FLUSH_INTERVAL):
+    try:
+        _connect().close()
+        print(f"A daemon is already listening on {SOCKET_PATH}.", file=sys.stderr)
+        return 1
+    except OSError:
+        pass
+    if os.path.exists(SOCKET_PATH):
+        os.remove(SOCKET_PATH)
+
+    # Trackers imported here must run locally instead of forwarding back to us.
+    os.environ["LIFEOS_NO_DAEMON"] = "1"
+    storage.enable_resident()
+    for module_name in TRACKERS:
+        importlib.import_module(module_name).load_data()
+
+    server = _Server(SOCKET_PATH, flush_interval)
+    os.chmod(SOCKET_PATH, 0o600)
+    signal.signal(signal.SIGTERM, lambda signum, frame: sys.exit(0))
+    print(f"Life OS daemon listening on {SOCKET_PATH} (pid {os.getpid()}).")
+    sys.stdout.flush()
+    try:
+        server.serve_forever(poll_interval=min(0.5, flush_interval))
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        storage.flush()
+        server.server_close()
+        if os.path.exists(SOCKET_PATH):
+            os.remove(SOCKET_PATH)
+    print("Life OS daemon stopped; all writes flushed.")
+    return 0
+
+
+def build_parser(prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="Resident daemon serving the Personal_Goals trackers over a Unix socket.")
+    subparsers = parser.add_subparsers(dest="command", help="Available commands")
+
+    # Serve command
+    serve_parser = subparsers.add_parser("serve", help="Run the daemon in the foreground.")
+    serve_parser.add_argument("--flush-interval", type=float, default=FLUSH_INTERVAL, help=f"Seconds between batched disk flushes (default: {FLUSH_INTERVAL}).")
+
+    # Status command
+    subparsers.add_parser("status", help="Show whether a daemon is running.")
+
+    # Stop command
+    subparsers.add_parser("stop", help="Flush pending writes and stop the daemon.")
+    return parser
+
+def main(argv=None, prog=None):
+    parser = build_parser(prog)
+    args = parser.parse_args(argv)
+
+    if args.command == "serve":
+        sys.exit(serve(args.flush_interval))
+    elif args.command in ("status", "stop"):
+        try:
+            response = _exchange(_connect(timeout=5), {"control": args.command})
+        except OSError:
+            print("No daemon is running.")
+            sys.exit(1)
+        if args.command == "status":
+            print(f"Daemon running (pid {response['pid']}, up {response['uptime']}s, {response['pending_writes']} pending writes).")
+        else:
+            print("Daemon is stopping.")
+    else:
+        parser.print_help()
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,124 @@
+import json
+import sqlite3
+
+import profiling
+import records
+
+# SQLite-backed store for daily_reads_manager.py.
+#
+# Each reading item is kept as a JSON document in `reading_items.body`, with
+# the fields we filter on (type, status, last_updated) copied into indexed
+# columns and tags normalized into `reading_item_tags`. Filtered listing and
+# lookups by id are index queries instead of full-file parses.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS reading_items (
+    id INTEGER PRIMARY KEY,
+    type TEXT NOT NULL,
+    status TEXT,
+    last_updated TEXT,
+    body TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_reading_items_type ON reading_items(type);
+CREATE INDEX IF NOT EXISTS idx_reading_items_status ON reading_items(status);
+CREATE INDEX IF NOT EXISTS idx_reading_items_last_updated ON reading_items(last_updated);
+
+CREATE TABLE IF NOT EXISTS reading_item_tags (
+    tag TEXT NOT NULL,
+    item_id INTEGER NOT NULL REFERENCES reading_items(id) ON DELETE CASCADE,
+    PRIMARY KEY (tag, item_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_reading_item_tags_item ON reading_item_tags(item_id);
+"""
+
+
+def connect(db_file):
+    with profiling.phase("load"):
+        conn = sqlite3.connect(db_file)
+        conn.execute("PRAGMA foreign_keys = ON")
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.executescript(SCHEMA)
+    return conn
+
+
+def _row(item):
+    return (item["id"], item.get("type"), item.get("status"), item.get("last_updated"),
+            json.dumps(item.to_dict(), ensure_ascii=False))
+
+
+def _tag_rows(item):
+    return [(tag, item["id"]) for tag in dict.fromkeys(item.get("tags") or [])]
+
+
+def next_id(conn):
+    (max_id,) = conn.execute("SELECT MAX(id) FROM reading_items").fetchone()
+    return (max_id or 0) + 1
+
+
+def count_items(conn):
+    return conn.execute("SELECT COUNT(*) FROM reading_items").fetchone()[0]
+
+
+def get_item(conn, item_id):
+    with profiling.phase("load"):
+        row = conn.execute("SELECT body FROM reading_items WHERE id = ?", (item_id,)).fetchone()
+        return records.ReadingItem.from_dict(json.loads(row[0])) if row else None
+
+
+def _insert(conn, item):
+    conn.execute("INSERT INTO reading_items (id, type, status, last_updated, body) "
+                 "VALUES (?, ?, ?, ?, ?)", _row(item))
+    conn.executemany("INSERT INTO reading_item_tags (tag, item_id) VALUES (?, ?)", _tag_rows(item))
+
+
+def insert_items(conn, items):
+    with profiling.phase("save"), conn:
+        for item in items:
+            _insert(conn, item)
+
+
+def update_item(conn, item):
+    with profiling.phase("save"), conn:
+        conn.execute("UPDATE reading_items SET type = ?, status = ?, last_updated = ?, body = ? WHERE id = ?",
+                     _row(item)[1:] + (item["id"],))
+        conn.execute("DELETE FROM reading_item_tags WHERE item_id = ?", (item["id"],))
+        conn.executemany("INSERT INTO reading_item_tags (tag, item_id) VALUES (?, ?)", _tag_rows(item))
+
+
+def delete_item(conn, item_id):
+    with profiling.phase("save"), conn:
+        cursor = conn.execute("DELETE FROM reading_items WHERE id = ?", (item_id,))
+    return cursor.rowcount > 0
+
+
+def query_items(conn, item_type=None, status=None, tag=None):
+    with profiling.phase("load"):
+        return list(iter_items(conn, item_type, status, tag))
+
+
+def iter_items(conn, item_type=None, status=None, tag=None):
+    # Rows are fetched as the caller consumes them (query_items() collects them).
+    sql = "SELECT r.body FROM reading_items r"
+    clauses, params = [], []
+    if tag:
+        sql += " JOIN reading_item_tags t ON t.item_id = r.id AND t.tag = ?"
+        params.append(tag)
+    if item_type:
+        clauses.append("r.type = ?")
+        params.append(item_type)
+    if status:
+        clauses.append("r.status = ?")
+        params.append(status)
+    if clauses:
+        sql += " WHERE " + " AND ".join(clauses)
+    sql += " ORDER BY r.id"
+    for (body,) in conn.execute(sql, params):
+        yield records.ReadingItem.from_dict(json.loads(body))
+
+
+def import_items(conn, items):
+    # Replaces the whole table in one transaction.
+    with profiling.phase("save"), conn:
+        conn.execute("DELETE FROM reading_items")
+        for item in items:
+            _insert(conn, item)
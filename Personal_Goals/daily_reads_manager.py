@@ -1,26 +1,79 @@
-import json
+import itertools
 import os
 from datetime import datetime
 
+import bulk
+import daemon
+import daily_reads_db
+import profiling
+import records
+import search_index
+import storage
+
 DATA_FILE = os.path.join(os.path.dirname(__file__), 'daily_reads.json') # Changed to daily_reads.json
+DB_FILE = os.path.join(os.path.dirname(__file__), 'daily_reads.db')
+# The list a JSONL snapshot keeps one item per line (see storage.py).
+STREAM_KEY = "reading_items"
 
 def load_data():
-    if not os.path.exists(DATA_FILE) or os.stat(DATA_FILE).st_size == 0:
-        return {"reading_items": []} # Simplified initial structure
-    with open(DATA_FILE, 'r', encoding='utf-8') as f:
-        return json.load(f)
+    data = storage.load(DATA_FILE, {"reading_items": []}) # Simplified initial structure
+    records.convert(data["reading_items"], records.ReadingItem)
+    return data
 
 def save_data(data):
-    with open(DATA_FILE, 'w', encoding='utf-8') as f:
-        json.dump(data, f, ensure_ascii=False, indent=2)
+    storage.save(DATA_FILE, data, ensure_ascii=False, indent=2)
 
-def add_reading_item(item_type, title, **kwargs):
+def record(data, *ops):
+    storage.record(DATA_FILE, data, ops, ensure_ascii=False, indent=2)
+
+def use_sqlite():
+    # The SQLite store takes over once `migrate-sqlite` has created it.
+    return os.path.exists(DB_FILE)
+
+def migrate_to_sqlite(force=False):
+    # Importing replaces the table, so a second run would drop every change
+    # made through the database since the first one.
+    if use_sqlite() and not force:
+        print(f"{os.path.basename(DB_FILE)} already exists and is the live store; not migrating again.")
+        print(f"Use --force to replace its contents with {os.path.basename(DATA_FILE)}.")
+        return
     data = load_data()
-    
-    new_id = 1
-    if data["reading_items"]:
-        new_id = max(item.get("id", 0) for item in data["reading_items"]) + 1
+    conn = daily_reads_db.connect(DB_FILE)
+    daily_reads_db.import_items(conn, data["reading_items"])
+    conn.close()
+    print(f"Imported {len(data['reading_items'])} reading items into {os.path.basename(DB_FILE)}.")
+    print(f"{os.path.basename(DATA_FILE)} is no longer read while the database exists; keep it as a backup.")
+
+# --- Search index (see search_index.py) ---
+
+def search_index_file():
+    return os.path.splitext(DATA_FILE)[0] + '_search_index.sqlite'
+
+def reading_item_text(item):
+    fields = [item.get("title"), item.get("content"), item.get("author")] + list(item.get("tags") or [])
+    return ' '.join(str(value) for value in fields if value)
+
+def load_search_index(conn=None, data=None):
+    # Open before mutating so the count check sees the state the index was built for.
+    index = search_index.connect(search_index_file())
+    count = daily_reads_db.count_items(conn) if conn else len(data["reading_items"])
+    if search_index.count(index) != count:
+        items = daily_reads_db.query_items(conn) if conn else data["reading_items"]
+        search_index.rebuild(index, ((item["id"], reading_item_text(item)) for item in items))
+    return index
+
+def reindex_reading_item(index, item_id, item):
+    # Updates the item's postings (item=None removes them) and closes the index.
+    with index:
+        search_index.update(index, item_id, reading_item_text(item) if item is not None else None)
+    index.close()
 
+def next_item_id(data):
+    if not data["reading_items"]:
+        return 1
+    return max(item.get("id", 0) for item in data["reading_items"]) + 1
+
+def build_reading_item(new_id, item_type, title, **kwargs):
     new_item = {
         "id": new_id,
         "type": item_type,
@@ -65,88 +118,288 @@ def add_reading_item(item_type, title, **kwargs):
             "tags": kwargs.get("tags", ["motivation"])
         })
         new_item.pop("title", None) # Remove title if quote specific content is used for display
-    
-    data["reading_items"].append(new_item)
-    save_data(data)
+    return records.ReadingItem.from_dict(new_item)
+
+def add_reading_item(item_type, title, **kwargs):
+    conn = data = None
+    if use_sqlite():
+        conn = daily_reads_db.connect(DB_FILE)
+        new_id = daily_reads_db.next_id(conn)
+    else:
+        data = load_data()
+        new_id = next_item_id(data)
+    index = load_search_index(conn, data)
+
+    new_item = build_reading_item(new_id, item_type, title, **kwargs)
+    if conn:
+        daily_reads_db.insert_items(conn, [new_item])
+        conn.close()
+    else:
+        record(data, storage.op_append(["reading_items"], new_item))
+    reindex_reading_item(index, new_id, new_item)
     print(f"Added new {item_type}: '{new_item.get('title', new_item.get('content'))}' with ID {new_id}")
     return new_item
 
 def update_reading_item(item_id, **kwargs):
-    data = load_data()
-    found = False
-    for item in data["reading_items"]:
-        if item.get("id") == item_id:
+    if use_sqlite():
+        conn = daily_reads_db.connect(DB_FILE)
+        item = daily_reads_db.get_item(conn, item_id)
+        if item:
+            index = load_search_index(conn)
             for key, value in kwargs.items():
                 if key in item: # Only update existing keys for safety
                     item[key] = value
             item["last_updated"] = datetime.now().strftime("%Y-%m-%d")
+            daily_reads_db.update_item(conn, item)
+            reindex_reading_item(index, item_id, item)
+            print(f"Updated item ID {item_id}.")
+        else:
+            print(f"Item with ID {item_id} not found.")
+        conn.close()
+        return
+
+    data = load_data()
+    found = False
+    for index, item in enumerate(data["reading_items"]):
+        if item.get("id") == item_id:
+            ops = [storage.op_set(["reading_items", index, key], value)
+                   for key, value in kwargs.items()
+                   if key in item] # Only update existing keys for safety
+            ops.append(storage.op_set(["reading_items", index, "last_updated"], datetime.now().strftime("%Y-%m-%d")))
+            text_index = load_search_index(data=data)
+            record(data, *ops)
+            reindex_reading_item(text_index, item_id, item)
             found = True
             break
     if found:
-        save_data(data)
         print(f"Updated item ID {item_id}.")
     else:
         print(f"Item with ID {item_id} not found.")
 
 def delete_reading_item(item_id):
+    if use_sqlite():
+        conn = daily_reads_db.connect(DB_FILE)
+        index = load_search_index(conn)
+        if daily_reads_db.delete_item(conn, item_id):
+            reindex_reading_item(index, item_id, None)
+            print(f"Deleted item ID {item_id}.")
+        else:
+            index.close()
+            print(f"Item with ID {item_id} not found.")
+        conn.close()
+        return
+
     data = load_data()
-    initial_count = len(data["reading_items"])
-    data["reading_items"] = [item for item in data["reading_items"] if item.get("id") != item_id]
-    if len(data["reading_items"]) < initial_count:
-        save_data(data)
+    index = next((i for i, item in enumerate(data["reading_items"]) if item.get("id") == item_id), None)
+    if index is not None:
+        text_index = load_search_index(data=data)
+        record(data, storage.op_delete(["reading_items", index]))
+        reindex_reading_item(text_index, item_id, None)
         print(f"Deleted item ID {item_id}.")
     else:
         print(f"Item with ID {item_id} not found.")
 
-def list_reading_items(item_type=None, status=None, tag=None):
-    data = load_data()
-    items = data["reading_items"]
-    
+# --- Bulk import / export ---
+
+READING_ITEM_TYPES = ["book", "certification", "article", "quote"]
+READING_ITEM_FIELDS = ["id", "type", "title", "content", "author", "source", "link", "progress_unit",
+                       "current_progress", "total_progress", "status", "tags",
+                       "target_completion_date", "last_updated"]
+
+def _validate_reading_item(record):
+    item_type = bulk.require(record, "type")
+    if item_type not in READING_ITEM_TYPES:
+        raise bulk.ValidationError(f"unknown type '{item_type}'")
+    if item_type == "quote":
+        bulk.require(record, "content")
+    else:
+        bulk.require(record, "title")
+
+    kwargs = {k: v for k, v in record.items()
+              if k in READING_ITEM_FIELDS and k not in ("id", "type", "title", "last_updated", "progress_unit")}
+    for field in ("current_progress", "total_progress"):
+        if field in kwargs:
+            kwargs[field] = bulk.as_int(kwargs[field], field)
+    if "tags" in kwargs:
+        kwargs["tags"] = bulk.as_list(kwargs["tags"])
+    if kwargs.get("target_completion_date"):
+        bulk.as_date(kwargs["target_completion_date"], "target_completion_date")
+    last_updated = record.get("last_updated")
+    if last_updated:
+        bulk.as_date(last_updated, "last_updated")
+    return item_type, record.get("title"), kwargs, last_updated
+
+def _imported_item(new_id, row):
+    item_type, title, kwargs, last_updated = row
+    item = build_reading_item(new_id, item_type, title, **kwargs)
+    if last_updated:
+        item["last_updated"] = last_updated
+    return item
+
+def import_reading_items(path, fmt=None):
+    conn = data = None
+    if use_sqlite():
+        conn = daily_reads_db.connect(DB_FILE)
+        first_id = daily_reads_db.next_id(conn)
+    else:
+        data = load_data()
+        first_id = next_item_id(data)
+    index = load_search_index(conn, data)
+
+    # Ids are handed out sequentially from a single max(id) lookup.
+    rows = bulk.validated(bulk.read_records(path, fmt), _validate_reading_item)
+    items = [_imported_item(new_id, row) for new_id, row in enumerate(rows, first_id)]
+    if not items:
+        index.close()
+        print("No reading items imported.")
+        return items
+
+    if conn:
+        daily_reads_db.insert_items(conn, items)
+        conn.close()
+    else:
+        data["reading_items"].extend(items)
+        save_data(data)
+    with index:
+        for item in items:
+            search_index.update(index, item["id"], reading_item_text(item))
+    index.close()
+    print(f"Imported {len(items)} reading items (IDs {first_id}-{first_id + len(items) - 1}).")
+    return items
+
+def export_reading_items(path, fmt=None):
+    if use_sqlite():
+        conn = daily_reads_db.connect(DB_FILE)
+        items = daily_reads_db.query_items(conn)
+        conn.close()
+    else:
+        items = load_data()["reading_items"]
+    count = bulk.write_records((item.to_dict() for item in items), path, READING_ITEM_FIELDS, fmt)
+    if path != '-':
+        print(f"Exported {count} reading items to {path}.")
+
+def iter_reading_items(item_type=None, status=None, tag=None):
+    # Items are read, filtered and handed on one at a time: from SQLite's
+    # indexes, or line by line from a JSONL snapshot.
+    if use_sqlite():
+        conn = daily_reads_db.connect(DB_FILE)
+        try:
+            yield from daily_reads_db.iter_items(conn, item_type, status, tag)
+        finally:
+            conn.close()
+        return
+
+    items = storage.iter_stream(DATA_FILE, STREAM_KEY, load_data)
     if item_type:
-        items = [item for item in items if item.get("type") == item_type]
+        items = (item for item in items if item.get("type") == item_type)
     if status:
-        items = [item for item in items if item.get("status") == status]
+        items = (item for item in items if item.get("status") == status)
     if tag:
-        items = [item for item in items if tag in item.get("tags", [])]
+        items = (item for item in items if tag in (item.get("tags") or []))
+    yield from records.iter_converted(items, records.ReadingItem)
+
+def _print_reading_item(item):
+    print(f"ID: {item.get('id')}")
+    print(f"Type: {item.get('type')}")
+    # Display title for most, content for quotes
+    display_title = item.get('title')
+    if item.get('type') == 'quote' and item.get('content'):
+        display_title = item['content']
+    print(f"Title/Content: {display_title}")
 
+    if item.get('author'):
+        print(f"Author: {item['author']}")
+    if item.get('source'):
+        print(f"Source: {item['source']}")
+    
+    if item.get('progress_unit'):
+        current = item.get('current_progress', 0)
+        total = item.get('total_progress', 'N/A')
+        print(f"Progress: {current} {item['progress_unit']}(s) / {total} {item['progress_unit']}(s)")
+    
+    print(f"Status: {item.get('status')}")
+    if item.get('tags'):
+        print(f"Tags: {', '.join(item['tags'])}")
+    if item.get('link'):
+        print(f"Link: {item['link']}")
+    if item.get('target_completion_date'):
+        print(f"Target Completion: {item['target_completion_date']}")
+    print(f"Last Updated: {item.get('last_updated')}")
+    print("-" * 20)
+
+def list_reading_items(item_type=None, status=None, tag=None):
+    items = list(iter_reading_items(item_type, status, tag))
     if not items:
         print("\nNo reading items found matching criteria.")
         return items
 
     print("\n--- Daily Reads ---")
     for item in items:
-        print(f"ID: {item.get('id')}")
-        print(f"Type: {item.get('type')}")
-        # Display title for most, content for quotes
-        display_title = item.get('title')
-        if item.get('type') == 'quote' and item.get('content'):
-            display_title = item['content']
-        print(f"Title/Content: {display_title}")
-
-        if item.get('author'):
-            print(f"Author: {item['author']}")
-        if item.get('source'):
-            print(f"Source: {item['source']}")
-        
-        if item.get('progress_unit'):
-            current = item.get('current_progress', 0)
-            total = item.get('total_progress', 'N/A')
-            print(f"Progress: {current} {item['progress_unit']}(s) / {total} {item['progress_unit']}(s)")
-        
-        print(f"Status: {item.get('status')}")
-        if item.get('tags'):
-            print(f"Tags: {', '.join(item['tags'])}")
-        if item.get('link'):
-            print(f"Link: {item['link']}")
-        if item.get('target_completion_date'):
-            print(f"Target Completion: {item['target_completion_date']}")
-        print(f"Last Updated: {item.get('last_updated')}")
-        print("-" * 20)
+        _print_reading_item(item)
     return items
 
-def main():
+def stream_reading_items(item_type=None, status=None, tag=None, fmt="text"):
+    # The `list` command: like list_reading_items(), but each item is printed
+    # as it is read instead of collected first. Returns how many were printed.
+    items = iter_reading_items(item_type, status, tag)
+    if fmt != "text":
+        return bulk.write_records((item.to_dict() for item in items), '-', READING_ITEM_FIELDS, fmt)
+
+    first = next(items, None)
+    if first is None:
+        print("\nNo reading items found matching criteria.")
+        return 0
+
+    print("\n--- Daily Reads ---")
+    count = 0
+    for item in itertools.chain([first], items):
+        count += 1
+        _print_reading_item(item)
+    return count
+
+def search_reading_items(query, limit=10):
+    conn = data = None
+    if use_sqlite():
+        conn = daily_reads_db.connect(DB_FILE)
+    else:
+        data = load_data()
+    index = load_search_index(conn, data)
+    hits = search_index.search(index, query, limit)
+    index.close()
+    if conn:
+        items = {item_id: daily_reads_db.get_item(conn, item_id) for _, item_id in hits}
+        conn.close()
+    else:
+        items = {item["id"]: item for item in data["reading_items"]}
+
+    if not hits:
+        print(f"\nNo reading items match '{query}'.")
+        return hits
+
+    print(f"\n--- Reading items matching '{query}' ---")
+    for score, item_id in hits:
+        item = items[item_id]
+        display_title = item.get('content') if item.get('type') == 'quote' else item.get('title')
+        byline = f" by {item['author']}" if item.get('author') else ""
+        print(f"[{item_id}] {item.get('type')}: {display_title}{byline} (score {score:.2f})")
+    print("-" * 20)
+    return hits
+
+def convert_storage(fmt):
+    data = load_data()
+    try:
+        storage.convert(DATA_FILE, data, fmt, STREAM_KEY, ensure_ascii=False, indent=2)
+    except ImportError as e:
+        print(f"Error: {e}")
+        return
+    print(f"Converted {os.path.basename(DATA_FILE)} to {fmt}.")
+    if use_sqlite():
+        print(f"Note: {os.path.basename(DB_FILE)} exists, so the SQLite store is still the one in use.")
+
+def build_parser(prog=None):
     import argparse
-    parser = argparse.ArgumentParser(description="Manage daily reading and learning items for Life.io dashboard.")
+    parser = argparse.ArgumentParser(prog=prog, description="Manage daily reading and learning items for Life.io dashboard.")
+    profiling.add_arguments(parser)
     subparsers = parser.add_subparsers(dest="command", help="Available commands")
 
     # Add item
@@ -186,29 +439,72 @@ def main():
     list_parser.add_argument("--type", choices=["book", "certification", "article", "quote"], help="Filter by item type.")
     list_parser.add_argument("--status", help="Filter by item status.")
     list_parser.add_argument("--tag", help="Filter by tag.")
+    list_parser.add_argument("--format", choices=["text"] + bulk.FORMATS, default="text", help="Output format (default: text; jsonl and csv print one item per line).")
 
-    args = parser.parse_args()
-    
-    # Dynamically extract non-None arguments for add/update
-    # For 'add' command, 'type' is positional and required, handle separately
-    if args.command == "add":
-        kwargs = {k: v for k, v in vars(args).items() if v is not None and k not in ["command", "type"]}
-        # Special handling for quotes where 'content' is primary and 'title' can be absent
-        if args.type == "quote":
-            add_reading_item(args.type, title=args.title, **kwargs)
-        elif args.title: # Title is required for other types
-            add_reading_item(args.type, args.title, **kwargs)
+    # Search items
+    search_parser = subparsers.add_parser("search", help="Full-text search over titles, quotes, authors and tags, best matches first.")
+    search_parser.add_argument("query", nargs='+', help="Words to search for.")
+    search_parser.add_argument("--limit", type=int, default=10, help="Maximum number of results (default: 10).")
+
+    # Import / Export
+    import_parser = subparsers.add_parser("import", help="Bulk-import reading items from a CSV or JSONL file.")
+    import_parser.add_argument("file", help="Path to the file, or '-' for stdin. Incoming IDs are ignored and reassigned.")
+    import_parser.add_argument("--format", choices=bulk.FORMATS, help="File format (default: from the file extension).")
+    export_parser = subparsers.add_parser("export", help="Export all reading items to a CSV or JSONL file.")
+    export_parser.add_argument("file", help="Path to the file, or '-' for stdout.")
+    export_parser.add_argument("--format", choices=bulk.FORMATS, help="File format (default: from the file extension).")
+
+    # Migrate to SQLite
+    migrate_parser = subparsers.add_parser("migrate-sqlite", help=f"One-shot import of {os.path.basename(DATA_FILE)} into an indexed SQLite store ({os.path.basename(DB_FILE)}).")
+    migrate_parser.add_argument("--force", action="store_true", help=f"Replace an existing {os.path.basename(DB_FILE)} (changes made through it are lost).")
+
+    # Convert storage format
+    convert_parser = subparsers.add_parser("convert", help=f"Rewrite {os.path.basename(DATA_FILE)} as pretty or compact JSON, orjson, MessagePack, or JSONL (one item per line, streamed by 'list').")
+    convert_parser.add_argument("format", choices=storage.FORMATS, help="Storage format.")
+    return parser
+
+def main(argv=None, prog=None):
+    if daemon.forward("daily_reads_manager", argv, prog):
+        return
+
+    parser = build_parser(prog)
+    args = parser.parse_args(argv)
+
+    with profiling.profile("daily_reads_manager", args):
+        # Dynamically extract non-None arguments for add/update
+        # For 'add' command, 'type' is positional and required, handle separately
+        if args.command == "add":
+            kwargs = {k: v for k, v in vars(args).items() if v is not None and k not in ["command", "type", "title", "profile", "cprofile"]}
+            # Special handling for quotes where 'content' is primary and 'title' can be absent
+            if args.type == "quote":
+                add_reading_item(args.type, title=args.title, **kwargs)
+            elif args.title: # Title is required for other types
+                add_reading_item(args.type, args.title, **kwargs)
+            else:
+                print(f"Error: Title is required for item type '{args.type}' unless it's a quote (use --content).")
+        elif args.command == "update":
+            update_kwargs = {k: v for k, v in vars(args).items() if v is not None and k not in ["command", "id", "profile", "cprofile"]}
+            update_reading_item(args.id, **update_kwargs)
+        elif args.command == "delete":
+            delete_reading_item(args.id)
+        elif args.command == "list":
+            stream_reading_items(args.type, args.status, args.tag, args.format)
+        elif args.command == "search":
+            search_reading_items(' '.join(args.query), args.limit)
+        elif args.command in ("import", "export"):
+            try:
+                if args.command == "import":
+                    import_reading_items(args.file, args.format)
+                else:
+                    export_reading_items(args.file, args.format)
+            except (bulk.ValidationError, OSError) as e:
+                print(f"Error: {e}")
+        elif args.command == "migrate-sqlite":
+            migrate_to_sqlite(args.force)
+        elif args.command == "convert":
+            convert_storage(args.format)
         else:
-            print(f"Error: Title is required for item type '{args.type}' unless it's a quote (use --content).")
-    elif args.command == "update":
-        update_kwargs = {k: v for k, v in vars(args).items() if v is not None and k not in ["command", "id"]}
-        update_reading_item(args.id, **update_kwargs)
-    elif args.command == "delete":
-        delete_reading_item(args.id)
-    elif args.command == "list":
-        list_reading_items(args.type, args.status, args.tag)
-    else:
-        parser.print_help()
+            parser.print_help()
 
 if __name__ == "__main__":
     main()
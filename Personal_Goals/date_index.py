@@ -0,0 +1,112 @@
+import array
+import bisect
+import hashlib
+import os
+from datetime import date
+
+import profiling
+import storage
+
+# Date-sorted index over a list of dated records (e.g. workout logs).
+#
+# The index is persisted next to the data file as a flat array of
+# (ordinal day, list position) pairs sorted by day, so loading it is a single
+# array.fromfile() with no date parsing. Records logged in date order are
+# added by appending one pair to the file. The file starts with a header
+# holding a digest of storage.disk_stamp() for the data file it was built
+# from; the index is rebuilt whenever that no longer matches the files on
+# disk (any other write to them) or its length doesn't match the record list.
+
+INDEX_SUFFIX = '.dateidx'
+TYPECODE = 'i'
+MAGIC = b'DIX1'
+HEADER_SIZE = len(MAGIC) + 16
+
+
+def index_path(data_file):
+    return data_file + INDEX_SUFFIX
+
+
+def to_ordinal(date_str):
+    return date.fromisoformat(date_str[:10]).toordinal()
+
+
+def _header(data_file):
+    stamp = repr(storage.disk_stamp(data_file)).encode('utf-8')
+    return MAGIC + hashlib.blake2b(stamp, digest_size=16).digest()
+
+
+def _write(data_file, ordinals, positions):
+    pairs = array.array(TYPECODE, bytes(ordinals.itemsize * 2 * len(ordinals)))
+    pairs[0::2] = ordinals
+    pairs[1::2] = positions
+    path = index_path(data_file)
+    tmp_path = path + '.tmp'
+    with profiling.phase("save"):
+        with open(tmp_path, 'wb') as f:
+            f.write(_header(data_file))
+            pairs.tofile(f)
+        os.replace(tmp_path, path)
+    profiling.count_bytes("save", HEADER_SIZE + pairs.itemsize * len(pairs))
+
+
+def rebuild(data_file, records, field="date"):
+    pairs = sorted((to_ordinal(record[field]), i) for i, record in enumerate(records))
+    ordinals = array.array(TYPECODE, (o for o, _ in pairs))
+    positions = array.array(TYPECODE, (i for _, i in pairs))
+    _write(data_file, ordinals, positions)
+    return ordinals, positions
+
+
+def load(data_file, records, field="date"):
+    # Call after the records are loaded and before they are written to.
+    path = index_path(data_file)
+    pairs = array.array(TYPECODE)
+    try:
+        with profiling.phase("load"), open(path, 'rb') as f:
+            if f.read(HEADER_SIZE) == _header(data_file):
+                pairs.frombytes(f.read())
+                profiling.count_bytes("load", HEADER_SIZE + pairs.itemsize * len(pairs))
+            else:
+                pairs = None
+    except FileNotFoundError:
+        pairs = None
+    if pairs is None or len(pairs) != 2 * len(records):
+        return rebuild(data_file, records, field)
+    return pairs[0::2], pairs[1::2]
+
+
+def add(data_file, index, date_str, position):
+    # Call after the new record is written, so the header stamps the files
+    # that now include it.
+    ordinals, positions = index
+    ordinal = to_ordinal(date_str)
+    if not ordinals or ordinal >= ordinals[-1]:
+        ordinals.append(ordinal)
+        positions.append(position)
+        with profiling.phase("save"), open(index_path(data_file), 'r+b') as f:
+            f.write(_header(data_file))
+            f.seek(0, os.SEEK_END)
+            array.array(TYPECODE, (ordinal, position)).tofile(f)
+        profiling.count_bytes("save", HEADER_SIZE + 2 * ordinals.itemsize)
+    else:
+        at = bisect.bisect_right(ordinals, ordinal)
+        ordinals.insert(at, ordinal)
+        positions.insert(at, position)
+        _write(data_file, ordinals, positions)
+
+
+def count_between(index, first_day, last_day):
+    # Records dated first_day..last_day inclusive (either bound may be None).
+    ordinals = index[0]
+    lo = bisect.bisect_left(ordinals, first_day.toordinal()) if first_day else 0
+    hi = bisect.bisect_right(ordinals, last_day.toordinal()) if last_day else len(ordinals)
+    return max(hi - lo, 0)
+
+
+def newest_first(index, offset=0, limit=None):
+    positions = index[1]
+    stop = len(positions) - offset
+    start = 0 if limit is None else max(stop - limit, 0)
+    for i in range(stop - 1, start - 1, -1):
+        yield positions[i]
@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+import importlib
+import json
+import os
+import sys
+
+# Single entry point for the Personal_Goals trackers:
+#
+#     python3 lifeos.py workout log "Leg Day"
+#     python3 lifeos.py reads list --type book
+#
+# PLUGINS maps each subcommand to the module implementing it. A tracker is
+# imported only when its subcommand runs, so `lifeos --help` imports nothing
+# but this file. Shell completion reads a manifest of every tracker's
+# subcommands and options, built once from their build_parser() and cached in
+# MANIFEST_FILE until any module next to this file changes: the parsers are
+# assembled from helpers too (profiling.add_arguments(), bulk's formats,
+# storage.FORMATS), not just the tracker files. Trackers import optional
+# dependencies (numpy, orjson, msgpack) only inside the functions that use
+# them, so building the manifest stays as cheap as --help.
+
+HERE = os.path.dirname(os.path.realpath(__file__))
+MANIFEST_FILE = os.path.join(HERE, '.lifeos_manifest.json')
+
+PLUGINS = {
+    "workout": ("workout_tracker", "Define, log and analyze workouts."),
+    "skills": ("skills", "Log practice time and report on skills."),
+    "meals": ("meal_planner", "Recipes, meal plans, pantry and shopping lists."),
+    "reads": ("daily_reads_manager", "Books, articles, certifications and quotes."),
+    "ideas": ("content_idea_generator", "Generate, save and search content ideas."),
+    "daemon": ("daemon", "Keep tracker state in memory between commands."),
+}
+
+BASH_COMPLETION = """_lifeos() {
+    COMPREPLY=( $(lifeos __complete "$COMP_CWORD" "${COMP_WORDS[@]}") )
+}
+complete -o default -F _lifeos lifeos
+"""
+
+
+def print_help(file=sys.stdout):
+    print("usage: lifeos <command> [args...]\n\ncommands:", file=file)
+    for name, (_, description) in PLUGINS.items():
+        print(f"  {name:<12}{description}", file=file)
+    print(f"  {'completion':<12}Print a bash completion script (eval \"$(lifeos completion)\").", file=file)
+    print("\nRun 'lifeos <command> --help' for a command's options.", file=file)
+
+
+# --- Completion manifest ---
+
+def _sources_stamp():
+    return {entry.name: entry.stat().st_mtime_ns for entry in os.scandir(HERE)
+            if entry.name.endswith('.py') and entry.is_file()}
+
+
+def build_manifest():
+    # The only place completion imports trackers.
+    commands = {}
+    for name, (module_name, _) in PLUGINS.items():
+        parser = importlib.import_module(module_name).build_parser(f"lifeos {name}")
+        subcommands = {}
+        for action in parser._actions:
+            for subcommand, subparser in (getattr(action, 'choices', None) or {}).items():
+                if hasattr(subparser, '_actions'):
+                    subcommands[subcommand] = [option for sub_action in subparser._actions
+                                               for option in sub_action.option_strings]
+        commands[name] = subcommands
+    return {"stamp": _sources_stamp(), "commands": commands}
+
+
+def load_manifest():
+    try:
+        with open(MANIFEST_FILE, 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get("stamp") == _sources_stamp():
+            return manifest
+    except (FileNotFoundError, ValueError):
+        pass
+    manifest = build_manifest()
+    tmp_file = MANIFEST_FILE + '.tmp'
+    with open(tmp_file, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+    os.replace(tmp_file, MANIFEST_FILE)
+    return manifest
+
+
+def complete(cword, words):
+    # words are COMP_WORDS (words[0] is "lifeos"); cword indexes the word being completed.
+    prefix = words[cword] if cword < len(words) else ""
+    if cword == 1:
+        candidates = list(PLUGINS) + ["completion", "--help"]
+    else:
+        commands = load_manifest()["commands"].get(words[1], {})
+        if cword == 2:
+            candidates = list(commands) + ["--help"]
+        elif prefix.startswith('-'):
+            candidates = commands.get(words[2], [])
+        else:
+            candidates = []  # Positional values: fall back to the shell's default completion
+    return [candidate for candidate in candidates if candidate.startswith(prefix)]
+
+
+def main(argv=None):
+    argv = sys.argv[1:] if argv is None else argv
+    if not argv or argv[0] in ("-h", "--help"):
+        print_help()
+        return 0
+
+    name, rest = argv[0], argv[1:]
+    if name == "__complete":
+        print('\n'.join(complete(int(rest[0]), rest[1:])))
+        return 0
+    if name == "completion":
+        print(BASH_COMPLETION, end='')
+        return 0
+    if name not in PLUGINS:
+        print(f"lifeos: unknown command '{name}'\n", file=sys.stderr)
+        print_help(sys.stderr)
+        return 2
+
+    module = importlib.import_module(PLUGINS[name][0])
+    try:
+        module.main(rest, f"lifeos {name}")
+    except BrokenPipeError:
+        # Output piped into e.g. `head`, which has stopped reading. Point
+        # stdout at /dev/null so the interpreter's final flush can't fail too.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
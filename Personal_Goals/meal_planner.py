@@ -1,29 +1,53 @@
-import json
 import argparse
 from datetime import datetime
 import os
 import random
 
+import bulk
+import daemon
+import profiling
+import recipe_index
+import recipe_matrix
+import records
+import storage
+
 DATA_FILE = os.path.join(os.path.dirname(__file__), 'meal_data.json')
 
 def load_data():
-    if not os.path.exists(DATA_FILE):
-        return {"recipes": {}, "current_plan": []}
-    with open(DATA_FILE, 'r') as f:
-        return json.load(f)
+    data = storage.load(DATA_FILE, {"recipes": {}, "current_plan": []})
+    records.convert_values(data["recipes"], records.Recipe)
+    return data
 
 def save_data(data):
-    with open(DATA_FILE, 'w') as f:
-        json.dump(data, f, indent=4)
+    storage.save(DATA_FILE, data, indent=4)
+
+def record(data, *ops):
+    storage.record(DATA_FILE, data, ops, indent=4)
+
+def recipe_details(ingredients):
+    # Accepts "flour: 200 g" style entries; quantities are only stored if given.
+    parsed = [recipe_matrix.parse_ingredient(ingredient) for ingredient in ingredients]
+    details = records.Recipe(ingredients=[name for name, _ in parsed])
+    if any(quantity for _, quantity in parsed):
+        details["quantities"] = [quantity for _, quantity in parsed]
+    return details
+
+def recipe_ingredients(details):
+    quantities = details.get("quantities") or [None] * len(details.ingredients)
+    return [recipe_matrix.format_ingredient(name, quantity) for name, quantity in zip(details.ingredients, quantities)]
 
 def add_recipe(recipe_name, ingredients):
     data = load_data()
     if recipe_name in data["recipes"]:
         print(f"Recipe '{recipe_name}' already exists.")
-    else:
-        data["recipes"][recipe_name] = {"ingredients": ingredients}
-        save_data(data)
-        print(f"Recipe '{recipe_name}' added with ingredients: {', '.join(ingredients)}")
+        return
+    try:
+        details = recipe_details(ingredients)
+    except ValueError as e:
+        print(f"Error: {e}")
+        return
+    record(data, storage.op_set(["recipes", recipe_name], details))
+    print(f"Recipe '{recipe_name}' added with ingredients: {', '.join(recipe_ingredients(details))}")
 
 def list_recipes():
     data = load_data()
@@ -33,26 +57,97 @@ def list_recipes():
 
     print("\n--- Available Recipes ---")
     for name, details in data["recipes"].items():
-        print(f"- {name}: {', '.join(details['ingredients'])}")
+        print(f"- {name}: {', '.join(recipe_ingredients(details))}")
     print("-------------------------")
 
-def generate_plan(days):
+# --- Plan optimizer ---
+#
+# Picks an N-day plan that never repeats a recipe within `window` days while
+# keeping the shopping list (ingredients not already in the pantry) small.
+# A greedy pass adds, day by day, the recipe that brings the fewest new
+# ingredients; local search then revisits each day and swaps in a recipe that
+# shrinks the plan's total ingredient set, until no swap helps. Costs are
+# popcounts over recipe_index bitsets, so each candidate is one AND/NOT.
+
+MAX_LOCAL_SEARCH_PASSES = 5
+
+def _allowed(plan, day, position, window):
+    # True if recipe `position` isn't used within `window` days of `day`.
+    start, stop = max(day - window + 1, 0), min(day + window, len(plan))
+    return all(plan[other] != position for other in range(start, stop) if other != day)
+
+def optimize_plan(index, days, window, pantry_mask=0, rng=random):
+    bits, popcount = index["bits"], recipe_index.popcount
+    positions = range(len(bits))
+
+    plan, covered, last_day = [], pantry_mask, {}
+    for day in range(days):
+        best, best_cost = [], None
+        for position in positions:
+            if day - last_day.get(position, -window) < window:
+                continue
+            cost = popcount(bits[position] & ~covered)
+            if best_cost is None or cost < best_cost:
+                best, best_cost = [position], cost
+            elif cost == best_cost:
+                best.append(position)
+        plan.append(rng.choice(best))
+        covered |= bits[plan[-1]]
+        last_day[plan[-1]] = day
+
+    for _ in range(MAX_LOCAL_SEARCH_PASSES):
+        improved = False
+        for day in rng.sample(range(days), days):
+            rest = pantry_mask
+            for other in range(days):
+                if other != day:
+                    rest |= bits[plan[other]]
+            current = popcount(bits[plan[day]] & ~rest)
+            if not current:
+                continue
+            for position in positions:
+                if popcount(bits[position] & ~rest) < current and _allowed(plan, day, position, window):
+                    plan[day], current, improved = position, popcount(bits[position] & ~rest), True
+                    if not current:
+                        break
+        if not improved:
+            break
+
+    covered = pantry_mask
+    for position in plan:
+        covered |= bits[position]
+    return [index["names"][position] for position in plan], popcount(covered & ~pantry_mask)
+
+def generate_plan(days, optimize=False, window=None, seed=None):
     data = load_data()
     if not data["recipes"]:
         print("No recipes available to generate a plan. Please add some recipes first.")
         return
 
     available_recipes = list(data["recipes"].keys())
+    rng = random.Random(seed)
+    if optimize:
+        requested = window or days
+        window = min(requested, len(available_recipes))
+        if window < requested:
+            print(f"Warning: Only {len(available_recipes)} recipes available, so meals will repeat every {window} days.")
+        index = recipe_index.for_recipes(data["recipes"])
+        pantry_mask, _ = recipe_index.to_mask(index, data.get("pantry", []))
+        meals, to_buy = optimize_plan(index, days, window, pantry_mask, rng)
+        plan = [{"day": i + 1, "meal": meal} for i, meal in enumerate(meals)]
+        record(data, storage.op_set(["current_plan"], plan))
+        print(f"Generated an optimized {days}-day meal plan needing {to_buy} ingredients beyond your pantry.")
+        return
+
     if len(available_recipes) < days:
         print(f"Warning: Only {len(available_recipes)} recipes available, but requested a {days}-day plan. Some meals might repeat.")
 
     plan = []
     for i in range(days):
-        meal = random.choice(available_recipes)
+        meal = rng.choice(available_recipes)
         plan.append({"day": i + 1, "meal": meal})
 
-    data["current_plan"] = plan
-    save_data(data)
+    record(data, storage.op_set(["current_plan"], plan))
     print(f"Generated a {days}-day meal plan.")
 
 def show_plan():
@@ -66,37 +161,175 @@ def show_plan():
         print(f"Day {entry['day']}: {entry['meal']}")
     print("-------------------------")
 
-def generate_shopping_list():
+def set_nutrition(ingredient, per, values):
+    data = load_data()
+    try:
+        per = list(recipe_matrix.parse_quantity(per))
+    except ValueError as e:
+        print(f"Error: {e}")
+        return
+    facts = {"per": per, **{nutrient: value for nutrient, value in values.items() if value is not None}}
+    if "nutrition" not in data:
+        ops = [storage.op_set(["nutrition"], {recipe_index.normalize(ingredient): facts})]
+    else:
+        ops = [storage.op_set(["nutrition", recipe_index.normalize(ingredient)], facts)]
+    record(data, *ops)
+    print(f"Saved nutrition for {ingredient} per {recipe_matrix.format_quantity(*per)}.")
+
+def generate_shopping_list(households=1, weeks=1, nutrition=False):
     data = load_data()
     if not data["current_plan"]:
         print("No meal plan generated yet. Use 'generate-plan' to create one before generating a shopping list.")
         return
 
-    shopping_list_items = {}
+    # The plan as a recipe vector: how many times each recipe gets cooked.
+    servings = {}
     for entry in data["current_plan"]:
-        recipe_name = entry['meal']
-        if recipe_name in data["recipes"]:
-            for ingredient in data["recipes"][recipe_name]["ingredients"]:
-                # For now, just add the ingredient. Quantity can be an enhancement.
-                shopping_list_items[ingredient.lower()] = True # Use a set-like behavior with dictionary keys
+        servings[entry['meal']] = servings.get(entry['meal'], 0) + households * weeks
+    matrix = recipe_matrix.for_recipes(data["recipes"])
+    amounts, uses = recipe_matrix.totals(matrix, servings)
+    needed = sorted((column for column, count in enumerate(uses) if count), key=lambda column: matrix["columns"][column][0])
 
-    if not shopping_list_items:
+    if not needed:
         print("No ingredients found for the current meal plan.")
         return
 
-    print("\n--- Shopping List ---")
-    for item in sorted(shopping_list_items.keys()):
-        print(f"- {item.capitalize()}")
+    facts = recipe_matrix.nutrition_totals(matrix, amounts, data.get("nutrition", {})) if nutrition else {}
+    scale = f" ({households} households x {weeks} weeks)" if households * weeks > 1 else ""
+    print(f"\n--- Shopping List{scale} ---")
+    for column in needed:
+        ingredient, unit = matrix["columns"][column]
+        line = f"- {ingredient.capitalize()}"
+        if unit is not None:
+            line += f": {recipe_matrix.format_quantity(amounts[column], unit)}"
+        if column in facts:
+            line += " (" + ", ".join(f"{value:.0f} {nutrient}" for nutrient, value in zip(recipe_matrix.NUTRIENTS, facts[column])) + ")"
+        print(line)
+    if nutrition:
+        total = [sum(values[i] for values in facts.values()) for i in range(len(recipe_matrix.NUTRIENTS))]
+        print("Total: " + ", ".join(f"{value:.0f} {nutrient}" for nutrient, value in zip(recipe_matrix.NUTRIENTS, total)))
+        unknown = len({matrix["columns"][column][0] for column in needed} - {matrix["columns"][column][0] for column in facts})
+        if unknown:
+            print(f"({unknown} ingredients have no nutrition data or quantity; see 'nutrition --help'.)")
     print("---------------------")
 
-def main():
-    parser = argparse.ArgumentParser(description="A simple meal planner.")
+# --- Pantry and ingredient queries (see recipe_index.py) ---
+
+def update_pantry(add=(), remove=(), clear=False):
+    data = load_data()
+    pantry = {} if clear else {recipe_index.normalize(i): True for i in data.get("pantry", [])}
+    for ingredient in add:
+        pantry[recipe_index.normalize(ingredient)] = True
+    for ingredient in remove:
+        pantry.pop(recipe_index.normalize(ingredient), None)
+    record(data, storage.op_set(["pantry"], sorted(pantry)))
+    show_pantry()
+
+def show_pantry():
+    pantry = load_data().get("pantry", [])
+    if not pantry:
+        print("Your pantry is empty. Use 'pantry --add' to stock it.")
+        return
+    print(f"\n--- Pantry ({len(pantry)} items) ---")
+    for ingredient in pantry:
+        print(f"- {ingredient.capitalize()}")
+    print("-------------------------")
+
+def what_can_i_cook(have=None, max_missing=None, limit=10):
+    data = load_data()
+    if not data["recipes"]:
+        print("No recipes added yet.")
+        return []
+    pantry = have if have is not None else data.get("pantry", [])
+    if not pantry:
+        print("Your pantry is empty. Use 'pantry --add' or pass --have.")
+        return []
+
+    index = recipe_index.for_recipes(data["recipes"])
+    pantry_mask, _ = recipe_index.to_mask(index, pantry)
+    matches = recipe_index.pantry_matches(index, pantry_mask, max_missing)
+    if not matches:
+        print("No recipes use anything in your pantry" + (f" with at most {max_missing} missing." if max_missing is not None else "."))
+        return matches
+
+    print("\n--- What You Can Cook ---")
+    for missing_count, owned, recipe_name, missing in matches[:limit]:
+        if not missing_count:
+            print(f"- {recipe_name}: you have everything")
+        else:
+            print(f"- {recipe_name}: have {-owned}/{-owned + missing_count}, missing {', '.join(recipe_index.names_of(index, missing))}")
+    if len(matches) > limit:
+        print(f"... and {len(matches) - limit} more (use --limit).")
+    print("-------------------------")
+    return matches
+
+def recipes_using(ingredients):
+    data = load_data()
+    index = recipe_index.for_recipes(data["recipes"])
+    want_mask, unknown = recipe_index.to_mask(index, ingredients)
+    names = [] if unknown else recipe_index.recipes_using(index, want_mask)
+    if not names:
+        print(f"No recipes use {' and '.join(ingredients)}.")
+        return names
+
+    print(f"\n--- Recipes using {' and '.join(ingredients)} ---")
+    for recipe_name in names:
+        print(f"- {recipe_name}: {', '.join(data['recipes'][recipe_name].ingredients)}")
+    print("-------------------------")
+    return names
+
+# --- Bulk import / export ---
+
+RECIPE_FIELDS = ["name", "ingredients"]
+
+def import_recipes(path, fmt=None):
+    data = load_data()
+    recipes = data["recipes"]
+    imported = {}
+
+    def validate(record):
+        recipe_name = bulk.require(record, "name")
+        if recipe_name in recipes or recipe_name in imported:
+            raise bulk.ValidationError(f"recipe '{recipe_name}' already exists")
+        ingredients = bulk.as_list(bulk.require(record, "ingredients"))
+        if not ingredients:
+            raise bulk.ValidationError("'ingredients' is empty")
+        return recipe_name, recipe_details(ingredients)
+
+    for recipe_name, details in bulk.validated(bulk.read_records(path, fmt), validate):
+        imported[recipe_name] = details
+    if not imported:
+        print("No recipes imported.")
+        return imported
+    recipes.update(imported)
+    save_data(data)
+    print(f"Imported {len(imported)} recipes.")
+    return imported
+
+def export_recipes(path, fmt=None):
+    rows = ({"name": name, "ingredients": recipe_ingredients(details)} for name, details in load_data()["recipes"].items())
+    count = bulk.write_records(rows, path, RECIPE_FIELDS, fmt)
+    if path != '-':
+        print(f"Exported {count} recipes to {path}.")
+
+def convert_storage(fmt):
+    data = load_data()
+    try:
+        storage.convert(DATA_FILE, data, fmt, indent=4)
+    except ImportError as e:
+        print(f"Error: {e}")
+        return
+    print(f"Converted {os.path.basename(DATA_FILE)} to {fmt}.")
+
+def build_parser(prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="A simple meal planner.")
+    profiling.add_arguments(parser)
     subparsers = parser.add_subparsers(dest="command", help="Available commands")
 
     # Add Recipe command
     add_recipe_parser = subparsers.add_parser("add-recipe", help="Add a new recipe.")
     add_recipe_parser.add_argument("recipe_name", type=str, help="The name of the recipe.")
-    add_recipe_parser.add_argument("--ingredients", type=str, required=True, help="Comma-separated list of ingredients.")
+    add_recipe_parser.add_argument("--ingredients", type=str, required=True, help="Comma-separated list of ingredients, each optionally with a quantity (e.g. 'flour: 200 g, eggs: 2, salt').")
 
     # List Recipes command
     list_recipes_parser = subparsers.add_parser("list-recipes", help="List all available recipes.")
@@ -104,28 +337,99 @@ def main():
     # Generate Plan command
     generate_plan_parser = subparsers.add_parser("generate-plan", help="Generate a meal plan.")
     generate_plan_parser.add_argument("--days", type=int, default=7, help="Number of days for the meal plan (default: 7).")
+    generate_plan_parser.add_argument("--optimize", action="store_true", help="Avoid repeats and maximize shared ingredients instead of picking at random.")
+    generate_plan_parser.add_argument("--window", type=int, help="With --optimize, never repeat a recipe within this many days (default: the whole plan).")
+    generate_plan_parser.add_argument("--seed", type=int, help="Random seed for reproducible plans.")
 
     # Show Plan command
     show_plan_parser = subparsers.add_parser("show-plan", help="Show the current meal plan.")
 
     # Shopping List command
     shopping_list_parser = subparsers.add_parser("shopping-list", help="Generate a shopping list for the current meal plan.")
+    shopping_list_parser.add_argument("--households", type=int, default=1, help="Number of households cooking the plan (default: 1).")
+    shopping_list_parser.add_argument("--weeks", type=int, default=1, help="Number of times the plan is repeated (default: 1).")
+    shopping_list_parser.add_argument("--nutrition", action="store_true", help="Show nutrition totals per ingredient and overall.")
 
-    args = parser.parse_args()
-
-    if args.command == "add-recipe":
-        ingredients = [i.strip() for i in args.ingredients.split(',')]
-        add_recipe(args.recipe_name, ingredients)
-    elif args.command == "list-recipes":
-        list_recipes()
-    elif args.command == "generate-plan":
-        generate_plan(args.days)
-    elif args.command == "show-plan":
-        show_plan()
-    elif args.command == "shopping-list":
-        generate_shopping_list()
-    else:
-        parser.print_help()
+    # Nutrition command
+    nutrition_parser = subparsers.add_parser("nutrition", help="Record nutrition facts for an ingredient.")
+    nutrition_parser.add_argument("ingredient", type=str, help="The ingredient name, as used in recipes.")
+    nutrition_parser.add_argument("--per", type=str, default="100 g", help="Amount the values refer to (default: '100 g').")
+    for nutrient in recipe_matrix.NUTRIENTS:
+        nutrition_parser.add_argument(f"--{nutrient}", type=float, help=f"{nutrient.capitalize()} per --per amount.")
+
+    # Pantry command
+    pantry_parser = subparsers.add_parser("pantry", help="Show or change what's in your pantry.")
+    pantry_parser.add_argument("--add", type=str, help="Comma-separated ingredients to add.")
+    pantry_parser.add_argument("--remove", type=str, help="Comma-separated ingredients to remove.")
+    pantry_parser.add_argument("--clear", action="store_true", help="Empty the pantry first.")
+
+    # Cook command
+    cook_parser = subparsers.add_parser("cook", help="Rank recipes by how few ingredients you're missing.")
+    cook_parser.add_argument("--have", type=str, help="Comma-separated ingredients to use instead of the saved pantry.")
+    cook_parser.add_argument("--max-missing", type=int, help="Only show recipes missing at most this many ingredients.")
+    cook_parser.add_argument("--limit", type=int, default=10, help="Maximum number of recipes to show (default: 10).")
+
+    # Uses command
+    uses_parser = subparsers.add_parser("uses", help="List all recipes that use the given ingredients.")
+    uses_parser.add_argument("ingredients", nargs='+', help="Ingredients every listed recipe must use.")
+
+    # Import / Export commands
+    import_parser = subparsers.add_parser("import", help="Bulk-import recipes (name, ingredients) from a CSV or JSONL file.")
+    import_parser.add_argument("file", type=str, help="Path to the file, or '-' for stdin. In CSV, separate ingredients with ';'.")
+    import_parser.add_argument("--format", choices=bulk.FORMATS, help="File format (default: from the file extension).")
+    export_parser = subparsers.add_parser("export", help="Export recipes to a CSV or JSONL file.")
+    export_parser.add_argument("file", type=str, help="Path to the file, or '-' for stdout.")
+    export_parser.add_argument("--format", choices=bulk.FORMATS, help="File format (default: from the file extension).")
+
+    # Convert command
+    convert_parser = subparsers.add_parser("convert", help="Rewrite the data file as pretty or compact JSON, orjson or MessagePack.")
+    convert_parser.add_argument("format", choices=storage.DOCUMENT_FORMATS, help="Storage format.")
+    return parser
+
+def main(argv=None, prog=None):
+    if daemon.forward("meal_planner", argv, prog):
+        return
+
+    parser = build_parser(prog)
+    args = parser.parse_args(argv)
+
+    with profiling.profile("meal_planner", args):
+        if args.command == "add-recipe":
+            ingredients = [i.strip() for i in args.ingredients.split(',')]
+            add_recipe(args.recipe_name, ingredients)
+        elif args.command == "list-recipes":
+            list_recipes()
+        elif args.command == "generate-plan":
+            generate_plan(args.days, args.optimize, args.window, args.seed)
+        elif args.command == "show-plan":
+            show_plan()
+        elif args.command == "shopping-list":
+            generate_shopping_list(args.households, args.weeks, args.nutrition)
+        elif args.command == "nutrition":
+            set_nutrition(args.ingredient, args.per, {nutrient: getattr(args, nutrient) for nutrient in recipe_matrix.NUTRIENTS})
+        elif args.command == "pantry":
+            if args.add or args.remove or args.clear:
+                split = lambda value: [i.strip() for i in (value or "").split(',') if i.strip()]
+                update_pantry(split(args.add), split(args.remove), args.clear)
+            else:
+                show_pantry()
+        elif args.command == "cook":
+            have = [i.strip() for i in args.have.split(',') if i.strip()] if args.have else None
+            what_can_i_cook(have, args.max_missing, args.limit)
+        elif args.command == "uses":
+            recipes_using(args.ingredients)
+        elif args.command in ("import", "export"):
+            try:
+                if args.command == "import":
+                    import_recipes(args.file, args.format)
+                else:
+                    export_recipes(args.file, args.format)
+            except (bulk.ValidationError, OSError) as e:
+                print(f"Error: {e}")
+        elif args.command == "convert":
+            convert_storage(args.format)
+        else:
+            parser.print_help()
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,135 @@
+import contextlib
+import json
+import os
+import sys
+import time
+
+# Opt-in per-phase profiling for the tracker commands.
+#
+#     python3 workout_tracker.py --profile history
+#     LIFEOS_PROFILE=/tmp/lifeos-profile.jsonl python3 skills.py report
+#     python3 meal_planner.py --cprofile plan.prof shopping-list   # + python3 -m pstats plan.prof
+#
+# While a command runs under profile(), its wall time is split into phases:
+#   load     reading snapshots, journals and indexes (storage, date_index, SQLite reads)
+#   save     snapshot rewrites, journal appends and other writes
+#   render   writing output to stdout
+#   compute  everything else
+# Phases are exclusive (a load inside a save counts as load), and each one
+# also counts calls and bytes read/written/printed. Lines read lazily from
+# skill shards are attributed to whichever phase consumes them. One JSON line
+# per command goes to stderr, or is appended to the file LIFEOS_PROFILE names.
+# With profiling off, phase() and count_bytes() do nothing.
+
+ENV_VAR = "LIFEOS_PROFILE"
+PHASES = ["load", "compute", "render", "save"]
+
+_session = None
+
+
+def add_arguments(parser):
+    parser.add_argument("--profile", action="store_true",
+                        help=f"Report per-phase timings (load/compute/render/save) as a JSON line on stderr, or append it to ${ENV_VAR} if that names a file.")
+    parser.add_argument("--cprofile", metavar="FILE", help="Also save cProfile stats for the command to FILE.")
+
+
+def _switch(name):
+    # Close the running phase's time slice, then enter `name` (or leave the
+    # current phase when name is None).
+    now = time.perf_counter()
+    stack = _session["stack"]
+    _session["phases"][stack[-1]]["seconds"] += now - _session["mark"]
+    _session["mark"] = now
+    if name is None:
+        stack.pop()
+    else:
+        stack.append(name)
+        _session["phases"][name]["calls"] += 1
+
+
+@contextlib.contextmanager
+def phase(name):
+    if _session is None:
+        yield
+        return
+    _switch(name)
+    try:
+        yield
+    finally:
+        _switch(None)
+
+
+def count_bytes(name, data):
+    # data: a byte count, bytes, or text (counted as UTF-8).
+    if _session is not None:
+        if isinstance(data, str):
+            data = data.encode('utf-8', 'replace')
+        _session["phases"][name]["bytes"] += data if isinstance(data, int) else len(data)
+
+
+def count_file(name, path):
+    if _session is not None:
+        try:
+            _session["phases"][name]["bytes"] += os.path.getsize(path)
+        except OSError:
+            pass
+
+
+class _RenderStream:
+    # Stands in for sys.stdout so every write is timed and counted as render.
+    def __init__(self, stream):
+        self._stream = stream
+
+    def write(self, text):
+        with phase("render"):
+            count_bytes("render", text)
+            return self._stream.write(text)
+
+    def __getattr__(self, name):
+        return getattr(self._stream, name)
+
+
+def _emit(line):
+    destination = os.environ.get(ENV_VAR, "")
+    if destination in ("", "1", "-", "stderr"):
+        print(line, file=sys.stderr)
+    else:
+        with open(destination, 'a', encoding='utf-8') as f:
+            f.write(line + '\n')
+
+
+@contextlib.contextmanager
+def profile(tracker, args):
+    global _session
+    cprofile_file = getattr(args, "cprofile", None)
+    if _session is not None or not (getattr(args, "profile", False) or cprofile_file or os.environ.get(ENV_VAR)):
+        yield
+        return
+
+    profiler = None
+    if cprofile_file:
+        import cProfile
+        profiler = cProfile.Profile()
+    start = time.perf_counter()
+    _session = {"stack": ["compute"], "mark": start,
+                "phases": {name: {"seconds": 0.0, "calls": 0, "bytes": 0} for name in PHASES}}
+    _session["phases"]["compute"]["calls"] = 1
+    try:
+        with contextlib.redirect_stdout(_RenderStream(sys.stdout)):
+            if profiler:
+                profiler.enable()
+            try:
+                yield
+            finally:
+                if profiler:
+                    profiler.disable()
+    finally:
+        _switch(None)
+        session, _session = _session, None
+        for stats in session["phases"].values():
+            stats["seconds"] = round(stats["seconds"], 6)
+        _emit(json.dumps({"ts": time.strftime("%Y-%m-%dT%H:%M:%S"), "tracker": tracker,
+                          "command": getattr(args, "command", None),
+                          "total_s": round(time.perf_counter() - start, 6), "phases": session["phases"]}))
+        if profiler:
+            profiler.dump_stats(cprofile_file)
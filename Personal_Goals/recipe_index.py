@@ -0,0 +1,96 @@
+import re
+
+# Ingredient index over meal_planner's recipes.
+#
+# Every distinct ingredient gets a bit position, and every recipe gets an int
+# whose set bits are its ingredients. "Which pantry ingredients does this
+# recipe need that I don't have" is then `recipe_bits & ~pantry_bits`, and
+# "does it use all of X" is `recipe_bits & want == want`. An inverted index
+# (ingredient -> recipe positions) narrows each query to the recipes that
+# share at least one ingredient with it instead of scanning the whole book.
+
+_cache = None
+
+# int.bit_count() is Python 3.10+.
+popcount = getattr(int, "bit_count", None) or (lambda mask: bin(mask).count('1'))
+
+
+def normalize(ingredient):
+    return re.sub(r'\s+', ' ', ingredient.strip().casefold())
+
+
+def build(recipes):
+    names, bits, bit_of, postings = [], [], {}, {}
+    for position, (name, details) in enumerate(recipes.items()):
+        mask = 0
+        for ingredient in details.ingredients:
+            ingredient = normalize(ingredient)
+            if ingredient not in bit_of:
+                bit_of[ingredient] = len(bit_of)
+                postings[ingredient] = []
+            if not mask >> bit_of[ingredient] & 1:
+                mask |= 1 << bit_of[ingredient]
+                postings[ingredient].append(position)
+        names.append(name)
+        bits.append(mask)
+    return {"names": names, "bits": bits, "bit_of": bit_of,
+            "ingredients": list(bit_of), "postings": postings}
+
+
+def for_recipes(recipes):
+    # Recipes are only ever added or replaced wholesale, so the dict's identity
+    # and size tell us whether a cached index (e.g. in the daemon) still fits.
+    global _cache
+    if _cache is None or _cache[0] is not recipes or _cache[1] != len(recipes):
+        _cache = (recipes, len(recipes), build(recipes))
+    return _cache[2]
+
+
+def to_mask(index, ingredients):
+    # Returns (mask, ingredients no recipe uses).
+    mask, unknown = 0, []
+    for ingredient in ingredients:
+        bit = index["bit_of"].get(normalize(ingredient))
+        if bit is None:
+            unknown.append(ingredient)
+        else:
+            mask |= 1 << bit
+    return mask, unknown
+
+
+def names_of(index, mask):
+    return [index["ingredients"][bit] for bit in range(mask.bit_length()) if mask >> bit & 1]
+
+
+def _candidates(index, mask):
+    positions = set()
+    for bit in range(mask.bit_length()):
+        if mask >> bit & 1:
+            positions.update(index["postings"][index["ingredients"][bit]])
+    return positions
+
+
+def pantry_matches(index, pantry_mask, max_missing=None):
+    # [(missing count, -owned count, name, missing mask)] for recipes that use
+    # at least one pantry ingredient, fewest missing ingredients first.
+    matches = []
+    for position in _candidates(index, pantry_mask):
+        bits = index["bits"][position]
+        missing = bits & ~pantry_mask
+        missing_count = popcount(missing)
+        if max_missing is not None and missing_count > max_missing:
+            continue
+        owned = popcount(bits & pantry_mask)
+        matches.append((missing_count, -owned, index["names"][position], missing))
+    matches.sort()
+    return matches
+
+
+def recipes_using(index, want_mask):
+    if not want_mask:
+        return []
+    # Start from the rarest wanted ingredient's postings, then check the rest bitwise.
+    wanted = [index["ingredients"][bit] for bit in range(want_mask.bit_length()) if want_mask >> bit & 1]
+    rarest = min(wanted, key=lambda ingredient: len(index["postings"][ingredient]))
+    return [index["names"][position] for position in index["postings"][rarest]
+            if index["bits"][position] & want_mask == want_mask]
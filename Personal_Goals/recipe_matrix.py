@@ -0,0 +1,134 @@
+import re
+from fractions import Fraction
+
+import recipe_index
+
+# Sparse recipe x ingredient quantity matrix for meal_planner's shopping lists.
+#
+# Recipes keep their ingredient names in "ingredients" and, optionally, a
+# parallel "quantities" list of [amount, unit] pairs (or null). Quantities are
+# converted to a base unit per dimension (g, ml or a plain count), and each
+# (ingredient, base unit) pair is one matrix column, so "200 g flour" and
+# "1 cup flour" are never added together. The matrix is stored CSR-style
+# (indptr / indices / values). With NumPy, a plan's totals are one bincount
+# over the entries of the rows it uses, weighted by how often each recipe
+# appears; without it the same sums are done in Python.
+
+# unit -> (base unit, factor)
+UNITS = {
+    "": ("", 1), "x": ("", 1), "pc": ("", 1), "pcs": ("", 1),
+    "g": ("g", 1), "kg": ("g", 1000), "mg": ("g", 0.001),
+    "oz": ("g", 28.3495), "lb": ("g", 453.592), "lbs": ("g", 453.592),
+    "ml": ("ml", 1), "l": ("ml", 1000), "dl": ("ml", 100), "cl": ("ml", 10),
+    "tsp": ("ml", 5), "tbsp": ("ml", 15), "cup": ("ml", 240), "cups": ("ml", 240),
+}
+NUTRIENTS = ["calories", "protein", "fat", "carbs"]
+
+_QUANTITY = re.compile(r'^\s*(\d+(?:\.\d+)?|\d+/\d+)\s*([a-zA-Z]*)\s*$')
+_cache = None
+
+
+def parse_quantity(text):
+    # "200g", "1.5 cups", "1/2 tsp", "3" -> (amount, unit)
+    match = _QUANTITY.match(text)
+    if not match or match.group(2).lower() not in UNITS:
+        raise ValueError(f"can't read quantity {text!r}; use e.g. '200 g', '2', '1/2 tsp' ({', '.join(u for u in UNITS if u)})")
+    return float(Fraction(match.group(1))), match.group(2).lower()
+
+
+def parse_ingredient(text):
+    # "flour: 200 g" -> ("flour", [200.0, "g"]); "salt" -> ("salt", None)
+    name, sep, quantity = text.rpartition(':')
+    if not sep:
+        return text.strip(), None
+    return name.strip(), list(parse_quantity(quantity.strip()))
+
+
+def format_quantity(amount, unit):
+    amount = round(amount, 2)
+    amount = int(amount) if amount == int(amount) else amount
+    return f"{amount} {unit}".strip()
+
+
+def format_ingredient(name, quantity):
+    return f"{name}: {format_quantity(*quantity)}" if quantity else name
+
+
+def to_base(amount, unit):
+    base, factor = UNITS[unit]
+    return amount * factor, base
+
+
+def build(recipes):
+    names, column_of, columns = [], {}, []
+    indptr, indices, values = [0], [], []
+    for name, details in recipes.items():
+        quantities = details.get("quantities") or [None] * len(details.ingredients)
+        row = {}
+        for ingredient, quantity in zip(details.ingredients, quantities):
+            amount, unit = to_base(*quantity) if quantity else (0.0, None)
+            key = (recipe_index.normalize(ingredient), unit)
+            if key not in column_of:
+                column_of[key] = len(columns)
+                columns.append(key)
+            row[column_of[key]] = row.get(column_of[key], 0.0) + amount
+        names.append(name)
+        indices.extend(row)
+        values.extend(row.values())
+        indptr.append(len(indices))
+    return {"names": names, "row_of": {name: i for i, name in enumerate(names)}, "columns": columns,
+            "indptr": indptr, "indices": indices, "values": values}
+
+
+def for_recipes(recipes):
+    # Same caching rule as recipe_index.for_recipes().
+    global _cache
+    if _cache is None or _cache[0] is not recipes or _cache[1] != len(recipes):
+        _cache = (recipes, len(recipes), build(recipes))
+    return _cache[2]
+
+
+def totals(matrix, servings):
+    # servings: {recipe name: times cooked}. Returns (amounts, uses) per column,
+    # where uses counts how many cooked recipes need the ingredient.
+    rows = [(matrix["row_of"][name], count) for name, count in servings.items() if name in matrix["row_of"]]
+    try:
+        import numpy as np
+    except ImportError:
+        amounts, uses = [0.0] * len(matrix["columns"]), [0] * len(matrix["columns"])
+        for row, count in rows:
+            for i in range(matrix["indptr"][row], matrix["indptr"][row + 1]):
+                amounts[matrix["indices"][i]] += matrix["values"][i] * count
+                uses[matrix["indices"][i]] += count
+        return amounts, uses
+
+    if "arrays" not in matrix:
+        matrix["arrays"] = (np.asarray(matrix["indptr"], dtype=np.int64), np.asarray(matrix["indices"], dtype=np.int64),
+                            np.asarray(matrix["values"], dtype=np.float64))
+    indptr, indices, values = matrix["arrays"]
+    row_ids = np.fromiter((row for row, _ in rows), dtype=np.int64, count=len(rows))
+    counts = np.fromiter((count for _, count in rows), dtype=np.float64, count=len(rows))
+    starts, lengths = indptr[row_ids], indptr[row_ids + 1] - indptr[row_ids]
+    # Entry positions of every used row, and the weight (servings) of each entry.
+    entries = np.repeat(starts - np.cumsum(lengths) + lengths, lengths) + np.arange(lengths.sum())
+    weights = np.repeat(counts, lengths)
+    columns = indices[entries]
+    amounts = np.bincount(columns, weights=values[entries] * weights, minlength=len(matrix["columns"]))
+    uses = np.bincount(columns, weights=weights, minlength=len(matrix["columns"]))
+    return amounts.tolist(), uses.astype(np.int64).tolist()
+
+
+def nutrition_totals(matrix, amounts, nutrition):
+    # nutrition: {ingredient: {"per": [amount, unit], nutrient: value, ...}}.
+    # Returns {column: [per-nutrient totals]} for columns with known nutrition.
+    result = {}
+    for column, (ingredient, unit) in enumerate(matrix["columns"]):
+        facts = nutrition.get(ingredient)
+        if not facts or not amounts[column] or unit is None:
+            continue
+        per_amount, per_unit = to_base(*facts["per"])
+        if per_unit != unit:
+            continue
+        scale = amounts[column] / per_amount
+        result[column] = [facts.get(nutrient, 0) * scale for nutrient in NUTRIENTS]
+    return result
@@ -0,0 +1,180 @@
+import sys
+
+import profiling
+import storage
+
+# Compact in-memory records for the trackers' big lists.
+#
+# json.load gives every workout log, skill log, reading item and recipe its
+# own dict (a hash table per entry) and a separate string object for every
+# repeated value. These classes use __slots__ instead, and intern the values
+# that repeat across records (dates, routine names, item types, statuses,
+# tags, ingredient names, units).
+#
+# A record holds exactly the keys it was built from: an unset slot is an
+# absent key, so to_dict() gives back the same JSON object (keys in FIELDS
+# order) and `key in record` keeps its meaning. Keys outside FIELDS are kept
+# in `extra`. Generic code that treats records as dicts (storage journal
+# ops, date_index, bulk) can still use record[key], record[key] = value,
+# del, `in` and get(); tracker code uses the attributes. storage writes
+# records through their to_dict().
+
+_MISSING = object()
+
+
+def intern_value(value):
+    if type(value) is str:
+        return sys.intern(value)
+    if type(value) is list:
+        return [sys.intern(item) if type(item) is str else intern_value(item) for item in value]
+    return value
+
+
+class Record:
+    __slots__ = ("extra",)
+    FIELDS = ()
+    INTERNED = frozenset()
+
+    def __init_subclass__(cls):
+        super().__init_subclass__()
+        cls.FIELDS = cls.__slots__
+        cls._field_set = frozenset(cls.__slots__)
+
+    def __init__(self, **fields):
+        self.extra = None
+        for key, value in fields.items():
+            self[key] = value
+
+    @classmethod
+    def from_dict(cls, d):
+        record = cls.__new__(cls)
+        record.extra = None
+        field_set, interned = cls._field_set, cls.INTERNED
+        for key, value in d.items():
+            if key in interned:
+                value = sys.intern(value) if type(value) is str else intern_value(value)
+            if key in field_set:
+                setattr(record, key, value)
+            else:
+                if record.extra is None:
+                    record.extra = {}
+                record.extra[key] = value
+        return record
+
+    def to_dict(self):
+        d = {}
+        for key in self.FIELDS:
+            value = getattr(self, key, _MISSING)
+            if value is not _MISSING:
+                d[key] = value
+        if self.extra:
+            d.update(self.extra)
+        return d
+
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key) if key in self._field_set else self.extra[key]
+        except (AttributeError, TypeError):
+            raise KeyError(key) from None
+
+    def __setitem__(self, key, value):
+        if key in self.INTERNED:
+            value = intern_value(value)
+        if key in self._field_set:
+            setattr(self, key, value)
+        else:
+            if self.extra is None:
+                self.extra = {}
+            self.extra[key] = value
+
+    def __delitem__(self, key):
+        try:
+            if key in self._field_set:
+                delattr(self, key)
+            else:
+                del self.extra[key]
+        except (AttributeError, TypeError):
+            raise KeyError(key) from None
+
+    def __contains__(self, key):
+        return self.get(key, _MISSING) is not _MISSING
+
+    def get(self, key, default=None):
+        if key in self._field_set:
+            return getattr(self, key, default)
+        return self.extra.get(key, default) if self.extra else default
+
+    def __eq__(self, other):
+        return type(other) is type(self) and other.to_dict() == self.to_dict()
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.to_dict()!r})"
+
+
+class WorkoutLog(Record):
+    __slots__ = ("date", "workout_name")
+    INTERNED = frozenset(__slots__)
+
+    def __init__(self, date, workout_name):
+        self.extra = None
+        self.date = sys.intern(date)
+        self.workout_name = sys.intern(workout_name)
+
+    @classmethod
+    def from_dict(cls, d):
+        if len(d) == 2 and "date" in d and "workout_name" in d:
+            return cls(d["date"], d["workout_name"])
+        return super().from_dict(d)
+
+
+class SkillLog(Record):
+    # Timestamps and notes rarely repeat, so nothing is interned.
+    __slots__ = ("date", "time_spent", "note")
+
+
+class ReadingItem(Record):
+    # In build_reading_item()'s key order.
+    __slots__ = ("id", "type", "title", "status", "last_updated", "content", "author", "source", "link",
+                 "progress_unit", "current_progress", "total_progress", "tags", "target_completion_date")
+    INTERNED = frozenset({"type", "status", "last_updated", "author", "source", "progress_unit", "tags",
+                          "target_completion_date"})
+
+
+class Recipe(Record):
+    __slots__ = ("ingredients", "quantities")
+    INTERNED = frozenset({"ingredients"})
+
+    @classmethod
+    def from_dict(cls, d):
+        record = super().from_dict(d)
+        quantities = d.get("quantities")
+        if quantities:
+            # [amount, unit] pairs (or None); only the unit repeats.
+            record.quantities = [quantity and [quantity[0], sys.intern(quantity[1])] for quantity in quantities]
+        return record
+
+
+def convert_values(mapping, cls):
+    # convert() for the values of a dict (e.g. recipes by name), also in place.
+    from_dict = cls.from_dict
+    with profiling.phase("load"), storage.gc_paused():
+        for key, value in mapping.items():
+            if type(value) is not cls:
+                mapping[key] = from_dict(value)
+    return mapping
+
+
+def iter_converted(rows, cls):
+    # convert() for rows consumed one at a time (e.g. storage.iter_stream()).
+    from_dict = cls.from_dict
+    for row in rows:
+        yield row if type(row) is cls else from_dict(row)
+
+
+def convert(rows, cls):
+    # In place, so a caller still holding the list (e.g. the daemon's cached
+    # state) sees records too.
+    from_dict = cls.from_dict
+    with profiling.phase("load"), storage.gc_paused():
+        rows[:] = [row if type(row) is cls else from_dict(row) for row in rows]
+    return rows
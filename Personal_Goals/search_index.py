@@ -0,0 +1,112 @@
+import heapq
+import math
+import re
+import sqlite3
+import unicodedata
+from collections import Counter, defaultdict
+
+import profiling
+
+# Inverted index with BM25 ranking for the trackers' `search` commands.
+#
+# The index is a SQLite file: "postings" holds (term, doc id, term frequency)
+# rows keyed by term, with a second index by doc id, "docs" each document's
+# length, and "meta" the document count and total length BM25 needs. A
+# document is re-indexed or removed by replacing only its own rows, so an
+# add/update/delete costs a few row writes however large the index is, and
+# a search reads only the postings of its query terms.
+
+K1 = 1.5
+B = 0.75
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS docs (
+    doc_id INTEGER PRIMARY KEY,
+    length INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term TEXT NOT NULL,
+    doc_id INTEGER NOT NULL,
+    tf INTEGER NOT NULL,
+    PRIMARY KEY (term, doc_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS idx_postings_doc ON postings(doc_id);
+"""
+
+
+def tokenize(text):
+    return re.findall(r'\w+', unicodedata.normalize('NFKC', text).casefold())
+
+
+def connect(db_file):
+    with profiling.phase("load"):
+        conn = sqlite3.connect(db_file)
+        conn.execute("PRAGMA journal_mode = WAL")
+        conn.executescript(SCHEMA)
+    return conn
+
+
+def _meta(conn, key):
+    row = conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+    return row[0] if row else 0
+
+
+def _incr(conn, key, delta):
+    conn.execute("INSERT INTO meta (key, value) VALUES (?, ?) "
+                 "ON CONFLICT(key) DO UPDATE SET value = value + excluded.value", (key, delta))
+
+
+def count(conn):
+    return _meta(conn, "count")
+
+
+def update(conn, doc_id, text):
+    # Makes the index reflect `text` for doc_id; text=None removes it. Runs
+    # inside the caller's transaction.
+    row = conn.execute("SELECT length FROM docs WHERE doc_id = ?", (doc_id,)).fetchone()
+    conn.execute("DELETE FROM postings WHERE doc_id = ?", (doc_id,))
+    counts = Counter(tokenize(text)) if text is not None else Counter()
+    length = sum(counts.values())
+    if text is not None:
+        conn.executemany("INSERT INTO postings (term, doc_id, tf) VALUES (?, ?, ?)",
+                         [(term, doc_id, tf) for term, tf in counts.items()])
+        conn.execute("INSERT OR REPLACE INTO docs (doc_id, length) VALUES (?, ?)", (doc_id, length))
+        if row is None:
+            _incr(conn, "count", 1)
+    elif row is not None:
+        conn.execute("DELETE FROM docs WHERE doc_id = ?", (doc_id,))
+        _incr(conn, "count", -1)
+    if length != (row[0] if row else 0):
+        _incr(conn, "total_length", length - (row[0] if row else 0))
+
+
+def rebuild(conn, documents):
+    # documents: iterable of (doc id, text) pairs.
+    with conn:
+        for table in ("meta", "docs", "postings"):
+            conn.execute(f"DELETE FROM {table}")
+        for doc_id, text in documents:
+            update(conn, doc_id, text)
+
+
+def search(conn, query, limit=10):
+    # Returns [(score, doc id)] best first.
+    doc_count = count(conn)
+    if not doc_count:
+        return []
+    average_length = _meta(conn, "total_length") / doc_count or 1
+    scores = defaultdict(float)
+    for term in dict.fromkeys(tokenize(query)):
+        postings = conn.execute("SELECT p.doc_id, p.tf, d.length FROM postings p JOIN docs d USING (doc_id) "
+                                "WHERE p.term = ?", (term,)).fetchall()
+        if not postings:
+            continue
+        idf = math.log(1 + (doc_count - len(postings) + 0.5) / (len(postings) + 0.5))
+        for doc_id, tf, length in postings:
+            norm = K1 * (1 - B + B * length / average_length)
+            scores[doc_id] += idf * tf * (K1 + 1) / (tf + norm)
+    return heapq.nlargest(limit, ((score, doc_id) for doc_id, score in scores.items()))
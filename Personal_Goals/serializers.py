@@ -0,0 +1,78 @@
+import json
+
+# Serializers for storage.py snapshots.
+#
+#   json           json.dumps with the tracker's indent (pretty-printed; the default)
+#   json-compact   json.dumps with no whitespace
+#   orjson         compact JSON written by orjson, when installed (pip3 install orjson);
+#                  otherwise the same as json-compact
+#   msgpack        MessagePack (pip3 install msgpack)
+#
+# detect() tells the format from a file's first bytes, so load() reads any
+# of them. json-compact and orjson write the same kind of file, so a compact
+# file is detected (and rewritten) as orjson whenever orjson is installed.
+# All JSON is read with orjson when it is installed, falling back to json
+# for anything orjson rejects (NaN, integers wider than 64 bits).
+
+NAMES = ["json", "json-compact", "orjson", "msgpack"]
+
+# A snapshot is always a map; MessagePack maps start with fixmap, map16 or
+# map32, none of which can start JSON text.
+_MSGPACK_MAP_BYTES = frozenset(range(0x80, 0x90)) | {0xde, 0xdf}
+
+
+def _orjson():
+    try:
+        import orjson
+    except ImportError:
+        return None
+    return orjson
+
+
+def _msgpack():
+    try:
+        import msgpack
+    except ImportError:
+        raise ImportError("MessagePack data files need msgpack. Install it with: pip3 install msgpack") from None
+    return msgpack
+
+
+def detect(head):
+    # head: the first bytes of a snapshot.
+    if head[:1] and head[0] in _MSGPACK_MAP_BYTES:
+        return "msgpack"
+    if head.lstrip()[:2] in (b'{\n', b'{\r', b'{}', b''):
+        return "json"
+    return "orjson" if _orjson() else "json-compact"
+
+
+def dumps(data, fmt, indent=4, ensure_ascii=True, default=None):
+    # Returns bytes.
+    if fmt == "json":
+        return json.dumps(data, indent=indent, ensure_ascii=ensure_ascii, default=default).encode('utf-8')
+    if fmt == "orjson":
+        orjson = _orjson()
+        if orjson:
+            return orjson.dumps(data, default=default, option=orjson.OPT_NON_STR_KEYS)
+        fmt = "json-compact"
+    if fmt == "json-compact":
+        return json.dumps(data, separators=(',', ':'), ensure_ascii=ensure_ascii, default=default).encode('utf-8')
+    if fmt == "msgpack":
+        return _msgpack().packb(data, use_bin_type=True, default=default)
+    raise ValueError(f"Unknown format '{fmt}' (expected one of: {', '.join(NAMES)}).")
+
+
+def loads_json(raw):
+    orjson = _orjson()
+    if orjson:
+        try:
+            return orjson.loads(raw)
+        except orjson.JSONDecodeError:
+            pass
+    return json.loads(raw)
+
+
+def loads(raw):
+    if detect(raw[:2]) == "msgpack":
+        return _msgpack().unpackb(raw, raw=False)
+    return loads_json(raw)
@@ -1,27 +1,232 @@
-import json
 import argparse
-from datetime import datetime
+import array
+import bisect
+from datetime import datetime, timedelta
+import heapq
+import json
+import mmap
+from operator import attrgetter
 import os
+import re
+
+import bulk
+import daemon
+import profiling
+import records
+import storage
 
 DATA_FILE = os.path.join(os.path.dirname(__file__), 'skill_tracker.json')
 
+# skill_tracker.json is a small index: {skill: {"total_time", "log_count",
+# "last_date", "shard"}}. Each skill's sessions live in their own JSONL shard
+# under skill_tracker_logs/, oldest first, so logging touches one shard.
+
 def load_data():
-    if not os.path.exists(DATA_FILE):
-        return {}
-    with open(DATA_FILE, 'r') as f:
-        return json.load(f)
+    data = storage.load(DATA_FILE, {})
+    if any("logs" in skill_data for skill_data in data.values()):
+        migrate_to_shards(data)
+    return data
 
 def save_data(data):
-    with open(DATA_FILE, 'w') as f:
-        json.dump(data, f, indent=4)
+    storage.save(DATA_FILE, data, indent=4)
+
+def record(data, *ops):
+    storage.record(DATA_FILE, data, ops, indent=4)
+
+def shard_dir():
+    return os.path.splitext(DATA_FILE)[0] + '_logs'
+
+def shard_path(skill_data):
+    return os.path.join(shard_dir(), skill_data["shard"])
+
+def new_skill_entry(data, skill_name):
+    base = re.sub(r'[^a-z0-9]+', '-', skill_name.lower()).strip('-') or 'skill'
+    taken = {skill_data.get("shard") for skill_data in data.values()}
+    shard, n = f"{base}.jsonl", 2
+    while shard in taken:
+        shard, n = f"{base}-{n}.jsonl", n + 1
+    return {"total_time": 0.0, "log_count": 0, "last_date": None, "shard": shard}
+
+def write_logs(skill_data, logs, mode='a'):
+    os.makedirs(shard_dir(), exist_ok=True)
+    lines = [json.dumps(log.to_dict(), ensure_ascii=False) for log in logs]
+    if mode == 'a':
+        storage.append_lines(shard_path(skill_data), lines)
+    else:
+        tmp_path = shard_path(skill_data) + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(''.join(line + '\n' for line in lines))
+        os.replace(tmp_path, shard_path(skill_data))
+
+def iter_logs(skill_data):
+    path = shard_path(skill_data)
+    if not os.path.exists(path):
+        return
+    with open(path, 'r', encoding='utf-8') as f:
+        for line in f:
+            if line.strip():
+                yield records.SkillLog.from_dict(json.loads(line))
+
+def tail_logs(skill_data, limit=None, since=None):
+    # Newest logs first-read from the end of the shard; returned oldest first.
+    path = shard_path(skill_data)
+    if not os.path.exists(path):
+        return []
+    logs = []
+    for line in storage.read_lines_reversed(path):
+        log = records.SkillLog.from_dict(json.loads(line))
+        if since and log.date < since:
+            break
+        logs.append(log)
+        if limit is not None and len(logs) >= limit:
+            break
+    logs.reverse()
+    return logs
+
+# --- Rollups and prefix sums ---
+#
+# Next to each shard, <skill>.ts and <skill>.cum hold the log timestamps
+# (seconds since 1970-01-01, local time) and the running total of hours as
+# flat arrays of doubles. "Hours between X and Y" is two bisects and a
+# subtraction. <skill>.rollups.json keeps hours per day, ISO week and month,
+# updated through the storage journal. All three are rebuilt from the shard
+# if their log count drifts from the index.
+
+EPOCH = datetime(1970, 1, 1)
+BUCKET_FORMATS = {"day": "%Y-%m-%d", "week": "%G-W%V", "month": "%Y-%m"}
+
+def _sidecar(skill_data, suffix):
+    return shard_path(skill_data)[:-len('.jsonl')] + suffix
+
+def _timestamp(date_str):
+    return (datetime.strptime(date_str, "%Y-%m-%d %H:%M:%S") - EPOCH).total_seconds()
+
+def _map_series(path):
+    if not os.path.exists(path) or os.path.getsize(path) == 0:
+        return array.array('d')
+    with open(path, 'rb') as f:
+        return memoryview(mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)).cast('d')
+
+def _append_series(path, values):
+    with open(path, 'ab') as f:
+        array.array('d', values).tofile(f)
+
+def _bucket_ops(log):
+    moment = datetime.strptime(log.date, "%Y-%m-%d %H:%M:%S")
+    return [storage.op_incr([bucket, moment.strftime(fmt)], log.time_spent)
+            for bucket, fmt in BUCKET_FORMATS.items()]
+
+def empty_rollups():
+    return {"log_count": 0, "day": {}, "week": {}, "month": {}}
+
+def rebuild_rollups(skill_data):
+    timestamps, totals, running = [], [], 0.0
+    rollups = empty_rollups()
+    for log in iter_logs(skill_data):
+        running += log.time_spent
+        timestamps.append(_timestamp(log.date))
+        totals.append(running)
+        for op in _bucket_ops(log):
+            storage.apply_op(rollups, op)
+    rollups["log_count"] = len(timestamps)
+
+    os.makedirs(shard_dir(), exist_ok=True)
+    for suffix, values in (('.ts', timestamps), ('.cum', totals)):
+        tmp_path = _sidecar(skill_data, suffix) + '.tmp'
+        with open(tmp_path, 'wb') as f:
+            array.array('d', values).tofile(f)
+        os.replace(tmp_path, _sidecar(skill_data, suffix))
+    storage.save(_sidecar(skill_data, '.rollups.json'), rollups, indent=None)
+    return rollups
+
+def load_rollups(skill_data):
+    rollups = storage.load(_sidecar(skill_data, '.rollups.json'), empty_rollups())
+    timestamps = _map_series(_sidecar(skill_data, '.ts'))
+    if rollups["log_count"] != skill_data["log_count"] or len(timestamps) != skill_data["log_count"]:
+        rollups = rebuild_rollups(skill_data)
+    return rollups
+
+def update_rollups(skill_data, log_entry):
+    # Called after log_entry was appended to the shard but before the index
+    # counters were bumped, so the sidecars must match the old log_count.
+    rollups = storage.load(_sidecar(skill_data, '.rollups.json'), empty_rollups())
+    totals = _map_series(_sidecar(skill_data, '.cum'))
+    if rollups["log_count"] != skill_data["log_count"] or len(totals) != skill_data["log_count"]:
+        return  # Out of sync; the next load_rollups() rebuilds from the shard.
+
+    running = (totals[-1] if len(totals) else 0.0) + log_entry.time_spent
+    _append_series(_sidecar(skill_data, '.ts'), [_timestamp(log_entry.date)])
+    _append_series(_sidecar(skill_data, '.cum'), [running])
+    storage.record(_sidecar(skill_data, '.rollups.json'), rollups,
+                   _bucket_ops(log_entry) + [storage.op_incr(["log_count"], 1)], indent=None)
+
+def hours_between(skill_data, start=None, end=None):
+    load_rollups(skill_data)
+    timestamps = _map_series(_sidecar(skill_data, '.ts'))
+    totals = _map_series(_sidecar(skill_data, '.cum'))
+    lo = bisect.bisect_left(timestamps, (start - EPOCH).total_seconds()) if start else 0
+    hi = bisect.bisect_left(timestamps, (end - EPOCH).total_seconds()) if end else len(timestamps)
+    if hi <= lo:
+        return 0.0
+    return totals[hi - 1] - (totals[lo - 1] if lo else 0.0)
+
+def top_skills(data, k, start=None, end=None):
+    return heapq.nlargest(k, ((hours_between(skill_data, start, end), skill_name)
+                              for skill_name, skill_data in data.items()))
+
+def bucket_hours(skill_data, by, start=None, end=None):
+    buckets = load_rollups(skill_data)[by]
+    first = start.strftime(BUCKET_FORMATS[by]) if start else ""
+    last = (end - timedelta(seconds=1)).strftime(BUCKET_FORMATS[by]) if end else None
+    return [(key, buckets[key]) for key in sorted(buckets)
+            if key >= first and (last is None or key <= last)]
+
+def show_report(by=None, start=None, end=None, skill_name=None, top=None):
+    data = load_data()
+    if skill_name and skill_name not in data:
+        print(f"Skill '{skill_name}' not found.")
+        return
+    if not data:
+        print("No skills tracked yet.")
+        return
+
+    window = f"{start.date() if start else 'the beginning'} to {(end - timedelta(days=1)).date() if end else 'now'}"
+    skills = [skill_name] if skill_name else list(data)
+    if by:
+        for name in skills:
+            print(f"\n--- {name}: hours per {by} ({window}) ---")
+            rows = bucket_hours(data[name], by, start, end)
+            if not rows:
+                print("  No logs in this window.")
+            for key, hours in rows:
+                print(f"  {key}: {hours:.2f} hours")
+        print("-------------------------")
+        return
+
+    ranked = top_skills({name: data[name] for name in skills}, top or len(skills), start, end)
+    print(f"\n--- Skill Hours ({window}) ---")
+    for hours, name in ranked:
+        print(f"- {name}: {hours:.2f} hours")
+    print("-------------------------")
+
+def migrate_to_shards(data):
+    # One-time conversion from the old single-file layout with inline "logs".
+    for skill_name, skill_data in data.items():
+        if "logs" not in skill_data:
+            continue
+        logs = sorted(map(records.SkillLog.from_dict, skill_data.pop("logs")), key=attrgetter("date"))
+        skill_data.update({k: v for k, v in new_skill_entry(data, skill_name).items() if k != "total_time"})
+        skill_data["log_count"] = len(logs)
+        skill_data["last_date"] = logs[-1].date if logs else None
+        write_logs(skill_data, logs, mode='w')
+    save_data(data)
 
 def add_skill(skill_name):
     data = load_data()
     if skill_name in data:
         print(f"Skill '{skill_name}' already exists.")
     else:
-        data[skill_name] = {"total_time": 0.0, "logs": []}
-        save_data(data)
+        record(data, storage.op_set([skill_name], new_skill_entry(data, skill_name)))
         print(f"Skill '{skill_name}' added.")
 
 def log_time(skill_name, time_spent, note):
@@ -30,30 +235,38 @@ def log_time(skill_name, time_spent, note):
         print(f"Skill '{skill_name}' not found. Please add it first.")
         return
 
-    data[skill_name]["total_time"] += time_spent
-    data[skill_name]["logs"].append({
-        "date": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-        "time_spent": time_spent,
-        "note": note
-    })
-    save_data(data)
+    log_entry = records.SkillLog(date=datetime.now().strftime("%Y-%m-%d %H:%M:%S"), time_spent=time_spent, note=note)
+    write_logs(data[skill_name], [log_entry])
+    update_rollups(data[skill_name], log_entry)
+    record(data,
+           storage.op_incr([skill_name, "total_time"], time_spent),
+           storage.op_incr([skill_name, "log_count"], 1),
+           storage.op_set([skill_name, "last_date"], log_entry.date))
     print(f"Logged {time_spent} hours for '{skill_name}'. Total: {data[skill_name]['total_time']} hours.")
 
-def show_skill(skill_name):
+def show_skill(skill_name, limit=None, since=None):
     data = load_data()
     if skill_name not in data:
         print(f"Skill '{skill_name}' not found.")
         return
 
     skill_data = data[skill_name]
+    if limit is None and since is None:
+        logs = iter_logs(skill_data)
+    else:
+        logs = tail_logs(skill_data, limit, since)
+
     print(f"\n--- Skill: {skill_name} ---")
     print(f"Total Time: {skill_data['total_time']:.2f} hours")
-    print("Logs:")
-    if not skill_data["logs"]:
+    if limit is None and since is None:
+        print("Logs:")
+    else:
+        print(f"Logs (showing {len(logs)} of {skill_data['log_count']}):")
+    if not skill_data["log_count"]:
         print("  No logs yet.")
     else:
-        for log in skill_data["logs"]:
-            print(f"  [{log['date']}] {log['time_spent']:.2f} hours: {log['note']}")
+        for log in logs:
+            print(f"  [{log.date}] {log.time_spent:.2f} hours: {log.note}")
     print("-------------------------")
 
 def list_skills():
@@ -67,8 +280,76 @@ def list_skills():
         print(f"- {skill_name} (Total: {skill_data['total_time']:.2f} hours)")
     print("----------------------")
 
-def main():
-    parser = argparse.ArgumentParser(description="A simple skill tracker.")
+# --- Bulk import / export ---
+
+SKILL_LOG_FIELDS = ["skill", "date", "time_spent", "note"]
+
+def import_logs(path, fmt=None):
+    data = load_data()
+
+    def validate(record):
+        skill_name = bulk.require(record, "skill")
+        if skill_name not in data:
+            raise bulk.ValidationError(f"skill '{skill_name}' is not tracked")
+        time_spent = bulk.as_float(bulk.require(record, "time_spent"), "time_spent")
+        date = str(bulk.require(record, "date"))
+        if len(date) == len("YYYY-MM-DD"):
+            date += " 00:00:00"
+        bulk.as_date(date, "date", "%Y-%m-%d %H:%M:%S")
+        return skill_name, records.SkillLog(date=date, time_spent=time_spent, note=record.get("note", ""))
+
+    batches = {}
+    for skill_name, log_entry in bulk.validated(bulk.read_records(path, fmt), validate):
+        batches.setdefault(skill_name, []).append(log_entry)
+    count = sum(len(logs) for logs in batches.values())
+    if not count:
+        print("No skill logs imported.")
+        return count
+
+    # One write per touched shard, keeping each shard sorted by date.
+    for skill_name, logs in batches.items():
+        skill_data = data[skill_name]
+        logs.sort(key=attrgetter("date"))
+        if skill_data["last_date"] is None or logs[0].date >= skill_data["last_date"]:
+            write_logs(skill_data, logs)
+        else:
+            merged = sorted([*iter_logs(skill_data), *logs], key=attrgetter("date"))
+            write_logs(skill_data, merged, mode='w')
+        skill_data["total_time"] += sum(log.time_spent for log in logs)
+        skill_data["log_count"] += len(logs)
+        skill_data["last_date"] = max(skill_data["last_date"] or "", logs[-1].date)
+        rebuild_rollups(skill_data)
+    save_data(data)
+    print(f"Imported {count} skill logs.")
+    return count
+
+def export_logs(path, fmt=None):
+    data = load_data()
+    rows = ({"skill": skill_name, **log.to_dict()}
+            for skill_name, skill_data in data.items()
+            for log in iter_logs(skill_data))
+    count = bulk.write_records(rows, path, SKILL_LOG_FIELDS, fmt)
+    if path != '-':
+        print(f"Exported {count} skill logs to {path}.")
+
+def convert_storage(fmt):
+    data = load_data()
+    try:
+        storage.convert(DATA_FILE, data, fmt, indent=4)
+    except ImportError as e:
+        print(f"Error: {e}")
+        return
+    print(f"Converted {os.path.basename(DATA_FILE)} to {fmt}.")
+
+def parse_day(value):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d")
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid date '{value}' (expected YYYY-MM-DD)")
+
+def build_parser(prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="A simple skill tracker.")
+    profiling.add_arguments(parser)
     subparsers = parser.add_subparsers(dest="command", help="Available commands")
 
     # Add command
@@ -84,22 +365,65 @@ def main():
     # Show command
     show_parser = subparsers.add_parser("show", help="Show details for a specific skill.")
     show_parser.add_argument("skill_name", type=str, help="The name of the skill.")
+    show_parser.add_argument("--limit", type=int, help="Only show the most recent N logs.")
+    show_parser.add_argument("--since", type=str, help="Only show logs on or after this date (YYYY-MM-DD).")
 
     # List command
     list_parser = subparsers.add_parser("list", help="List all tracked skills.")
 
-    args = parser.parse_args()
+    # Report command
+    report_parser = subparsers.add_parser("report", help="Hours per skill over a date range, optionally bucketed by day/week/month.")
+    report_parser.add_argument("--by", choices=list(BUCKET_FORMATS), help="Break hours down per day, ISO week or month.")
+    report_parser.add_argument("--from", dest="start", type=parse_day, help="First day to include (YYYY-MM-DD).")
+    report_parser.add_argument("--to", dest="end", type=parse_day, help="Last day to include (YYYY-MM-DD).")
+    report_parser.add_argument("--skill", type=str, help="Only report on this skill.")
+    report_parser.add_argument("--top", type=int, help="Only show the K skills with the most hours.")
 
-    if args.command == "add":
-        add_skill(args.skill_name)
-    elif args.command == "log":
-        log_time(args.skill_name, args.time, args.note)
-    elif args.command == "show":
-        show_skill(args.skill_name)
-    elif args.command == "list":
-        list_skills()
-    else:
-        parser.print_help()
+    # Import / Export commands
+    import_parser = subparsers.add_parser("import", help="Bulk-import skill logs (skill, date, time_spent, note) from a CSV or JSONL file.")
+    import_parser.add_argument("file", type=str, help="Path to the file, or '-' for stdin.")
+    import_parser.add_argument("--format", choices=bulk.FORMATS, help="File format (default: from the file extension).")
+    export_parser = subparsers.add_parser("export", help="Export skill logs to a CSV or JSONL file.")
+    export_parser.add_argument("file", type=str, help="Path to the file, or '-' for stdout.")
+    export_parser.add_argument("--format", choices=bulk.FORMATS, help="File format (default: from the file extension).")
+
+    # Convert command
+    convert_parser = subparsers.add_parser("convert", help="Rewrite the data file as pretty or compact JSON, orjson or MessagePack.")
+    convert_parser.add_argument("format", choices=storage.DOCUMENT_FORMATS, help="Storage format.")
+    return parser
+
+def main(argv=None, prog=None):
+    if daemon.forward("skills", argv, prog):
+        return
+
+    parser = build_parser(prog)
+    args = parser.parse_args(argv)
+
+    with profiling.profile("skills", args):
+        if args.command == "add":
+            add_skill(args.skill_name)
+        elif args.command == "log":
+            log_time(args.skill_name, args.time, args.note)
+        elif args.command == "show":
+            show_skill(args.skill_name, args.limit, args.since)
+        elif args.command == "list":
+            list_skills()
+        elif args.command == "report":
+            # --to is inclusive, so the window ends at the start of the next day.
+            end = args.end + timedelta(days=1) if args.end else None
+            show_report(args.by, args.start, end, args.skill, args.top)
+        elif args.command in ("import", "export"):
+            try:
+                if args.command == "import":
+                    import_logs(args.file, args.format)
+                else:
+                    export_logs(args.file, args.format)
+            except (bulk.ValidationError, OSError) as e:
+                print(f"Error: {e}")
+        elif args.command == "convert":
+            convert_storage(args.format)
+        else:
+            parser.print_help()
 
 if __name__ == "__main__":
     main()
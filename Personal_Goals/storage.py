@@ -0,0 +1,723 @@
+import contextlib
+import gc
+import json
+import marshal
+import os
+import sys
+import time
+
+import profiling
+import serializers
+
+# Shared persistence for the Personal_Goals trackers.
+#
+# Each tracker keeps a JSON snapshot (e.g. workout_data.json) plus an
+# append-only journal next to it (workout_data.json.journal). Mutating
+# commands append their operations to the journal instead of rewriting the
+# whole snapshot, and load() replays the journal on top of the snapshot.
+# Once the journal grows past COMPACT_THRESHOLD it is folded back into a
+# fresh snapshot.
+#
+# The first journal line is a header naming the snapshot it applies to:
+# {"base": <hash of the snapshot's bytes>, "stat": "<inode>:<size>:<mtime>"}.
+# The stat id is checked first; if it differs (the directory was copied,
+# restored or synced) the snapshot is hashed instead, and a matching journal
+# is kept and re-stamped. A journal matching neither is never replayed,
+# overwritten or compacted: JournalConflictError is raised until someone
+# sorts it out. Writing a new snapshot first moves the journal aside to
+# <journal>.superseded and deletes it only once the snapshot is in place, so
+# a crash in between is recovered on the next access instead of leaving a
+# journal that no longer matches.
+#
+# A snapshot is one document in any of the serializers.py formats (pretty
+# or compact JSON, orjson, MessagePack) or JSON Lines (see "JSONL
+# snapshots" below); load() detects which. Rewrites use the format named by
+# the LIFEOS_FORMAT environment variable if it is set, and otherwise keep
+# the format the snapshot already has (pretty JSON for new files) until
+# convert() changes it. A JSONL snapshot always stays JSONL. Journals are
+# always JSON lines.
+
+JOURNAL_SUFFIX = '.journal'
+SUPERSEDED_SUFFIX = '.superseded'
+COMPACT_THRESHOLD = 256 * 1024
+
+FORMAT_ENV_VAR = "LIFEOS_FORMAT"
+DOCUMENT_FORMATS = serializers.NAMES
+FORMATS = DOCUMENT_FORMATS + ["jsonl"]
+JSONL_PREFIX = b'{"jsonl": '
+
+CACHE_SUFFIX = '.cache'
+CACHE_MIN_BYTES = 64 * 1024
+RACY_WINDOW_S = 2
+# marshal's format may change between Python versions.
+_CACHE_TAG = (1, sys.version_info[:2])
+
+
+class JournalConflictError(Exception):
+    pass
+
+
+def journal_path(data_file):
+    return data_file + JOURNAL_SUFFIX
+
+
+def _snapshot_id(data_file):
+    try:
+        st = os.stat(data_file)
+    except FileNotFoundError:
+        return "none"
+    return f"{st.st_ino}:{st.st_size}:{st.st_mtime_ns}"
+
+
+# --- Operations ---
+
+def to_json(value):
+    # json `default` hook: objects with a to_dict() (records.py) are written as their dict.
+    to_dict = getattr(value, "to_dict", None)
+    if to_dict is None:
+        raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+    return to_dict()
+
+
+def op_set(path, value):
+    return {"op": "set", "path": list(path), "value": value}
+
+
+def op_append(path, value):
+    return {"op": "append", "path": list(path), "value": value}
+
+
+def op_incr(path, value):
+    return {"op": "incr", "path": list(path), "value": value}
+
+
+def op_delete(path):
+    return {"op": "delete", "path": list(path)}
+
+
+def apply_op(data, op):
+    *parents, last = op["path"]
+    target = data
+    for key in parents:
+        target = target[key]
+
+    kind = op["op"]
+    if kind == "set":
+        target[last] = op["value"]
+    elif kind == "append":
+        target[last].append(op["value"])
+    elif kind == "incr":
+        target[last] = target.get(last, 0) + op["value"]
+    elif kind == "delete":
+        del target[last]
+    else:
+        raise ValueError(f"Unknown journal operation '{kind}'.")
+
+
+# --- Parsed-snapshot cache ---
+#
+# Decoding a large snapshot dominates read-only commands, so the parsed
+# snapshot (before journal replay) is also kept as a marshal file next to it
+# (workout_data.json.cache). Its header names the snapshot it was made from
+# (inode, size, mtime) and a hash of the snapshot's bytes:
+#   - the same snapshot id is trusted, unless the snapshot was modified less
+#     than RACY_WINDOW_S before the cache was written, where a same-size
+#     rewrite within the filesystem's mtime granularity could look identical;
+#   - otherwise the snapshot's bytes are hashed, and a matching hash (e.g.
+#     after `touch` or a copy) reuses the cache and re-stamps it;
+#   - anything else is parsed as JSON and re-cached.
+# Writing a snapshot deletes its cache before the new file replaces the old
+# one. Snapshots under CACHE_MIN_BYTES are cheap enough to simply parse.
+
+def cache_path(data_file):
+    return data_file + CACHE_SUFFIX
+
+
+def _digest(raw):
+    import hashlib
+    return hashlib.blake2b(raw, digest_size=16).hexdigest()
+
+
+@contextlib.contextmanager
+def gc_paused():
+    # Decoding (or converting to records.py objects) allocates millions of
+    # containers and no cycles; letting the cyclic GC run over them
+    # repeatedly costs more than the decode itself.
+    enabled = gc.isenabled()
+    gc.disable()
+    try:
+        yield
+    finally:
+        if enabled:
+            gc.enable()
+
+
+def _read_cache_header(f):
+    # Length-prefixed, so the header can be checked without reading the data.
+    size = int.from_bytes(f.read(4), 'little')
+    return marshal.loads(f.read(size))
+
+
+def _write_cache(data_file, snapshot_id, digest, data):
+    cache = cache_path(data_file)
+    tmp_file = f"{cache}.{os.getpid()}.tmp"
+    header = marshal.dumps((_CACHE_TAG, snapshot_id, digest, time.time()))
+    try:
+        with open(tmp_file, 'wb') as f:
+            f.write(len(header).to_bytes(4, 'little'))
+            f.write(header)
+            f.write(marshal.dumps(data))
+        os.replace(tmp_file, cache)
+    except OSError:
+        pass  # Read-only directory or full disk: the cache is only an optimization.
+
+
+def _read_cached(data_file, st):
+    snapshot_id = f"{st.st_ino}:{st.st_size}:{st.st_mtime_ns}"
+    cache = cache_path(data_file)
+    try:
+        with open(cache, 'rb') as f:
+            tag, cached_id, cached_digest, created = _read_cache_header(f)
+            if tag == _CACHE_TAG and cached_id == snapshot_id and created - st.st_mtime_ns / 1e9 >= RACY_WINDOW_S:
+                profiling.count_file("load", cache)
+                raw = f.read()
+                with gc_paused():
+                    return marshal.loads(raw)
+    except (FileNotFoundError, EOFError, ValueError, TypeError):
+        tag = cached_digest = None
+
+    profiling.count_file("load", data_file)
+    with open(data_file, 'rb') as f:
+        raw = f.read()
+    digest = _digest(raw)
+    data = None
+    if tag == _CACHE_TAG and cached_digest == digest:
+        try:
+            with open(cache, 'rb') as f:
+                _read_cache_header(f)
+                cached = f.read()
+            with gc_paused():
+                data = marshal.loads(cached)
+        except (FileNotFoundError, EOFError, ValueError, TypeError):
+            pass
+    if data is None:
+        with gc_paused():
+            data = _decode(raw)
+    _write_cache(data_file, snapshot_id, digest, data)
+    return data
+
+
+# --- JSONL snapshots ---
+#
+# A tracker whose data is dominated by one list (workout logs, reading
+# items, saved ideas) can keep its snapshot as JSON Lines: a header line
+# holding the rest of the document and the list's key,
+#     {"jsonl": "logs", "data": {"workouts": {...}, "logs": null}}
+# then one line per element of the list. iter_stream() reads that list one
+# line at a time, so list commands print their first record straight away
+# and hold one record at a time however big the file is.
+
+def _read_header(f):
+    # Checks the prefix first: a compact JSON snapshot is a single long line.
+    prefix = f.read(len(JSONL_PREFIX))
+    return json.loads(prefix + f.readline()) if prefix == JSONL_PREFIX else None
+
+
+def snapshot_stream(data_file):
+    # The streamed key of a JSONL snapshot, or None for a JSON document (or no file).
+    try:
+        with open(data_file, 'rb') as f:
+            header = _read_header(f)
+    except FileNotFoundError:
+        return None
+    return header and header["jsonl"]
+
+
+def snapshot_format(data_file):
+    # One of FORMATS, or None if there is no snapshot yet.
+    try:
+        with open(data_file, 'rb') as f:
+            head = f.read(len(JSONL_PREFIX))
+    except FileNotFoundError:
+        return None
+    return "jsonl" if head == JSONL_PREFIX else serializers.detect(head)
+
+
+def _decode(raw):
+    if not raw.startswith(JSONL_PREFIX):
+        return serializers.loads(raw)
+    header_end = raw.index(b'\n')
+    header = json.loads(raw[:header_end])
+    # Line by line, as iter_stream() reads it: blank lines (and the \r of
+    # CRLF endings) from hand edits are skipped.
+    loads = serializers.loads_json
+    data = header["data"]
+    data[header["jsonl"]] = [loads(line) for line in raw[header_end + 1:].splitlines() if line.strip()]
+    return data
+
+
+def _dump_jsonl(f, data, stream, ensure_ascii):
+    header = {"jsonl": stream, "data": {key: None if key == stream else value for key, value in data.items()}}
+    f.write(json.dumps(header, ensure_ascii=ensure_ascii, default=to_json).encode('utf-8') + b'\n')
+    for item in data.get(stream, []):
+        f.write(serializers.dumps(item, "orjson", ensure_ascii=ensure_ascii, default=to_json) + b'\n')
+
+
+def _journal_appends(data_file, key):
+    # Values the journal appends to data[key], or None if it changes that
+    # list in any other way (the list then has to be loaded and replayed).
+    journal = journal_path(data_file)
+    appended = []
+    if _check_journal(data_file) is None:
+        return appended
+    profiling.count_file("load", journal)
+    with open(journal, 'r', encoding='utf-8') as f:
+        f.readline()
+        for line in f:
+            try:
+                op = json.loads(line)
+            except ValueError:
+                continue  # Torn write from an interrupted append
+            if op["path"][0] != key:
+                continue
+            if op["op"] != "append" or len(op["path"]) != 1:
+                return None
+            appended.append(op["value"])
+    return appended
+
+
+def _open_stream(data_file, key):
+    # (snapshot positioned after its header, journaled appends), or None when
+    # data[key] cannot be streamed from the file.
+    if _resident is not None:
+        return None
+    try:
+        f = open(data_file, 'rb')
+    except FileNotFoundError:
+        return None
+    header = _read_header(f)
+    appended = None
+    if header and header["jsonl"] == key:
+        appended = _journal_appends(data_file, key)
+    if appended is None:
+        f.close()
+        return None
+    profiling.count_file("load", data_file)
+    return f, appended
+
+
+def iter_stream(data_file, key, load, reverse=False):
+    # Yields the elements of data[key] (newest first with reverse=True) as
+    # plain dicts, one line at a time from a JSONL snapshot. Otherwise (a
+    # JSON snapshot, resident state, or journaled edits to the list) load()
+    # supplies the whole document and its elements are yielded as they are.
+    with profiling.phase("load"):
+        source = _open_stream(data_file, key)
+    if source is None:
+        items = load()[key]
+        yield from reversed(items) if reverse else items
+        return
+
+    f, appended = source
+    with f:
+        if reverse:
+            yield from reversed(appended)
+            lines = _lines_reversed(f, f.tell())
+        else:
+            lines = (line for line in f if line.strip())
+        for line in lines:
+            yield serializers.loads_json(line)
+        if not reverse:
+            yield from appended
+
+
+# --- Load / Save ---
+
+def _snapshot_digest(data_file):
+    import hashlib
+    digest = hashlib.blake2b(digest_size=16)
+    try:
+        with open(data_file, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+    except FileNotFoundError:
+        return "none"
+    return digest.hexdigest()
+
+
+def _journal_header(journal):
+    # The header dict; None if there is no journal (or only an empty file).
+    try:
+        with open(journal, 'rb') as f:
+            line = f.readline()
+    except FileNotFoundError:
+        return None
+    if not line.strip():
+        return None
+    try:
+        header = json.loads(line)
+    except ValueError:
+        header = None
+    return header if isinstance(header, dict) and "base" in header else {"base": None}
+
+
+def _journal_matches(data_file, header):
+    # "stat" if the snapshot is the very file the journal was written
+    # against, "digest" if it has the same bytes (a copy), else None.
+    # Journals from before the digest header carry only the stat id.
+    if header.get("stat", header["base"]) == _snapshot_id(data_file):
+        return "stat"
+    if "stat" in header and header["base"] == _snapshot_digest(data_file):
+        return "digest"
+    return None
+
+
+def _recover_superseded(data_file):
+    # Finishes a snapshot write interrupted between moving the journal aside
+    # and deleting it (see the top of the file).
+    superseded = journal_path(data_file) + SUPERSEDED_SUFFIX
+    header = _journal_header(superseded)
+    if header is None:
+        return
+    if _journal_matches(data_file, header) and not os.path.exists(journal_path(data_file)):
+        os.replace(superseded, journal_path(data_file))  # The old snapshot is still current
+    else:
+        os.remove(superseded)  # The new snapshot made it; its ops are in there
+
+
+def _check_journal(data_file):
+    # (header, how it matched) for the journal, None if there is none.
+    # Raises JournalConflictError for a journal of some other snapshot.
+    _recover_superseded(data_file)
+    journal = journal_path(data_file)
+    header = _journal_header(journal)
+    if header is None:
+        return None
+    matched = _journal_matches(data_file, header)
+    if matched is None:
+        raise JournalConflictError(
+            f"{journal} was written against a different version of {os.path.basename(data_file)}, so its "
+            f"changes can't be applied. Nothing was written. Restore the matching snapshot, or move the "
+            f"journal aside to discard its changes.")
+    return header, matched
+
+
+def _replay(data_file, data):
+    journal = journal_path(data_file)
+    if _check_journal(data_file) is None:
+        return data
+
+    profiling.count_file("load", journal)
+    with open(journal, 'r', encoding='utf-8') as f:
+        f.readline()
+        for line in f:
+            try:
+                op = json.loads(line)
+            except ValueError:
+                continue  # Torn write from an interrupted append
+            apply_op(data, op)
+    return data
+
+
+def _read(data_file, default):
+    with profiling.phase("load"):
+        try:
+            st = os.stat(data_file)
+        except FileNotFoundError:
+            st = None
+        if st is not None and st.st_size >= CACHE_MIN_BYTES:
+            data = _read_cached(data_file, st)
+        elif st is not None and st.st_size > 0:
+            profiling.count_file("load", data_file)
+            with open(data_file, 'rb') as f:
+                data = _decode(f.read())
+        else:
+            data = default
+        return _replay(data_file, data)
+
+
+def _rewrite_format(data_file):
+    # (format, JSONL stream key) for rewriting a snapshot; see the top of the file.
+    fmt = snapshot_format(data_file)
+    if fmt == "jsonl":
+        return fmt, snapshot_stream(data_file)
+    configured = os.environ.get(FORMAT_ENV_VAR)
+    if configured:
+        if configured not in DOCUMENT_FORMATS:
+            raise ValueError(f"{FORMAT_ENV_VAR}={configured} is not one of: {', '.join(DOCUMENT_FORMATS)}.")
+        return configured, None
+    return fmt or "json", None
+
+
+def _write_snapshot(data_file, data, indent=4, ensure_ascii=True, fmt=None, stream=None):
+    # fmt: one of FORMATS (with `stream`, the key JSONL writes one element
+    # per line), or None to pick it with _rewrite_format().
+    with profiling.phase("save"):
+        _check_journal(data_file)
+        if fmt is None:
+            fmt, stream = _rewrite_format(data_file)
+        payload = None
+        if fmt != "jsonl":
+            payload = serializers.dumps(data, fmt, indent=indent, ensure_ascii=ensure_ascii, default=to_json)
+        tmp_file = data_file + '.tmp'
+        with open(tmp_file, 'wb') as f:
+            if payload is None:
+                _dump_jsonl(f, data, stream, ensure_ascii)
+            else:
+                f.write(payload)
+        profiling.count_file("save", tmp_file)
+        try:
+            os.remove(cache_path(data_file))
+        except FileNotFoundError:
+            pass
+        journal = journal_path(data_file)
+        superseded = journal + SUPERSEDED_SUFFIX
+        if os.path.exists(journal):
+            os.replace(journal, superseded)
+        os.replace(tmp_file, data_file)
+        if os.path.exists(superseded):
+            os.remove(superseded)
+
+
+def _append_journal(data_file, data, ops, dump_options):
+    with profiling.phase("save"):
+        journal = journal_path(data_file)
+        lines = [json.dumps(op, ensure_ascii=False, default=to_json) for op in ops]
+        mode = 'ab+'
+        checked = _check_journal(data_file)
+        if checked is None or checked[1] == "digest":
+            header = json.dumps({"base": _snapshot_digest(data_file), "stat": _snapshot_id(data_file)})
+        if checked is None:
+            lines.insert(0, header)
+            mode = 'wb+'
+        elif checked[1] == "digest":
+            # Carried over with a copy of the snapshot: re-stamp it for this copy.
+            with open(journal, 'rb') as f:
+                f.readline()
+                body = f.read()
+            with open(journal + '.tmp', 'wb') as f:
+                f.write(header.encode('utf-8') + b'\n' + body)
+            os.replace(journal + '.tmp', journal)
+        payload = ('\n'.join(lines) + '\n').encode('utf-8')
+
+        with open(journal, mode) as f:
+            # Start on a fresh line if a previous append was cut short.
+            if f.tell() > 0:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    payload = b'\n' + payload
+            f.write(payload)
+            size = f.tell()
+        profiling.count_bytes("save", len(payload))
+
+        if size > COMPACT_THRESHOLD:
+            _write_snapshot(data_file, data, **dump_options)
+
+
+# --- Resident mode ---
+#
+# daemon.py keeps every tracker's parsed state in memory between commands.
+# While resident, load() serves the cached state, and save()/record() only
+# queue their writes until flush() runs. If the files on disk change
+# underneath an entry (another process wrote them), the entry is re-read and
+# its queued ops are re-applied to the fresh state, the way a journal replays
+# onto a new snapshot. A queued whole-file save can't be merged, so it is
+# dropped with a warning rather than written over the other process's data.
+#
+# Ops that go through a list index (["reading_items", 3, "status"]) are
+# queued with the record they were aimed at (its "id", or its contents if it
+# has none). If the fresh state has a different record at that index, the op
+# is dropped and reported as a conflict instead of landing on a neighbour.
+
+_resident = None
+
+
+def disk_stamp(data_file):
+    # Changes whenever the snapshot or its journal does; also used by
+    # sidecar indexes (date_index.py) to notice they are out of date.
+    try:
+        st = os.stat(journal_path(data_file))
+        journal = (st.st_size, st.st_mtime_ns)
+    except FileNotFoundError:
+        journal = None
+    return (_snapshot_id(data_file), journal)
+
+
+def enable_resident():
+    global _resident
+    if _resident is None:
+        _resident = {}
+
+
+def pending_writes():
+    if _resident is None:
+        return 0
+    return sum(len(entry["ops"]) + (entry["snapshot"] is not None)
+               for entry in _resident.values())
+
+
+def _identity(item):
+    item_id = item.get("id") if hasattr(item, "get") else None
+    if item_id is not None:
+        return ("id", item_id)
+    return ("value", json.dumps(item, sort_keys=True, default=to_json))
+
+
+def _targets(data, op):
+    # (depth, identity) of every list element the op's path indexes into.
+    targets = []
+    node = data
+    for depth, key in enumerate(op["path"]):
+        try:
+            child = node[key]
+        except (KeyError, IndexError, TypeError):
+            break
+        if isinstance(node, list):
+            targets.append((depth, _identity(child)))
+        node = child
+    return targets
+
+
+def _queue(data, ops):
+    # Applies ops to data, pairing each with the list elements it targeted.
+    queued = []
+    for op in ops:
+        queued.append((op, _targets(data, op)))
+        apply_op(data, op)
+    return queued
+
+
+def _apply_pending(data_file, data, queued):
+    # The queued ops that still apply to `data`, applied.
+    applied = []
+    for op, targets in queued:
+        where = f"({op['op']} {'/'.join(map(str, op['path']))})"
+        if _targets(data, op) != targets:
+            print(f"Warning: dropped a queued change to {os.path.basename(data_file)} {where}: "
+                  f"the list it indexes into changed on disk.", file=sys.stderr)
+            continue
+        try:
+            apply_op(data, op)
+        except (KeyError, IndexError, TypeError, AttributeError):
+            print(f"Warning: dropped a queued change to {os.path.basename(data_file)} {where} "
+                  f"that no longer applies.", file=sys.stderr)
+            continue
+        applied.append((op, targets))
+    return applied
+
+
+def _rebase(data_file, entry, default):
+    # The cached state (often the caller's default) already has the ops
+    # applied, so a deleted file starts over from an empty document.
+    data = _read(data_file, {} if default is entry["data"] else default)
+    if entry["snapshot"] is not None:
+        print(f"Warning: {os.path.basename(data_file)} changed on disk; dropped a queued rewrite of it.", file=sys.stderr)
+        entry["snapshot"] = None
+    entry["ops"] = _apply_pending(data_file, data, entry["ops"])
+    entry["data"] = data
+    entry["stamp"] = disk_stamp(data_file)
+
+
+def flush():
+    if not _resident:
+        return
+    for data_file, entry in _resident.items():
+        if (entry["snapshot"] is not None or entry["ops"]) and entry["stamp"] != disk_stamp(data_file):
+            _rebase(data_file, entry, entry["data"])
+        if entry["snapshot"] is not None:
+            _write_snapshot(data_file, entry["data"], **entry["snapshot"])
+        elif entry["ops"]:
+            _append_journal(data_file, entry["data"], [op for op, _ in entry["ops"]], entry["dump_options"])
+        else:
+            continue
+        entry["snapshot"] = None
+        entry["ops"] = []
+        entry["stamp"] = disk_stamp(data_file)
+
+
+def _resident_entry(data_file, default):
+    entry = _resident.get(data_file)
+    if entry is not None and entry["stamp"] != disk_stamp(data_file):
+        _rebase(data_file, entry, default)
+    if entry is None:
+        entry = {"data": _read(data_file, default), "stamp": disk_stamp(data_file),
+                 "ops": [], "snapshot": None, "dump_options": {}}
+        _resident[data_file] = entry
+    return entry
+
+
+# --- Public API ---
+
+def load(data_file, default):
+    if _resident is not None:
+        return _resident_entry(data_file, default)["data"]
+    return _read(data_file, default)
+
+
+def save(data_file, data, indent=4, ensure_ascii=True):
+    if _resident is not None:
+        entry = _resident_entry(data_file, data)
+        entry["data"] = data
+        entry["snapshot"] = {"indent": indent, "ensure_ascii": ensure_ascii}
+        entry["ops"] = []
+        return
+    _write_snapshot(data_file, data, indent=indent, ensure_ascii=ensure_ascii)
+
+
+def convert(data_file, data, fmt, stream=None, **dump_options):
+    # Rewrites the snapshot now in `fmt` (for "jsonl", streaming data[stream]).
+    flush()
+    _write_snapshot(data_file, data, fmt=fmt, stream=stream, **dump_options)
+
+
+def record(data_file, data, ops, **dump_options):
+    if _resident is not None:
+        queued = _queue(data, ops)
+        entry = _resident_entry(data_file, data)
+        if entry["data"] is not data:
+            # Re-read underneath the caller: replay its ops on the fresh state.
+            queued = _apply_pending(data_file, entry["data"], queued)
+        entry["dump_options"] = dump_options
+        if entry["snapshot"] is None:
+            entry["ops"].extend(queued)
+        return
+
+    for op in ops:
+        apply_op(data, op)
+    _append_journal(data_file, data, ops, dump_options)
+
+
+# --- Line-oriented files ---
+
+def append_lines(path, lines):
+    text = ''.join(line + '\n' for line in lines)
+    with profiling.phase("save"):
+        with open(path, 'a', encoding='utf-8') as f:
+            f.write(text)
+        profiling.count_bytes("save", text)
+
+
+def _lines_reversed(f, start=0, block_size=65536):
+    # The non-empty lines of an open binary file after offset `start`,
+    # last-to-first, reading from the end in blocks.
+    position = f.seek(0, os.SEEK_END)
+    remainder = b''
+    while position > start:
+        step = min(block_size, position - start)
+        position -= step
+        f.seek(position)
+        lines = (f.read(step) + remainder).split(b'\n')
+        remainder = lines.pop(0)
+        for line in reversed(lines):
+            if line.strip():
+                yield line
+    if remainder.strip():
+        yield remainder
+
+
+def read_lines_reversed(path, block_size=65536):
+    # Yields the non-empty lines of a file last-to-first, so reading the tail
+    # of a large file costs only the tail.
+    with open(path, 'rb') as f:
+        for line in _lines_reversed(f, block_size=block_size):
+            yield line.decode('utf-8')
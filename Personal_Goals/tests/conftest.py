@@ -0,0 +1,23 @@
+import os
+import sys
+
+import pytest
+
+# The trackers import each other as top-level modules (import storage), as
+# they do when run from Personal_Goals/.
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+
+@pytest.fixture
+def scratch(tmp_path, monkeypatch):
+    # Point a tracker's DATA_FILE (and DB_FILE) into tmp_path; every sidecar
+    # path derives from them. No daemon is forwarded to.
+    monkeypatch.setenv("LIFEOS_NO_DAEMON", "1")
+    monkeypatch.delenv("LIFEOS_FORMAT", raising=False)
+
+    def use(module):
+        for attr in ("DATA_FILE", "DB_FILE"):
+            if hasattr(module, attr):
+                monkeypatch.setattr(module, attr, str(tmp_path / os.path.basename(getattr(module, attr))))
+        return module
+    return use
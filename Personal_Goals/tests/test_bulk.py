@@ -0,0 +1,99 @@
+import os
+
+import pytest
+
+import bulk
+import daily_reads_manager
+import meal_planner
+import skills
+import workout_tracker
+
+
+def move_to(module, monkeypatch, directory):
+    # Points the tracker at an empty directory, as on a fresh install.
+    directory.mkdir()
+    monkeypatch.setattr(module, "DATA_FILE", str(directory / os.path.basename(module.DATA_FILE)))
+
+
+def round_trip(module, export, load, monkeypatch, tmp_path, fmt):
+    first = str(tmp_path / f"first.{fmt}")
+    export(first)
+    move_to(module, monkeypatch, tmp_path / "restored")
+    load()
+    second = str(tmp_path / f"second.{fmt}")
+    export(second)
+    with open(first, encoding='utf-8') as a, open(second, encoding='utf-8') as b:
+        return a.read(), b.read()
+
+
+@pytest.mark.parametrize("fmt", bulk.FORMATS)
+def test_reading_items_round_trip(scratch, monkeypatch, tmp_path, fmt):
+    reads = scratch(daily_reads_manager)
+    reads.add_reading_item("book", "Dune", author="Herbert", tags=["sci-fi", "classic"], total_progress=412)
+    reads.add_reading_item("quote", None, content="Fear is the mind-killer, «obviously»", author="Herbert")
+    reads.add_reading_item("article", "Plain", link="https://example.com/a,b")
+
+    first, second = round_trip(reads, reads.export_reading_items,
+                               lambda: reads.import_reading_items(str(tmp_path / f"first.{fmt}")),
+                               monkeypatch, tmp_path, fmt)
+
+    assert first == second
+    assert [item.get("title") for item in reads.iter_reading_items()] == ["Dune", None, "Plain"]
+    assert reads.load_data()["reading_items"][0]["tags"] == ["sci-fi", "classic"]
+
+
+@pytest.mark.parametrize("fmt", bulk.FORMATS)
+def test_recipes_round_trip(scratch, monkeypatch, tmp_path, fmt):
+    meals = scratch(meal_planner)
+    meals.add_recipe("Pancakes", ["flour: 200 g", "eggs: 2", "salt"])
+    meals.add_recipe("Omelette", ["eggs: 3", "butter: 10 g"])
+
+    first, second = round_trip(meals, meals.export_recipes,
+                               lambda: meals.import_recipes(str(tmp_path / f"first.{fmt}")),
+                               monkeypatch, tmp_path, fmt)
+
+    assert first == second
+    assert sorted(meals.load_data()["recipes"]) == ["Omelette", "Pancakes"]
+
+
+@pytest.mark.parametrize("fmt", bulk.FORMATS)
+def test_workout_logs_round_trip(scratch, monkeypatch, tmp_path, fmt):
+    workout = scratch(workout_tracker)
+    workout.define_workout("A", ["squat"])
+    source = tmp_path / "source.csv"
+    source.write_text("date,workout_name\n2024-01-02,A\n2024-01-01,A\nnot-a-date,A\n2024-01-03,B\n")
+    assert len(workout.import_logs(str(source))) == 2
+
+    def restore():
+        workout.define_workout("A", ["squat"])
+        workout.import_logs(str(tmp_path / f"first.{fmt}"))
+
+    first, second = round_trip(workout, workout.export_logs, restore, monkeypatch, tmp_path, fmt)
+
+    assert first == second
+    assert [log.date for log in workout.iter_history()] == ["2024-01-02", "2024-01-01"]
+
+
+@pytest.mark.parametrize("fmt", bulk.FORMATS)
+def test_skill_logs_round_trip(scratch, monkeypatch, tmp_path, fmt):
+    skill = scratch(skills)
+    skill.add_skill("Piano")
+    skill.add_skill("Go")
+    source = tmp_path / "source.jsonl"
+    source.write_text('{"skill": "Piano", "date": "2024-01-02", "time_spent": 1.5, "note": "scales"}\n'
+                      '{"skill": "Go", "date": "2024-01-01 20:00:00", "time_spent": "0.25"}\n'
+                      '{"skill": "Piano", "date": "2024-01-01", "time_spent": 2}\n'
+                      '{"skill": "Chess", "date": "2024-01-01", "time_spent": 1}\n')
+    assert skill.import_logs(str(source)) == 3
+
+    def restore():
+        skill.add_skill("Piano")
+        skill.add_skill("Go")
+        skill.import_logs(str(tmp_path / f"first.{fmt}"))
+
+    first, second = round_trip(skill, skill.export_logs, restore, monkeypatch, tmp_path, fmt)
+
+    assert first == second
+    piano = skill.load_data()["Piano"]
+    assert (piano["log_count"], piano["total_time"]) == (2, 3.5)
+    assert [log.date for log in skill.iter_logs(piano)] == ["2024-01-01 00:00:00", "2024-01-02 00:00:00"]
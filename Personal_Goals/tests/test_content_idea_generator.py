@@ -0,0 +1,65 @@
+import os
+import random
+from collections import Counter
+
+import content_idea_generator
+
+
+def test_generate_ideas_save_stores_the_printed_ideas(scratch, capsys):
+    ideas = scratch(content_idea_generator)
+    topic = next(iter(ideas.TOPIC_KEYWORDS))
+
+    ideas.main(["generate-ideas", topic, "--number", "5", "--save"])
+
+    printed = [line[2:] for line in capsys.readouterr().out.splitlines() if line.startswith("- ")]
+    assert len(printed) == 5
+    assert [idea["idea"] for idea in ideas.load_data()["saved_ideas"]] == printed
+
+
+def test_save_idea_dedups_through_the_sqlite_index(scratch, capsys):
+    ideas = scratch(content_idea_generator)
+    ideas.save_idea("How to start running in winter")
+    ideas.save_idea("how to START running, in winter!")
+    ideas.save_idea("How to start running in the winter")
+
+    out = capsys.readouterr().out
+    assert "already saved" in out
+    assert "looks similar to saved idea(s) [1]" in out
+    assert [idea["id"] for idea in ideas.load_data()["saved_ideas"]] == [1, 2]
+
+    # A missing index is rebuilt from the saved ideas.
+    os.remove(ideas.index_file())
+    ideas.save_ideas(["How to start running in winter", "Meal prep for runners"])
+    assert "Saved 1 ideas (1 duplicates skipped)." in capsys.readouterr().out
+    assert [idea["id"] for idea in ideas.load_data()["saved_ideas"]] == [1, 2, 3]
+
+
+def test_shuffled_indexes_is_a_permutation():
+    for total in list(range(1, 70)) + [1000, 4097]:
+        assert sorted(content_idea_generator.shuffled_indexes(total, random.Random(total))) == list(range(total))
+
+
+def test_shuffled_indexes_is_lazy_and_uniform():
+    first = next(content_idea_generator.shuffled_indexes(10**18, random.Random(1)))
+    assert 0 <= first < 10**18
+
+    # Where index 0 lands and the step between the first two draws should both
+    # be spread evenly, which an affine walk's constant stride is not.
+    total, draws = 10, 5000
+    positions, steps = Counter(), Counter()
+    for seed in range(draws):
+        order = list(content_idea_generator.shuffled_indexes(total, random.Random(seed)))
+        positions[order.index(0)] += 1
+        steps[(order[1] - order[0]) % total] += 1
+    expected = draws / total
+    assert all(abs(positions[p] - expected) < 0.2 * expected for p in range(total))
+    assert all(abs(steps[s] - draws / (total - 1)) < 0.2 * draws / (total - 1) for s in range(1, total))
+
+
+def test_iter_ideas_covers_the_space_with_a_stable_prefix():
+    topic = next(iter(content_idea_generator.TOPIC_KEYWORDS))
+    total = content_idea_generator.count_ideas(topic)
+    every = list(content_idea_generator.iter_ideas(topic, total + 5, seed=7))
+
+    assert list(content_idea_generator.iter_ideas(topic, 5, seed=7)) == every[:5]
+    assert len(every) == len(set(every)) == total
@@ -0,0 +1,34 @@
+import json
+import os
+
+import daemon
+import profiling
+import workout_tracker
+
+
+def test_profiled_command_runs_in_daemon_with_client_profile_env(scratch, tmp_path, monkeypatch):
+    scratch(workout_tracker)
+    monkeypatch.setenv(profiling.ENV_VAR, "daemon-default.jsonl")
+
+    response = daemon._run_command("workout_tracker", "workout", ["define", "A", "--exercises", "x"],
+                                   str(tmp_path), None, "profile.jsonl")
+
+    assert response["code"] == 0
+    (line,) = (tmp_path / "profile.jsonl").read_text().splitlines()
+    assert json.loads(line)["command"] == "define"
+    assert os.environ[profiling.ENV_VAR] == "daemon-default.jsonl"
+    assert "A" in workout_tracker.load_data()["workouts"]
+
+
+def test_forward_sends_profiled_commands_to_the_daemon(monkeypatch, tmp_path):
+    sent = []
+    monkeypatch.delenv("LIFEOS_NO_DAEMON", raising=False)
+    monkeypatch.setenv(profiling.ENV_VAR, "1")
+    monkeypatch.setattr(daemon, "SOCKET_PATH", str(tmp_path / "sock"))
+    (tmp_path / "sock").touch()
+    monkeypatch.setattr(daemon, "_connect", lambda timeout=None: None)
+    monkeypatch.setattr(daemon, "_exchange", lambda sock, payload: sent.append(payload) or {"stdout": "", "stderr": "", "code": 0})
+
+    assert daemon.forward("workout_tracker", ["--profile", "log", "A"], "workout")
+    assert sent[0]["argv"] == ["--profile", "log", "A"]
+    assert sent[0]["profile_env"] == "1"
@@ -0,0 +1,75 @@
+import os
+
+import pytest
+
+import daily_reads_manager
+import search_index
+
+
+def titles(module):
+    return [item["title"] for item in module.iter_reading_items()]
+
+
+def test_migrate_again_keeps_database_changes(scratch):
+    reads = scratch(daily_reads_manager)
+    reads.add_reading_item("book", "Before")
+    reads.migrate_to_sqlite()
+    reads.add_reading_item("article", "After")
+
+    reads.migrate_to_sqlite()
+
+    assert titles(reads) == ["Before", "After"]
+
+
+def test_migrate_force_replaces_database(scratch):
+    reads = scratch(daily_reads_manager)
+    reads.add_reading_item("book", "Before")
+    reads.migrate_to_sqlite()
+    reads.add_reading_item("article", "After")
+
+    reads.migrate_to_sqlite(force=True)
+
+    assert titles(reads) == ["Before"]
+
+
+def test_list_reading_items_returns_items_and_stream_returns_count(scratch, capsys):
+    reads = scratch(daily_reads_manager)
+    reads.add_reading_item("book", "One")
+    reads.add_reading_item("article", "Two")
+
+    assert [item["title"] for item in reads.list_reading_items()] == ["One", "Two"]
+    assert reads.list_reading_items(item_type="quote") == []
+    assert reads.stream_reading_items(item_type="book") == 1
+    assert "Title/Content: One" in capsys.readouterr().out
+
+
+@pytest.mark.parametrize("sqlite", [False, True])
+def test_search_index_follows_add_update_delete(scratch, capsys, sqlite):
+    reads = scratch(daily_reads_manager)
+    reads.add_reading_item("book", "Thinking in Systems", author="Meadows")
+    if sqlite:
+        reads.migrate_to_sqlite()
+    reads.add_reading_item("article", "Systems of Survival")
+    reads.add_reading_item("article", "Gardening Basics")
+
+    assert sorted(item_id for _, item_id in reads.search_reading_items("systems")) == [1, 2]
+    reads.update_reading_item(3, title="Gardening Systems")
+    reads.delete_reading_item(1)
+
+    assert sorted(item_id for _, item_id in reads.search_reading_items("systems")) == [2, 3]
+    assert reads.search_reading_items("meadows") == []
+    index = search_index.connect(reads.search_index_file())
+    assert search_index.count(index) == 2
+    assert index.execute("SELECT COUNT(*) FROM postings WHERE doc_id = 1").fetchone()[0] == 0
+    index.close()
+
+
+def test_search_matches_a_fresh_rebuild(scratch):
+    reads = scratch(daily_reads_manager)
+    for title in ["red fox", "red red hen", "blue fox den", "fox"]:
+        reads.add_reading_item("article", title)
+    reads.update_reading_item(2, title="red hen")
+    hits = reads.search_reading_items("red fox", limit=10)
+
+    os.remove(reads.search_index_file())
+    assert reads.search_reading_items("red fox", limit=10) == hits
@@ -0,0 +1,36 @@
+import os
+import shutil
+import subprocess
+import sys
+
+import lifeos
+
+
+def test_manifest_is_rebuilt_when_a_helper_module_changes(tmp_path, monkeypatch):
+    for name in os.listdir(lifeos.HERE):
+        if name.endswith('.py'):
+            shutil.copy(os.path.join(lifeos.HERE, name), tmp_path / name)
+    monkeypatch.setattr(lifeos, "HERE", str(tmp_path))
+    monkeypatch.setattr(lifeos, "MANIFEST_FILE", str(tmp_path / ".lifeos_manifest.json"))
+    builds = []
+    build_manifest = lifeos.build_manifest
+    monkeypatch.setattr(lifeos, "build_manifest", lambda: builds.append(1) or build_manifest())
+
+    manifest = lifeos.load_manifest()
+    assert "--format" in manifest["commands"]["workout"]["export"]
+    lifeos.load_manifest()
+    assert len(builds) == 1
+
+    for helper in ("storage.py", "bulk.py", "profiling.py"):
+        st = os.stat(tmp_path / helper)
+        os.utime(tmp_path / helper, ns=(st.st_atime_ns, st.st_mtime_ns + 10**9))
+        lifeos.load_manifest()
+    assert len(builds) == 4
+
+
+def test_building_the_manifest_imports_no_optional_dependencies():
+    code = ("import sys, lifeos; lifeos.build_manifest(); "
+            "print(sorted({'numpy', 'orjson', 'msgpack', 'plaid'} & set(sys.modules)))")
+    out = subprocess.run([sys.executable, "-c", code], cwd=lifeos.HERE, capture_output=True, text=True, check=True).stdout
+
+    assert out.strip() == "[]"
@@ -0,0 +1,124 @@
+import random
+import sys
+
+import pytest
+
+import meal_planner
+import recipe_index
+import recipe_matrix
+
+
+def random_book(rng, size, pantry_words=80):
+    words = [f"ingredient {n}" for n in range(pantry_words)]
+    return {f"Recipe {n}": meal_planner.recipe_details(
+                [f"{word}: {rng.randint(1, 400)} {rng.choice(['g', 'kg', 'ml', 'cup', ''])}"
+                 for word in rng.sample(words, rng.randint(2, 8))])
+            for n in range(size)}
+
+
+def ingredients_of(recipes, plan):
+    return set().union(*({recipe_index.normalize(i) for i in recipes[name].ingredients} for name in plan))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_optimized_plan_respects_window_and_reports_its_shopping_list(seed):
+    rng = random.Random(seed)
+    recipes = random_book(rng, 60)
+    index = recipe_index.build(recipes)
+    pantry = ["ingredient 1", "ingredient 2"]
+    pantry_mask, _ = recipe_index.to_mask(index, pantry)
+
+    plan, to_buy = meal_planner.optimize_plan(index, 28, 7, pantry_mask, rng)
+
+    assert len(plan) == 28
+    for day, meal in enumerate(plan):
+        assert meal not in plan[max(day - 6, 0):day]
+    assert to_buy == len(ingredients_of(recipes, plan) - set(pantry))
+
+
+@pytest.mark.parametrize("seed", range(10))
+def test_optimizer_finds_the_recipes_that_share_ingredients(seed):
+    # Three recipes share a, b and c; every other recipe needs three ingredients
+    # of its own. Any 3-day plan without repeats needs at least 3 ingredients.
+    recipes = {"abc": ["a", "b", "c"], "ab": ["a", "b"], "bc": ["b", "c"]}
+    recipes.update({f"solo {n}": [f"x{n}", f"y{n}", f"z{n}"] for n in range(5)})
+    index = recipe_index.build({name: meal_planner.recipe_details(i) for name, i in recipes.items()})
+
+    plan, to_buy = meal_planner.optimize_plan(index, 3, 3, rng=random.Random(seed))
+
+    assert sorted(plan) == ["ab", "abc", "bc"] and to_buy == 3
+
+
+def test_generate_plan_optimize_is_seeded_and_saved(scratch, capsys):
+    meals = scratch(meal_planner)
+    for name, ingredients in random_book(random.Random(1), 20).items():
+        meals.add_recipe(name, meal_planner.recipe_ingredients(ingredients))
+
+    meals.generate_plan(10, optimize=True, window=30, seed=4)
+    first = meals.load_data()["current_plan"]
+    meals.generate_plan(10, optimize=True, window=30, seed=4)
+
+    assert meals.load_data()["current_plan"] == first
+    assert len({entry["meal"] for entry in first}) == 10
+    assert "meals will repeat every 20 days" in capsys.readouterr().out
+
+
+def brute_force_totals(recipes, servings):
+    amounts, uses = {}, {}
+    for name, count in servings.items():
+        details = recipes[name]
+        quantities = details.get("quantities") or [None] * len(details.ingredients)
+        keys = set()
+        for ingredient, quantity in zip(details.ingredients, quantities):
+            amount, unit = recipe_matrix.to_base(*quantity) if quantity else (0.0, None)
+            key = (recipe_index.normalize(ingredient), unit)
+            amounts[key] = amounts.get(key, 0.0) + amount * count
+            keys.add(key)
+        # A recipe counts once per ingredient however many lines mention it.
+        for key in keys:
+            uses[key] = uses.get(key, 0) + count
+    return amounts, uses
+
+
+@pytest.mark.parametrize("numpy", [True, False])
+def test_matrix_totals_match_a_per_recipe_sum(monkeypatch, numpy):
+    if numpy:
+        pytest.importorskip("numpy")
+    else:
+        monkeypatch.setitem(sys.modules, "numpy", None)
+    rng = random.Random(14)
+    recipes = random_book(rng, 200)
+    recipes["Mixed units"] = meal_planner.recipe_details(["flour: 1 kg", "flour: 250 g", "Flour: 1 cup", "salt"])
+    servings = {name: rng.randint(1, 4) for name in rng.sample(sorted(recipes), 30)}
+    servings["Mixed units"] = 2
+
+    matrix = recipe_matrix.build(recipes)
+    amounts, uses = recipe_matrix.totals(matrix, servings)
+
+    expected_amounts, expected_uses = brute_force_totals(recipes, servings)
+    got = {matrix["columns"][c]: (amounts[c], uses[c]) for c in range(len(matrix["columns"])) if uses[c]}
+    assert got.keys() == expected_amounts.keys()
+    for key, (amount, count) in got.items():
+        assert amount == pytest.approx(expected_amounts[key]) and count == expected_uses[key]
+    # Grams and millilitres of the same ingredient stay in separate columns.
+    assert got[("flour", "g")][0] == pytest.approx(2 * 1250) and got[("flour", "ml")][0] == pytest.approx(2 * 240)
+
+
+def test_shopping_list_scales_quantities_and_adds_nutrition(scratch, capsys):
+    meals = scratch(meal_planner)
+    meals.add_recipe("Pancakes", ["flour: 200 g", "eggs: 2", "salt"])
+    meals.add_recipe("Bread", ["flour: 0.5 kg", "salt"])
+    meals.set_nutrition("Flour", "100 g", {"calories": 364, "protein": 10, "fat": 1, "carbs": 76})
+    meals.record(meals.load_data(), meal_planner.storage.op_set(["current_plan"], [
+        {"day": 1, "meal": "Pancakes"}, {"day": 2, "meal": "Bread"}, {"day": 3, "meal": "Pancakes"}]))
+    capsys.readouterr()
+
+    meals.generate_shopping_list(households=2, weeks=1, nutrition=True)
+
+    out = capsys.readouterr().out
+    # (200 g x 2 + 500 g) x 2 households = 1800 g of flour.
+    assert "- Flour: 1800 g (6552 calories, 180 protein, 18 fat, 1368 carbs)" in out
+    assert "- Eggs: 8" in out
+    assert "- Salt\n" in out
+    assert "Total: 6552 calories" in out
+    assert "(2 ingredients have no nutrition data or quantity" in out
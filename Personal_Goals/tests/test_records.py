@@ -0,0 +1,80 @@
+import json
+
+import pytest
+
+import records
+import storage
+
+SAMPLES = [
+    (records.WorkoutLog, {"date": "2024-01-02", "workout_name": "Push"}),
+    (records.WorkoutLog, {"workout_name": "Pull", "date": "2024-01-03", "sets": 4}),
+    (records.SkillLog, {"date": "2024-01-02 08:00:00", "time_spent": 1.5, "note": ""}),
+    (records.ReadingItem, {"id": 3, "type": "book", "title": "Dune", "status": "unread", "tags": ["sf"],
+                           "current_progress": 0, "total_progress": 412, "imported_from": "goodreads"}),
+    (records.ReadingItem, {"id": 4, "type": "quote", "content": "x", "author": "A"}),
+    (records.Recipe, {"ingredients": ["flour", "eggs"], "quantities": [[200, "g"], None]}),
+    (records.Recipe, {"ingredients": ["salt"]}),
+]
+
+
+@pytest.mark.parametrize("cls, d", SAMPLES)
+def test_record_round_trips_to_the_same_json(cls, d):
+    record = cls.from_dict(d)
+
+    assert not hasattr(record, "__dict__")
+    assert record.to_dict() == d
+    # Keys come back in FIELDS order, unknown keys last.
+    expected_order = [key for key in cls.FIELDS if key in d] + [key for key in d if key not in cls.FIELDS]
+    assert list(record.to_dict()) == expected_order
+    assert json.loads(json.dumps(record, default=storage.to_json)) == d
+    assert cls.from_dict(record.to_dict()) == record
+
+
+@pytest.mark.parametrize("cls, d", SAMPLES)
+def test_record_behaves_like_its_dict(cls, d):
+    record = cls.from_dict(d)
+
+    for key, value in d.items():
+        assert key in record and record[key] == value and record.get(key) == value
+    for key in set(cls.FIELDS) - set(d) | {"missing"}:
+        assert key not in record and record.get(key, "default") == "default"
+        with pytest.raises(KeyError):
+            record[key]
+        with pytest.raises(KeyError):
+            del record[key]
+
+    key = next(iter(d))
+    del record[key]
+    record["added"] = 1
+    expected = {k: v for k, v in d.items() if k != key}
+    expected["added"] = 1
+    assert record.to_dict() == expected
+
+
+def test_repeated_values_are_interned():
+    first = records.WorkoutLog.from_dict(json.loads('{"date": "2024-01-02", "workout_name": "Push"}'))
+    second = records.WorkoutLog.from_dict(json.loads('{"date": "2024-01-02", "workout_name": "Push"}'))
+    items = [records.ReadingItem.from_dict(json.loads('{"id": 1, "status": "unread", "tags": ["sf"]}')) for _ in range(2)]
+    recipes = [records.Recipe.from_dict(json.loads('{"ingredients": ["flour"], "quantities": [[1, "g"]]}')) for _ in range(2)]
+
+    assert first.date is second.date and first.workout_name is second.workout_name
+    assert items[0].status is items[1].status and items[0].tags[0] is items[1].tags[0]
+    assert recipes[0].ingredients[0] is recipes[1].ingredients[0]
+    assert recipes[0].quantities[0][1] is recipes[1].quantities[0][1]
+
+
+def test_records_survive_storage_round_trip_and_journal_ops(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "_resident", None)
+    path = str(tmp_path / "reads.json")
+    items = records.convert([d for cls, d in SAMPLES if cls is records.ReadingItem], records.ReadingItem)
+    data = {"reading_items": items}
+
+    storage.save(path, data)
+    storage.record(path, data, [storage.op_set(["reading_items", 0, "status"], "done"),
+                                storage.op_delete(["reading_items", 1, "author"]),
+                                storage.op_append(["reading_items"], records.ReadingItem(id=5, title="New"))])
+
+    loaded = storage.load(path, None)
+    assert loaded["reading_items"] == [dict(SAMPLES[3][1], status="done"), {"id": 4, "type": "quote", "content": "x"},
+                                       {"id": 5, "title": "New"}]
+    assert records.convert(loaded["reading_items"], records.ReadingItem) == data["reading_items"]
@@ -0,0 +1,131 @@
+import math
+import sys
+
+import pytest
+
+import content_idea_generator
+import daily_reads_manager
+import meal_planner
+import records
+import serializers
+import skills
+import storage
+import workout_tracker
+
+SAMPLE = {
+    "name": "Ünïcode «quotes» and \"escapes\"\n",
+    "numbers": [0, -1, 2**53 + 1, 1.5, -0.25, 1e-300],
+    "flags": [True, False, None],
+    "nested": {"empty list": [], "empty map": {}, "deep": [[{"a": [1]}]]},
+    "logs": [records.WorkoutLog("2024-01-02", "Push")],
+}
+EXPECTED = dict(SAMPLE, logs=[{"date": "2024-01-02", "workout_name": "Push"}])
+
+
+def detected(fmt):
+    # json-compact and orjson write the same kind of file; see serializers.detect().
+    if fmt in ("json-compact", "orjson"):
+        return "orjson" if serializers._orjson() else "json-compact"
+    return fmt
+
+
+def available(formats):
+    try:
+        serializers._msgpack()
+    except ImportError:
+        return [fmt for fmt in formats if fmt != "msgpack"]
+    return formats
+
+
+@pytest.fixture(params=serializers.NAMES)
+def fmt(request):
+    if request.param == "msgpack":
+        pytest.importorskip("msgpack")
+    return request.param
+
+
+def test_every_format_round_trips_and_is_detected(fmt):
+    raw = serializers.dumps(SAMPLE, fmt, default=storage.to_json)
+
+    assert serializers.loads(raw) == EXPECTED
+    assert serializers.detect(raw[:2]) == detected(fmt)
+
+
+def test_orjson_falls_back_to_json_compact_when_missing(monkeypatch):
+    monkeypatch.setitem(sys.modules, "orjson", None)
+
+    raw = serializers.dumps(SAMPLE, "orjson", default=storage.to_json)
+
+    assert raw == serializers.dumps(SAMPLE, "json-compact", default=storage.to_json)
+    assert serializers.detect(raw[:2]) == "json-compact"
+    assert serializers.loads(raw) == EXPECTED
+
+
+def test_missing_msgpack_is_reported(monkeypatch):
+    monkeypatch.setitem(sys.modules, "msgpack", None)
+
+    with pytest.raises(ImportError, match="pip3 install msgpack"):
+        serializers.dumps(SAMPLE, "msgpack")
+
+
+def test_json_that_orjson_rejects_still_loads():
+    value = serializers.loads(b'{"big": 123456789012345678901234567890, "nan": NaN}')
+
+    assert value["big"] == 123456789012345678901234567890 and math.isnan(value["nan"])
+
+
+@pytest.mark.parametrize("target", storage.FORMATS)
+def test_convert_round_trips_between_every_format(tmp_path, monkeypatch, fmt, target):
+    if target == "msgpack":
+        pytest.importorskip("msgpack")
+    monkeypatch.setattr(storage, "_resident", None)
+    monkeypatch.delenv(storage.FORMAT_ENV_VAR, raising=False)
+    path = str(tmp_path / "data.json")
+    storage.convert(path, SAMPLE, fmt)
+    data = storage.load(path, None)
+    storage.record(path, data, [storage.op_append(["logs"], {"date": "2024-01-03", "workout_name": "Pull"})])
+
+    storage.convert(path, storage.load(path, None), target, "logs")
+
+    expected = dict(EXPECTED, logs=EXPECTED["logs"] + [{"date": "2024-01-03", "workout_name": "Pull"}])
+    assert storage.snapshot_format(path) == detected(target)
+    assert storage.load(path, None) == expected
+    # Later writes keep the converted format.
+    storage.save(path, storage.load(path, None))
+    assert storage.snapshot_format(path) == detected(target)
+    assert storage.load(path, None) == expected
+
+
+def fill(module):
+    if module is workout_tracker:
+        module.log_workout("Push")
+        module.log_workout("Pull")
+    elif module is skills:
+        module.add_skill("Piano")
+        module.log_time("Piano", 1.5, "scales")
+    elif module is daily_reads_manager:
+        module.add_reading_item("book", "Dune", author="Herbert", tags=["sci-fi"], total_progress=412)
+        module.add_reading_item("quote", None, content="«Fear»", author="Herbert")
+    elif module is meal_planner:
+        module.add_recipe("Pancakes", ["flour: 200 g", "eggs: 2", "salt"])
+    else:
+        module.save_idea("Write about «caching»")
+
+
+def as_json(module):
+    return serializers.loads(serializers.dumps(module.load_data(), "json", default=storage.to_json))
+
+
+@pytest.mark.parametrize("module", [workout_tracker, skills, daily_reads_manager, meal_planner, content_idea_generator])
+def test_tracker_convert_command_keeps_data_in_every_format(scratch, capsys, module):
+    tracker = scratch(module)
+    fill(tracker)
+    before = as_json(tracker)
+
+    for fmt in available(storage.FORMATS):
+        if fmt == "jsonl" and not hasattr(tracker, "STREAM_KEY"):
+            continue
+        tracker.main(["convert", fmt])
+        assert "Error" not in capsys.readouterr().out
+        assert storage.snapshot_format(tracker.DATA_FILE) == detected(fmt)
+        assert as_json(tracker) == before, fmt
@@ -0,0 +1,214 @@
+import os
+
+import pytest
+
+import storage
+
+
+@pytest.fixture
+def data_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(storage, "_resident", None)
+    path = str(tmp_path / "data.json")
+    storage.save(path, {"logs": ["first"]})
+    return path
+
+
+def external_record(data_file, *ops):
+    # What a second process writing without the daemon does.
+    resident, storage._resident = storage._resident, None
+    try:
+        storage.record(data_file, storage.load(data_file, {"logs": []}), ops)
+    finally:
+        storage._resident = resident
+
+
+def external_save(data_file, data):
+    resident, storage._resident = storage._resident, None
+    try:
+        storage.save(data_file, data)
+    finally:
+        storage._resident = resident
+
+
+def on_disk(data_file):
+    resident, storage._resident = storage._resident, None
+    try:
+        return storage.load(data_file, {"logs": []})
+    finally:
+        storage._resident = resident
+
+
+def test_resident_flush_keeps_external_journal_write(data_file):
+    storage.enable_resident()
+    storage.record(data_file, storage.load(data_file, {"logs": []}), [storage.op_append(["logs"], "daemon")])
+    external_record(data_file, storage.op_append(["logs"], "cli"))
+
+    storage.flush()
+
+    assert on_disk(data_file)["logs"] == ["first", "cli", "daemon"]
+    assert storage.load(data_file, {"logs": []})["logs"] == ["first", "cli", "daemon"]
+
+
+def test_resident_load_rebases_onto_external_snapshot(data_file):
+    storage.enable_resident()
+    storage.record(data_file, storage.load(data_file, {"logs": []}), [storage.op_append(["logs"], "daemon")])
+    external_save(data_file, {"logs": ["rewritten"]})
+
+    assert storage.load(data_file, {"logs": []})["logs"] == ["rewritten", "daemon"]
+    storage.flush()
+    assert on_disk(data_file)["logs"] == ["rewritten", "daemon"]
+
+
+def test_resident_drops_queued_rewrite_over_external_write(data_file, capsys):
+    storage.enable_resident()
+    storage.save(data_file, {"logs": ["daemon rewrite"]})
+    external_record(data_file, storage.op_append(["logs"], "cli"))
+
+    storage.flush()
+
+    assert on_disk(data_file)["logs"] == ["first", "cli"]
+    assert "dropped a queued rewrite" in capsys.readouterr().err
+
+
+def test_jsonl_snapshot_with_blank_and_crlf_lines_loads(tmp_path):
+    path = tmp_path / "data.json"
+    path.write_bytes(b'{"jsonl": "logs", "data": {"name": "x", "logs": null}}\r\n'
+                     b'{"n": 1}\r\n\r\n   \n{"n": 2}\n\n')
+
+    assert storage.load(str(path), None) == {"name": "x", "logs": [{"n": 1}, {"n": 2}]}
+    assert list(storage.iter_stream(str(path), "logs", None)) == [{"n": 1}, {"n": 2}]
+
+
+def test_journal_survives_copy_of_data_directory(tmp_path, data_file):
+    storage.record(data_file, storage.load(data_file, None), [storage.op_append(["logs"], "second")])
+    copy = tmp_path / "copy"
+    copy.mkdir()
+    for name in ("data.json", "data.json.journal"):
+        (copy / name).write_bytes((tmp_path / name).read_bytes())
+    copied = str(copy / "data.json")
+
+    assert storage.load(copied, None)["logs"] == ["first", "second"]
+    storage.record(copied, storage.load(copied, None), [storage.op_append(["logs"], "third")])
+    assert storage.load(copied, None)["logs"] == ["first", "second", "third"]
+
+
+def test_journal_of_another_snapshot_is_never_discarded(data_file):
+    storage.record(data_file, storage.load(data_file, None), [storage.op_append(["logs"], "second")])
+    journal = storage.journal_path(data_file)
+    before = open(journal, 'rb').read()
+    with open(data_file, 'w') as f:
+        f.write('{"logs": ["replaced"]}')
+
+    with pytest.raises(storage.JournalConflictError):
+        storage.load(data_file, None)
+    with pytest.raises(storage.JournalConflictError):
+        storage.record(data_file, {"logs": []}, [storage.op_append(["logs"], "x")])
+    with pytest.raises(storage.JournalConflictError):
+        storage.save(data_file, {"logs": []})
+    assert open(journal, 'rb').read() == before
+
+
+def test_interrupted_snapshot_write_recovers_journal(data_file):
+    storage.record(data_file, storage.load(data_file, None), [storage.op_append(["logs"], "second")])
+    journal = storage.journal_path(data_file)
+    # Crash after moving the journal aside, before the new snapshot replaced the old one.
+    os.replace(journal, journal + storage.SUPERSEDED_SUFFIX)
+
+    assert storage.load(data_file, None)["logs"] == ["first", "second"]
+    storage.save(data_file, storage.load(data_file, None))
+    assert not os.path.exists(journal) and not os.path.exists(journal + storage.SUPERSEDED_SUFFIX)
+    assert storage.load(data_file, None)["logs"] == ["first", "second"]
+
+
+def test_queued_positional_change_is_dropped_when_list_shifts(tmp_path, monkeypatch, capsys):
+    path = str(tmp_path / "reads.json")
+    items = [{"id": n, "status": "unread"} for n in (1, 2, 3)]
+    monkeypatch.setattr(storage, "_resident", None)
+    storage.save(path, {"reading_items": items})
+    storage.enable_resident()
+
+    data = storage.load(path, None)
+    storage.record(path, data, [storage.op_set(["reading_items", 1, "status"], "done")])
+    external_record(path, storage.op_delete(["reading_items", 0]))
+    storage.flush()
+
+    external = storage._resident
+    storage._resident = None
+    try:
+        assert storage.load(path, None)["reading_items"] == [{"id": 2, "status": "unread"}, {"id": 3, "status": "unread"}]
+    finally:
+        storage._resident = external
+    assert "changed on disk" in capsys.readouterr().err
+
+
+def test_queued_positional_change_survives_unrelated_external_write(tmp_path, monkeypatch):
+    path = str(tmp_path / "reads.json")
+    monkeypatch.setattr(storage, "_resident", None)
+    storage.save(path, {"reading_items": [{"id": 1, "status": "unread"}], "tags": []})
+    storage.enable_resident()
+
+    storage.record(path, storage.load(path, None), [storage.op_set(["reading_items", 0, "status"], "done")])
+    external_record(path, storage.op_append(["tags"], "x"))
+    storage.flush()
+
+    storage._resident = None
+    assert storage.load(path, None) == {"reading_items": [{"id": 1, "status": "done"}], "tags": ["x"]}
+
+
+@pytest.fixture
+def cached_file(data_file, monkeypatch):
+    monkeypatch.setattr(storage, "CACHE_MIN_BYTES", 0)
+    # Back-date the snapshot so its cache is outside the racy window and trusted by id.
+    os.utime(data_file, ns=(10**18, 10**18))
+    assert storage.load(data_file, None) == {"logs": ["first"]}
+    assert os.path.exists(storage.cache_path(data_file))
+    return data_file
+
+
+def cache_header(data_file):
+    with open(storage.cache_path(data_file), 'rb') as f:
+        return storage._read_cache_header(f)
+
+
+def test_cache_is_ignored_after_external_rewrite(cached_file):
+    with open(cached_file, 'w') as f:
+        f.write('{"logs": ["second", "third"]}')
+
+    assert storage.load(cached_file, None) == {"logs": ["second", "third"]}
+    assert storage.load(cached_file, None) == {"logs": ["second", "third"]}
+
+
+def test_cache_is_ignored_after_same_size_rewrite_in_racy_window(data_file, monkeypatch):
+    monkeypatch.setattr(storage, "CACHE_MIN_BYTES", 0)
+    assert storage.load(data_file, None) == {"logs": ["first"]}
+    st = os.stat(data_file)
+    with open(data_file, 'rb') as f:
+        raw = f.read()
+    with open(data_file, 'wb') as f:
+        f.write(raw.replace(b"first", b"FIRST"))
+    # Same inode, size and mtime: only the content hash can tell the difference.
+    os.utime(data_file, ns=(st.st_atime_ns, st.st_mtime_ns))
+
+    assert storage.load(data_file, None) == {"logs": ["FIRST"]}
+
+
+def test_cache_is_reused_and_restamped_after_touch(cached_file, monkeypatch):
+    _, _, digest, _ = cache_header(cached_file)
+    os.utime(cached_file, ns=(2 * 10**18, 2 * 10**18))
+    decoded = []
+    monkeypatch.setattr(storage, "_decode", lambda raw: decoded.append(raw))
+
+    assert storage.load(cached_file, None) == {"logs": ["first"]}
+    _, snapshot_id, restamped_digest, _ = cache_header(cached_file)
+    assert not decoded and restamped_digest == digest
+    assert snapshot_id.endswith(f":{2 * 10**18}")
+
+
+def test_saving_or_corrupting_the_cache_falls_back_to_the_snapshot(cached_file):
+    storage.save(cached_file, {"logs": ["saved"]})
+    assert not os.path.exists(storage.cache_path(cached_file))
+    assert storage.load(cached_file, None) == {"logs": ["saved"]}
+
+    with open(storage.cache_path(cached_file), 'wb') as f:
+        f.write(b'\x05\x00\x00\x00garbage')
+    assert storage.load(cached_file, None) == {"logs": ["saved"]}
@@ -0,0 +1,122 @@
+from collections import Counter
+from datetime import date, timedelta
+import random
+
+import pytest
+
+import storage
+import workout_tracker
+
+
+def history_dates(workout):
+    return [log.date for log in workout.iter_history()]
+
+
+def test_date_index_rebuilt_after_same_count_rewrite(scratch):
+    workout = scratch(workout_tracker)
+    workout.save_data({"workouts": {"A": ["squat"]},
+                       "logs": [{"date": "2024-01-01", "workout_name": "A"},
+                                {"date": "2024-01-02", "workout_name": "A"}]})
+    assert history_dates(workout) == ["2024-01-02", "2024-01-01"]
+
+    # Another writer moves the first log past the second; the count is unchanged.
+    storage.record(workout.DATA_FILE, workout.load_data(),
+                   [storage.op_set(["logs", 0], {"date": "2024-01-03", "workout_name": "A"})])
+
+    assert history_dates(workout) == ["2024-01-03", "2024-01-02"]
+
+
+def test_date_index_kept_in_step_by_log(scratch):
+    workout = scratch(workout_tracker)
+    workout.save_data({"workouts": {"A": ["squat"]}, "logs": [{"date": "2024-01-01", "workout_name": "A"}]})
+    workout.iter_history()
+    workout.log_workout("A")
+
+    index_before = open(workout.DATA_FILE + '.dateidx', 'rb').read()
+    assert len(history_dates(workout)) == 2
+    assert open(workout.DATA_FILE + '.dateidx', 'rb').read() == index_before
+
+
+def test_first_log_creates_date_index(scratch):
+    workout = scratch(workout_tracker)
+    workout.define_workout("A", ["squat"])
+    workout.log_workout("A")
+
+    assert history_dates(workout) == [workout.load_data()["logs"][0].date]
+
+
+def history_output(workout, capsys, *args):
+    capsys.readouterr()
+    assert workout.main(["history", *args]) in (None, 0)
+    return capsys.readouterr().out
+
+
+def test_history_matches_across_json_and_jsonl(scratch, tmp_path, capsys):
+    workout = scratch(workout_tracker)
+    workout.main(["define", "A", "--exercises", "squat"])
+    workout.main(["define", "B", "--exercises", "row"])
+    imported = tmp_path / "logs.csv"
+    imported.write_text("date,workout_name\n2024-02-01,A\n2024-01-01,A\n2024-03-01,B\n2024-01-01,B\n")
+    workout.main(["import", str(imported)])
+
+    expected = {args: history_output(workout, capsys, *args)
+                for args in [(), ("--limit", "1"), ("--limit", "2", "--offset", "1")]}
+    assert "2024-03-01: B" in expected[("--limit", "1")]
+
+    workout.main(["convert", "jsonl"])
+    assert {args: history_output(workout, capsys, *args) for args in expected} == expected
+
+    # Older logs imported into the JSONL file still come out newest first.
+    imported.write_text("date,workout_name\n2023-12-01,A\n2024-02-15,B\n")
+    workout.main(["import", str(imported)])
+    jsonl = history_output(workout, capsys)
+    workout.main(["convert", "json"])
+    assert history_output(workout, capsys) == jsonl
+    assert "2024-02-15" in jsonl.split("2024-03-01")[1].split("2024-02-01")[0]
+
+
+def brute_force_analytics(dates, names, today):
+    active = sorted(set(dates))
+    runs, run = [], [active[0]]
+    for day in active[1:]:
+        if (day - run[-1]).days == 1:
+            run.append(day)
+        else:
+            runs.append(run)
+            run = [day]
+    runs.append(run)
+    longest = max(runs, key=len)  # max() keeps the first of equal runs, as argmax does
+    weekly = Counter(f"{d.isocalendar()[0]}-W{d.isocalendar()[1]:02d}" for d in dates)
+    return {
+        "total_logs": len(dates),
+        "active_days": len(active),
+        "first_date": active[0].isoformat(),
+        "last_date": active[-1].isoformat(),
+        "streaks": {"current": len(runs[-1]) if (today - active[-1]).days <= 1 else 0,
+                    "longest": len(longest),
+                    "longest_start": longest[0].isoformat(), "longest_end": longest[-1].isoformat()},
+        "weekly": dict(sorted(weekly.items())),
+        "day_of_week": {name: sum(d.weekday() == i for d in dates) for i, name in
+                        enumerate(["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"])},
+        "per_workout": dict(Counter(names).most_common()),
+    }
+
+
+@pytest.mark.parametrize("seed", [1, 2, 3])
+def test_analytics_match_a_brute_force_count(scratch, seed):
+    pytest.importorskip("numpy")
+    workout = scratch(workout_tracker)
+    rng = random.Random(seed)
+    # Several years, across ISO week-53 years (2015, 2020) and a streak running into "today".
+    start = date(2014, 12, 20)
+    dates = [start + timedelta(days=rng.randrange(0, 2250)) for _ in range(400)]
+    dates += [date(2021, 3, 1) + timedelta(days=n) for n in range(12)]
+    names = [rng.choice("ABC") for _ in dates]
+    workout.save_data({"workouts": {name: ["x"] for name in "ABC"},
+                       "logs": [{"date": d.isoformat(), "workout_name": name} for d, name in zip(dates, names)]})
+
+    today = date(2021, 3, 13)
+    result = workout.compute_analytics(workout.load_data(), today=today)
+
+    assert result == brute_force_analytics(dates, names, today)
+    assert result["streaks"]["current"] >= 12
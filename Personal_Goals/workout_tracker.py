@@ -1,27 +1,51 @@
-import json
 import argparse
-from datetime import datetime, timedelta
+from collections import Counter
+from datetime import date, datetime, timedelta
+import itertools
+import json
+from operator import attrgetter
 import os
 
+import bulk
+import daemon
+import date_index
+import profiling
+import records
+import storage
+
 DATA_FILE = os.path.join(os.path.dirname(__file__), 'workout_data.json')
+# The list a JSONL snapshot keeps one record per line (see storage.py).
+STREAM_KEY = "logs"
 
 def load_data():
-    if not os.path.exists(DATA_FILE):
-        return {"workouts": {}, "logs": []}
-    with open(DATA_FILE, 'r') as f:
-        return json.load(f)
+    data = storage.load(DATA_FILE, {"workouts": {}, "logs": []})
+    records.convert(data["logs"], records.WorkoutLog)
+    return data
 
 def save_data(data):
-    with open(DATA_FILE, 'w') as f:
-        json.dump(data, f, indent=4)
+    storage.save(DATA_FILE, data, indent=4)
+
+def record(data, *ops):
+    storage.record(DATA_FILE, data, ops, indent=4)
+
+def is_streamed():
+    # JSONL history reads the file backwards, so a JSONL snapshot keeps its
+    # logs in date order (ties in logging order).
+    return storage.snapshot_stream(DATA_FILE) == STREAM_KEY
+
+def sort_logs(data):
+    data["logs"].sort(key=attrgetter("date"))
+
+def load_index(data):
+    # (ordinal days, log positions) sorted by date; see date_index.py.
+    return date_index.load(DATA_FILE, data["logs"])
 
 def define_workout(workout_name, exercises):
     data = load_data()
     if workout_name in data["workouts"]:
         print(f"Workout '{workout_name}' already exists. Use 'update' command to modify.")
     else:
-        data["workouts"][workout_name] = exercises
-        save_data(data)
+        record(data, storage.op_set(["workouts", workout_name], exercises))
         print(f"Workout '{workout_name}' defined with exercises: {', '.join(exercises)}")
 
 def log_workout(workout_name):
@@ -30,46 +54,121 @@ def log_workout(workout_name):
         print(f"Workout '{workout_name}' not found. Please define it first.")
         return
 
-    log_entry = {
-        "date": datetime.now().strftime("%Y-%m-%d"),
-        "workout_name": workout_name
-    }
-    data["logs"].append(log_entry)
-    save_data(data)
+    log_entry = records.WorkoutLog(datetime.now().strftime("%Y-%m-%d"), workout_name)
+    if data["logs"] and data["logs"][-1].date > log_entry.date and is_streamed():
+        # Logs dated after today (imported): appending would break the order.
+        data["logs"].append(log_entry)
+        sort_logs(data)
+        save_data(data)
+        print(f"Logged '{workout_name}' for today.")
+        return
+    index = load_index(data)
+    record(data, storage.op_append(["logs"], log_entry))
+    date_index.add(DATA_FILE, index, log_entry.date, len(data["logs"]) - 1)
     print(f"Logged '{workout_name}' for today.")
 
-def show_history():
+def iter_history(limit=None, offset=0):
+    if is_streamed():
+        # JSONL storage: newest first, read from the end of the file.
+        logs = storage.iter_stream(DATA_FILE, STREAM_KEY, load_data, reverse=True)
+        return itertools.islice(records.iter_converted(logs, records.WorkoutLog),
+                                offset, None if limit is None else offset + limit)
+    # Newest first, straight from the date index (no sort)
     data = load_data()
-    if not data["logs"]:
+    logs = data["logs"]
+    return (logs[position] for position in date_index.newest_first(load_index(data), offset, limit))
+
+def show_history(limit=None, offset=0, fmt="text"):
+    logs = iter_history(limit, offset)
+    if fmt != "text":
+        bulk.write_records((log.to_dict() for log in logs), '-', WORKOUT_LOG_FIELDS, fmt)
+        return
+
+    first = next(logs, None)
+    if first is None:
         print("No workouts logged yet.")
         return
 
     print("\n--- Workout History ---")
-    # Sort logs by date descending
-    sorted_logs = sorted(data["logs"], key=lambda x: x["date"], reverse=True)
-    for log in sorted_logs:
-        print(f"- {log['date']}: {log['workout_name']}")
+    for log in itertools.chain([first], logs):
+        print(f"- {log.date}: {log.workout_name}")
     print("-----------------------")
 
-def show_status():
+def show_status(windows=(7, 30), start=None, end=None):
     data = load_data()
     if not data["logs"]:
         print("No workouts logged yet.")
         return
 
+    index = load_index(data)
     today = datetime.now().date()
-    seven_days_ago = today - timedelta(days=7)
-    thirty_days_ago = today - timedelta(days=30)
-
-    recent_logs = [log for log in data["logs"] if datetime.strptime(log["date"], "%Y-%m-%d").date() > seven_days_ago]
-    month_logs = [log for log in data["logs"] if datetime.strptime(log["date"], "%Y-%m-%d").date() > thirty_days_ago]
 
     print("\n--- Workout Status ---")
-    print(f"Workouts in the last 7 days: {len(recent_logs)}")
-    print(f"Workouts in the last 30 days: {len(month_logs)}")
+    for days in windows:
+        # Dates after `today - days`, as before
+        count = date_index.count_between(index, today - timedelta(days=days - 1), None)
+        print(f"Workouts in the last {days} days: {count}")
+    if start or end:
+        count = date_index.count_between(index, start, end)
+        print(f"Workouts from {start or 'the beginning'} to {end or 'today'}: {count}")
     print("----------------------")
 
 
+def compute_analytics(data, today=None):
+    import numpy as np
+
+    today = today or datetime.now().date()
+    days = np.frombuffer(load_index(data)[0], dtype=np.int32)
+    if not days.size:
+        return {"total_logs": 0}
+
+    # Streaks over distinct workout days (the index is already sorted)
+    active = days[np.r_[True, np.diff(days) != 0]]
+    breaks = np.flatnonzero(np.diff(active) != 1)
+    starts = np.r_[0, breaks + 1]
+    ends = np.r_[breaks, active.size - 1]
+    lengths = ends - starts + 1
+    longest = int(np.argmax(lengths))
+    # A streak is still alive if the last workout was today or yesterday.
+    current = int(lengths[-1]) if active[-1] >= today.toordinal() - 1 else 0
+
+    # ISO weeks: the ISO year/week of a day is the year/week of its Thursday.
+    epoch_days = days - date(1970, 1, 1).toordinal()
+    weekday = (epoch_days + 3) % 7  # Monday == 0
+    thursday = epoch_days - weekday + 3
+    iso_year = thursday.astype('datetime64[D]').astype('datetime64[Y]')
+    week = (thursday - iso_year.astype('datetime64[D]').astype(np.int64)) // 7 + 1
+    week_keys, week_counts = np.unique(iso_year.astype(np.int64) * 100 + week, return_counts=True)
+
+    # Routine names live in the log records, so count them with Counter's C loop.
+    per_workout = Counter(map(attrgetter("workout_name"), data["logs"]))
+
+    return {
+        "total_logs": int(days.size),
+        "active_days": int(active.size),
+        "first_date": date.fromordinal(int(days[0])).isoformat(),
+        "last_date": date.fromordinal(int(days[-1])).isoformat(),
+        "streaks": {
+            "current": current,
+            "longest": int(lengths[longest]),
+            "longest_start": date.fromordinal(int(active[starts[longest]])).isoformat(),
+            "longest_end": date.fromordinal(int(active[ends[longest]])).isoformat(),
+        },
+        "weekly": {f"{1970 + key // 100}-W{key % 100:02d}": int(count)
+                   for key, count in zip(week_keys.tolist(), week_counts.tolist())},
+        "day_of_week": dict(zip(["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"],
+                                np.bincount(weekday, minlength=7).tolist())),
+        "per_workout": dict(per_workout.most_common()),
+    }
+
+def show_analytics():
+    try:
+        import numpy  # noqa: F401
+    except ImportError:
+        print("The 'analytics' command needs NumPy. Install it with: pip3 install numpy")
+        return
+    print(json.dumps(compute_analytics(load_data()), indent=2))
+
 def list_workouts():
     data = load_data()
     if not data["workouts"]:
@@ -81,8 +180,57 @@ def list_workouts():
         print(f"- {name}: {', '.join(exercises)}")
     print("------------------------")
 
-def main():
-    parser = argparse.ArgumentParser(description="A simple workout tracker.")
+# --- Bulk import / export ---
+
+WORKOUT_LOG_FIELDS = ["date", "workout_name"]
+
+def import_logs(path, fmt=None):
+    data = load_data()
+    workouts = data["workouts"]
+
+    def validate(record):
+        workout_name = bulk.require(record, "workout_name")
+        if workout_name not in workouts:
+            raise bulk.ValidationError(f"workout '{workout_name}' is not defined")
+        return records.WorkoutLog(bulk.as_date(bulk.require(record, "date"), "date"), workout_name)
+
+    logs = list(bulk.validated(bulk.read_records(path, fmt), validate))
+    if not logs:
+        print("No workout logs imported.")
+        return logs
+    data["logs"].extend(logs)
+    if is_streamed():
+        sort_logs(data)
+    save_data(data)
+    date_index.rebuild(DATA_FILE, data["logs"])
+    print(f"Imported {len(logs)} workout logs.")
+    return logs
+
+def export_logs(path, fmt=None):
+    count = bulk.write_records((log.to_dict() for log in load_data()["logs"]), path, WORKOUT_LOG_FIELDS, fmt)
+    if path != '-':
+        print(f"Exported {count} workout logs to {path}.")
+
+def convert_storage(fmt):
+    data = load_data()
+    if fmt == "jsonl":
+        sort_logs(data)
+    try:
+        storage.convert(DATA_FILE, data, fmt, STREAM_KEY, indent=4)
+    except ImportError as e:
+        print(f"Error: {e}")
+        return
+    print(f"Converted {os.path.basename(DATA_FILE)} to {fmt}.")
+
+def parse_date(value):
+    try:
+        return datetime.strptime(value, "%Y-%m-%d").date()
+    except ValueError:
+        raise argparse.ArgumentTypeError(f"invalid date '{value}' (expected YYYY-MM-DD)")
+
+def build_parser(prog=None):
+    parser = argparse.ArgumentParser(prog=prog, description="A simple workout tracker.")
+    profiling.add_arguments(parser)
     subparsers = parser.add_subparsers(dest="command", help="Available commands")
 
     # Define command
@@ -96,28 +244,68 @@ def main():
 
     # History command
     history_parser = subparsers.add_parser("history", help="Show workout history.")
+    history_parser.add_argument("--limit", type=int, help="Show at most this many entries.")
+    history_parser.add_argument("--offset", type=int, default=0, help="Skip this many of the newest entries (default: 0).")
+    history_parser.add_argument("--format", choices=["text"] + bulk.FORMATS, default="text", help="Output format (default: text; jsonl and csv print one record per line).")
 
     # Status command
     status_parser = subparsers.add_parser("status", help="Show workout consistency status.")
+    status_parser.add_argument("--days", type=int, nargs='+', default=[7, 30], help="Window sizes in days (default: 7 30).")
+    status_parser.add_argument("--from", dest="start", type=parse_date, help="Also count workouts from this date (YYYY-MM-DD).")
+    status_parser.add_argument("--to", dest="end", type=parse_date, help="Also count workouts up to this date (YYYY-MM-DD).")
 
     # List command
     list_parser = subparsers.add_parser("list", help="List all defined workout routines.")
 
-    args = parser.parse_args()
-
-    if args.command == "define":
-        exercises = [e.strip() for e in args.exercises.split(',')]
-        define_workout(args.workout_name, exercises)
-    elif args.command == "log":
-        log_workout(args.workout_name)
-    elif args.command == "history":
-        show_history()
-    elif args.command == "status":
-        show_status()
-    elif args.command == "list":
-        list_workouts()
-    else:
-        parser.print_help()
+    # Analytics command
+    analytics_parser = subparsers.add_parser("analytics", help="Print streaks, ISO-week counts, day-of-week and per-routine frequency as JSON.")
+
+    # Import / Export commands
+    import_parser = subparsers.add_parser("import", help="Bulk-import workout logs (date, workout_name) from a CSV or JSONL file.")
+    import_parser.add_argument("file", type=str, help="Path to the file, or '-' for stdin.")
+    import_parser.add_argument("--format", choices=bulk.FORMATS, help="File format (default: from the file extension).")
+    export_parser = subparsers.add_parser("export", help="Export workout logs to a CSV or JSONL file.")
+    export_parser.add_argument("file", type=str, help="Path to the file, or '-' for stdout.")
+    export_parser.add_argument("--format", choices=bulk.FORMATS, help="File format (default: from the file extension).")
+
+    # Convert command
+    convert_parser = subparsers.add_parser("convert", help="Rewrite the data file as pretty or compact JSON, orjson, MessagePack, or JSONL (one log per line, streamed by 'history').")
+    convert_parser.add_argument("format", choices=storage.FORMATS, help="Storage format.")
+    return parser
+
+def main(argv=None, prog=None):
+    if daemon.forward("workout_tracker", argv, prog):
+        return
+
+    parser = build_parser(prog)
+    args = parser.parse_args(argv)
+
+    with profiling.profile("workout_tracker", args):
+        if args.command == "define":
+            exercises = [e.strip() for e in args.exercises.split(',')]
+            define_workout(args.workout_name, exercises)
+        elif args.command == "log":
+            log_workout(args.workout_name)
+        elif args.command == "history":
+            show_history(args.limit, args.offset, args.format)
+        elif args.command == "status":
+            show_status(args.days, args.start, args.end)
+        elif args.command == "list":
+            list_workouts()
+        elif args.command == "analytics":
+            show_analytics()
+        elif args.command == "convert":
+            convert_storage(args.format)
+        elif args.command in ("import", "export"):
+            try:
+                if args.command == "import":
+                    import_logs(args.file, args.format)
+                else:
+                    export_logs(args.file, args.format)
+            except (bulk.ValidationError, OSError) as e:
+                print(f"Error: {e}")
+        else:
+            parser.print_help()
 
 if __name__ == "__main__":
     main()
@@ -1,47 +1,133 @@
+import argparse
+from datetime import datetime
 import os
 import json
 import sys
+import time
 
-from dotenv import load_dotenv
-from plaid import ApiClient, Configuration, Environment
-from plaid.api import plaid_api
-# Import the explicit Model objects needed for Plaid's new SDK style
-from plaid.model.sandbox_public_token_create_request import SandboxPublicTokenCreateRequest
-from plaid.model.sandbox_public_token_create_request_options import SandboxPublicTokenCreateRequestOptions
-from plaid.model.item_public_token_exchange_request import ItemPublicTokenExchangeRequest
-from plaid.model.products import Products
-from plaid.model.country_code import CountryCode
+# The Plaid SDK (and its generated model tree) takes far longer to import
+# than everything else here, so it is only imported inside the functions that
+# talk to Plaid, and the API client is built on first use. `--cached` and
+# argument errors never touch it; `--check-import-time` guards that. The
+# same goes for the stdlib modules only some commands need (thread pool,
+# hashing, subprocess).
 
-# 1. Load Environment Variables
-load_dotenv()
-
-# --- Plaid Initialization ---
-configuration=Configuration(
-    host=Environment.Sandbox,
-    api_key={
-        'clientId': os.getenv('PLAID_CLIENT_ID'),
-        'secret': os.getenv('PLAID_SECRET'),
-        'plaidVersion':'2020-09-14'
-    }
-)
-
-api_client = ApiClient(configuration)
-client = plaid_api.PlaidApi(api_client)
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+SNAPSHOT_FILE = os.getenv('PLAID_SNAPSHOT_FILE') or os.path.join(SCRIPT_DIR, '.accounts_snapshot.json')
+IMPORT_BUDGET_MS = 50
 
 # --- Define Constants ---
-INSTITUTION_ID = os.getenv('PLAID_INSTITUTION_ID')
+# Filled in from the environment (and .env) by load_settings().
+INSTITUTION_ID = None
 ACCESS_TOKEN = None
-PRODUCTS = [p.strip() for p in os.getenv('PLAID_PRODUCTS').split(',')]
-from plaid.model.accounts_get_request import AccountsGetRequest
+PRODUCTS = []
+MAX_WORKERS = 8
+TOKEN_CACHE_FILE = None
+TRANSACTIONS_DB = None
+
+def load_settings():
+    global INSTITUTION_ID, PRODUCTS, MAX_WORKERS, TOKEN_CACHE_FILE, TRANSACTIONS_DB
+    # 1. Load Environment Variables
+    from dotenv import load_dotenv
+    load_dotenv()
+
+    INSTITUTION_ID = os.getenv('PLAID_INSTITUTION_ID')
+    PRODUCTS = [p.strip() for p in os.getenv('PLAID_PRODUCTS', 'transactions').split(',')]
+    MAX_WORKERS = int(os.getenv('PLAID_MAX_WORKERS', '8'))
+    TOKEN_CACHE_FILE = os.getenv('PLAID_TOKEN_CACHE') or os.path.join(SCRIPT_DIR, '.plaid_token_cache.json')
+    TRANSACTIONS_DB = os.getenv('PLAID_TRANSACTIONS_DB') or os.path.join(SCRIPT_DIR, 'transactions.db')
+
+# --- Plaid Initialization ---
+
+_client = None
+
+def get_client():
+    # PLAID_HOST points the client somewhere other than the sandbox, e.g. a
+    # local stub server (http://127.0.0.1:8080) for testing. Call this from
+    # the main thread before starting workers so only one client is built.
+    global _client
+    if _client is None:
+        from plaid import ApiClient, Configuration, Environment
+        from plaid.api import plaid_api
+
+        configuration=Configuration(
+            host=os.getenv('PLAID_HOST') or Environment.Sandbox,
+            api_key={
+                'clientId': os.getenv('PLAID_CLIENT_ID'),
+                'secret': os.getenv('PLAID_SECRET'),
+                'plaidVersion':'2020-09-14'
+            }
+        )
+        # One ApiClient (and urllib3 pool) is shared by every worker thread, so the
+        # pool needs a connection per worker to avoid reconnecting per request.
+        configuration.connection_pool_maxsize = MAX_WORKERS
+        _client = plaid_api.PlaidApi(ApiClient(configuration))
+    return _client
+
+# --- Access token cache ---
+# Exchanged access tokens are kept in a local JSON file (mode 0600) keyed by
+# institution and products, so later runs skip the sandbox token exchange
+# until Plaid reports the cached token as invalid or its login as expired
+# (INVALID_TOKEN_CODES); the command is then retried once with a new token.
+
+INVALID_TOKEN_CODES = {"INVALID_ACCESS_TOKEN", "ITEM_NOT_FOUND", "ITEM_LOGIN_REQUIRED"}
+
+def token_cache_key():
+    return f"{INSTITUTION_ID}:{','.join(sorted(PRODUCTS))}"
+
+def load_token_cache():
+    try:
+        with open(TOKEN_CACHE_FILE, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (FileNotFoundError, ValueError):
+        return {}
+
+def save_token_cache(cache):
+    tmp_file = TOKEN_CACHE_FILE + '.tmp'
+    fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        os.fchmod(f.fileno(), 0o600)  # In case a stale tmp file had wider permissions
+        json.dump(cache, f, indent=2)
+    os.replace(tmp_file, TOKEN_CACHE_FILE)
+
+def cache_access_token(access_token, item_id):
+    cache = load_token_cache()
+    cache[token_cache_key()] = {"access_token": access_token, "item_id": item_id,
+                                "created": datetime.now().isoformat(timespec='seconds')}
+    save_token_cache(cache)
+
+def forget_access_token():
+    cache = load_token_cache()
+    if cache.pop(token_cache_key(), None) is not None:
+        save_token_cache(cache)
+
+def cached_item():
+    # The default item: ACCESS_TOKEN, with the item_id it was exchanged for.
+    item_id = load_token_cache().get(token_cache_key(), {}).get("item_id")
+    return {"name": INSTITUTION_ID, "access_token": ACCESS_TOKEN, "item_id": item_id}
+
+def get_access_token():
+    global ACCESS_TOKEN
+    ACCESS_TOKEN = load_token_cache().get(token_cache_key(), {}).get("access_token")
+    if ACCESS_TOKEN:
+        print("  -> Using cached access token.", file=sys.stderr)
+    else:
+        create_link_token()
+    return ACCESS_TOKEN
 
 # --- Core Functionality ---
 
 def create_link_token():
   global ACCESS_TOKEN
+  # Import the explicit Model objects needed for Plaid's new SDK style
+  from plaid.model.sandbox_public_token_create_request import SandboxPublicTokenCreateRequest
+  from plaid.model.item_public_token_exchange_request import ItemPublicTokenExchangeRequest
+  from plaid.model.products import Products
+  client = get_client()
   try:
     pt_request = SandboxPublicTokenCreateRequest(
       institution_id=INSTITUTION_ID,
-      initial_products=[Products('transactions')]
+      initial_products=[Products(p) for p in PRODUCTS]
     )
     pt_response = client.sandbox_public_token_create(pt_request)
     exchange_request = ItemPublicTokenExchangeRequest(
@@ -51,47 +137,317 @@ def create_link_token():
     exchange_response = client.item_public_token_exchange(exchange_request)
     
     ACCESS_TOKEN = exchange_response['access_token']
+    cache_access_token(ACCESS_TOKEN, exchange_response['item_id'])
     print(f"  -> Exchange Token Created: {ACCESS_TOKEN}", file=sys.stderr)
+    return ACCESS_TOKEN
   except Exception as e:
     print(f"Error Generating token: {e}", file=sys.stderr)
     return None
 
-def fetch_accounts_data(access_token):
+# --- Retries ---
+
+RETRY_STATUSES = {429, 500, 502, 503, 504}
+MAX_RETRIES = 3
+BACKOFF_SECONDS = 0.5
+
+def with_retries(call, request):
+    # Retries rate limits, server errors and dropped connections with
+    # exponential backoff plus jitter; anything else is raised immediately.
+    import random
+    from plaid.exceptions import ApiException
+    import urllib3
+    for attempt in range(MAX_RETRIES + 1):
+        try:
+            return call(request)
+        except ApiException as e:
+            if e.status not in RETRY_STATUSES or attempt == MAX_RETRIES:
+                raise
+        except urllib3.exceptions.HTTPError:
+            if attempt == MAX_RETRIES:
+                raise
+        time.sleep(BACKOFF_SECONDS * 2 ** attempt * (1 + random.random()))
+
+def plaid_error(e):
+    # Plaid puts error_code/error_message in the JSON body of an ApiException.
+    try:
+        return json.loads(e.body)
+    except (AttributeError, TypeError, ValueError):
+        return {}
+
+def describe_error(e):
+    error = plaid_error(e)
+    if error.get("error_code"):
+        return f"{error['error_code']}: {error.get('error_message')}"
+    return str(e)
+
+def get_accounts(access_token):
+    from plaid.model.accounts_get_request import AccountsGetRequest
+    accounts_response = with_retries(get_client().accounts_get, AccountsGetRequest(access_token=access_token))
+    accounts_data = []
+    for account in accounts_response['accounts']:
+        balance = account['balances']['available'] if account['balances']['available'] is not None else account['balances']['current']
+        account_info = {
+            "name": account['name'],
+            "subtype": account['subtype'].value,
+            "balance": balance,
+            "currency": account['balances']['iso_currency_code']
+        }
+        accounts_data.append(account_info)
+    return accounts_data
+
+def fetch_accounts_data(access_token, reexchange_invalid=True):
     if not access_token:
         print("\nCannot fetch accounts: Access Token is missing.", file=sys.stderr)
         return None
+    from plaid.exceptions import ApiException
 
     print("\n3. Fetching Accounts and Balances...", file=sys.stderr)
     
-    accounts_request = AccountsGetRequest(access_token=access_token)
-    
     try:
-        accounts_response = client.accounts_get(accounts_request)
-        accounts = accounts_response['accounts']
-
-        print(f"\n✅ SUCCESS: Found {len(accounts)} accounts.", file=sys.stderr)
-        
-        accounts_data = []
-        for account in accounts:
-            balance = account['balances']['available'] if account['balances']['available'] is not None else account['balances']['current']
-            account_info = {
-                "name": account['name'],
-                "subtype": account['subtype'].value,
-                "balance": balance,
-                "currency": account['balances']['iso_currency_code']
-            }
-            accounts_data.append(account_info)
-        
+        accounts_data = get_accounts(access_token)
+        print(f"\n✅ SUCCESS: Found {len(accounts_data)} accounts.", file=sys.stderr)
         return accounts_data
             
+    except ApiException as e:
+        if reexchange_invalid and plaid_error(e).get("error_code") in INVALID_TOKEN_CODES:
+            print(f"Access token rejected ({describe_error(e)}); exchanging a new one.", file=sys.stderr)
+            forget_access_token()
+            create_link_token()
+            return fetch_accounts_data(ACCESS_TOKEN, reexchange_invalid=False)
+        print(f"Error fetching accounts: {describe_error(e)}", file=sys.stderr)
+        return None
     except Exception as e:
         print(f"Error fetching accounts: {e}", file=sys.stderr)
         return None
 
+# --- Multiple items ---
+
+def load_items(path):
+    # A JSON list of {"name": ..., "access_token": ...} objects (or bare tokens).
+    # Raises ValueError naming the first bad entry, so nothing is fetched
+    # until the whole file is usable; every returned item has a "name".
+    with open(path, 'r', encoding='utf-8') as f:
+        entries = json.load(f)
+    if not isinstance(entries, list):
+        raise ValueError(f"{path} must contain a JSON list of items.")
+    items = []
+    for i, entry in enumerate(entries):
+        item = dict(entry) if isinstance(entry, dict) else {"access_token": entry}
+        token = item.get("access_token")
+        if not isinstance(token, str) or not token:
+            raise ValueError(f"{path}: item {i + 1} has no access_token.")
+        item["name"] = item.get("name") or item.get("institution_id") or f"item-{i + 1}"
+        items.append(item)
+    return items
+
+def fetch_item(item):
+    try:
+        return {"item": item["name"], "accounts": get_accounts(item["access_token"])}
+    except Exception as e:
+        return {"item": item["name"], "error": describe_error(e), "error_code": plaid_error(e).get("error_code")}
+
+def fetch_all_items(items, max_workers):
+    # Items are fetched concurrently over the shared client; results keep the
+    # input order and one failing item doesn't stop the others.
+    print(f"\nFetching accounts for {len(items)} items ({max_workers} at a time)...", file=sys.stderr)
+    get_client()
+    from concurrent.futures import ThreadPoolExecutor
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        results = list(executor.map(fetch_item, items))
+    failed = sum("error" in result for result in results)
+    print(f"\n✅ Fetched {len(results) - failed}/{len(results)} items.", file=sys.stderr)
+    return results
+
+# --- Transactions sync ---
+# /transactions/sync returns only the changes since an item's cursor, so a
+# refresh costs as much as what changed rather than the whole history. All
+# pages for an item are collected first and then applied to the local store
+# together with the final cursor (see transactions_db.py). The store keys
+# items by Plaid's item_id, which outlives any one access token; it comes
+# from the items file ("item_id"), the token cache, or /item/get.
+
+SYNC_PAGE_SIZE = 500
+MAX_PAGINATION_RESTARTS = 3
+
+def legacy_item_key(access_token):
+    # How items were keyed before item_id; their rows are moved on first sync.
+    import hashlib
+    return hashlib.sha256(access_token.encode('utf-8')).hexdigest()[:16]
+
+def get_item_id(item):
+    if item.get("item_id"):
+        return item["item_id"]
+    from plaid.model.item_get_request import ItemGetRequest
+    return with_retries(get_client().item_get, ItemGetRequest(access_token=item["access_token"]))['item']['item_id']
+
+def fetch_transaction_changes(access_token, cursor):
+    # Returns (added, modified, removed ids, next cursor) since `cursor`.
+    from plaid.exceptions import ApiException
+    from plaid.model.transactions_sync_request import TransactionsSyncRequest
+    client = get_client()
+    for _ in range(MAX_PAGINATION_RESTARTS + 1):
+        added, modified, removed, next_cursor = [], [], [], cursor
+        try:
+            while True:
+                request = {"access_token": access_token, "count": SYNC_PAGE_SIZE}
+                if next_cursor:
+                    request["cursor"] = next_cursor
+                response = with_retries(client.transactions_sync, TransactionsSyncRequest(**request))
+                added.extend(transaction.to_dict() for transaction in response['added'])
+                modified.extend(transaction.to_dict() for transaction in response['modified'])
+                removed.extend(transaction['transaction_id'] for transaction in response['removed'])
+                next_cursor = response['next_cursor']
+                if not response['has_more']:
+                    return added, modified, removed, next_cursor
+        except ApiException as e:
+            # Plaid asks clients to restart the whole pagination from the original cursor.
+            if plaid_error(e).get("error_code") != "TRANSACTIONS_SYNC_MUTATION_DURING_PAGINATION":
+                raise
+    raise RuntimeError("Transactions kept changing during pagination; try again later.")
+
+def sync_transactions(items, db_file, max_workers):
+    # Items are fetched concurrently; the store is only touched from this thread.
+    import transactions_db
+
+    def call(function, *args):
+        try:
+            return function(*args)
+        except Exception as e:
+            return e
+
+    print(f"\nSyncing transactions for {len(items)} items...", file=sys.stderr)
+    get_client()
+    from concurrent.futures import ThreadPoolExecutor
+    results = []
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        keys = list(executor.map(lambda item: call(get_item_id, item), items))
+        conn = transactions_db.connect(db_file)
+        cursors = {}
+        for item, key in zip(items, keys):
+            if not isinstance(key, Exception):
+                transactions_db.rename_item(conn, legacy_item_key(item["access_token"]), key)
+                cursors[key] = transactions_db.get_cursor(conn, key)
+
+        def fetch(item, key):
+            if isinstance(key, Exception):
+                return key
+            return call(fetch_transaction_changes, item["access_token"], cursors[key])
+
+        for item, key, changes in zip(items, keys, executor.map(fetch, items, keys)):
+            name = item["name"]
+            if isinstance(changes, Exception):
+                results.append({"item": name, "error": describe_error(changes),
+                                "error_code": plaid_error(changes).get("error_code")})
+                continue
+            added, modified, removed, cursor = changes
+            transactions_db.apply_changes(conn, key, name, added, modified, removed, cursor,
+                                          datetime.now().isoformat(timespec='seconds'))
+            results.append({"item": name, "added": len(added), "modified": len(modified), "removed": len(removed),
+                            "initial_sync": cursors[key] is None, "transactions": transactions_db.count_transactions(conn, key)})
+    conn.close()
+    failed = sum("error" in result for result in results)
+    print(f"\n✅ Synced {len(results) - failed}/{len(results)} items into {db_file}.", file=sys.stderr)
+    return results
+
+# --- Snapshots and startup budget ---
+
+def save_snapshot(command, data):
+    tmp_file = SNAPSHOT_FILE + '.tmp'
+    fd = os.open(tmp_file, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o600)
+    with os.fdopen(fd, 'w', encoding='utf-8') as f:
+        json.dump({"fetched_at": datetime.now().isoformat(timespec='seconds'), "command": command, "data": data}, f)
+    os.replace(tmp_file, SNAPSHOT_FILE)
+
+def print_snapshot():
+    try:
+        with open(SNAPSHOT_FILE, 'r', encoding='utf-8') as f:
+            snapshot = json.load(f)
+    except (FileNotFoundError, ValueError):
+        print("No cached snapshot yet; run without --cached first.", file=sys.stderr)
+        return False
+    print(f"  -> Cached {snapshot['command']} snapshot from {snapshot['fetched_at']}.", file=sys.stderr)
+    print(json.dumps(snapshot["data"], indent=2))
+    return True
+
+def check_import_time(budget_ms=IMPORT_BUDGET_MS):
+    # Imports this module in a fresh interpreter with -X importtime and fails
+    # if it takes longer than the budget or pulls in the Plaid SDK.
+    import subprocess
+    result = subprocess.run([sys.executable, "-X", "importtime", "-c", "import fetch_accounts"],
+                            cwd=SCRIPT_DIR, capture_output=True, text=True)
+    if result.returncode:
+        print(result.stderr, file=sys.stderr)
+        return False
+    # Lines look like "import time: self [us] | cumulative | imported package";
+    # the fetch_accounts line's cumulative time covers everything it imports.
+    rows = [line.split('|') for line in result.stderr.splitlines() if line.startswith('import time:') and '[us]' not in line]
+    total_ms = next(int(cumulative) for _, cumulative, name in rows if name.strip() == 'fetch_accounts') / 1000
+    plaid_modules = [name.strip() for _, _, name in rows if name.strip().split('.')[0] == 'plaid']
+    ok = total_ms <= budget_ms and not plaid_modules
+    print(f"import fetch_accounts: {total_ms:.1f} ms (budget {budget_ms} ms)"
+          + (f", imports the Plaid SDK ({plaid_modules[0]})" if plaid_modules else "")
+          + (" OK" if ok else " OVER BUDGET"))
+    return ok
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Fetch Plaid account balances as JSON.")
+    parser.add_argument("command", nargs="?", choices=["accounts", "sync-transactions"], default="accounts",
+                        help="accounts: print balances (default). sync-transactions: pull new/changed transactions into a local SQLite store.")
+    parser.add_argument("--items", help="JSON file listing the items to fetch concurrently (name + access_token each).")
+    parser.add_argument("--workers", type=int, help="Concurrent requests with --items (default: PLAID_MAX_WORKERS or 8).")
+    parser.add_argument("--db", help="SQLite file for sync-transactions (default: transactions.db next to this script).")
+    parser.add_argument("--cached", action="store_true", help="Print the last fetched accounts snapshot without contacting Plaid.")
+    parser.add_argument("--check-import-time", action="store_true", help=f"Check that importing this script stays under {IMPORT_BUDGET_MS} ms without loading the Plaid SDK.")
+    args = parser.parse_args(argv)
+
+    if args.check_import_time:
+        return 0 if check_import_time() else 1
+    if args.cached:
+        return 0 if print_snapshot() else 1
+
+    global MAX_WORKERS
+    load_settings()
+    MAX_WORKERS = args.workers or MAX_WORKERS
+
+    items = None
+    if args.items:
+        try:
+            items = load_items(args.items)
+        except (OSError, ValueError) as e:
+            print(f"Error reading --items: {e}", file=sys.stderr)
+            return 2
+
+    if args.command == "sync-transactions":
+        db_file = args.db or TRANSACTIONS_DB
+        if args.items:
+            results = sync_transactions(items, db_file, MAX_WORKERS)
+        else:
+            if not get_access_token():
+                return 1
+            results = sync_transactions([cached_item()], db_file, 1)
+            if results[0].get("error_code") in INVALID_TOKEN_CODES:
+                print(f"Access token rejected ({results[0]['error']}); exchanging a new one.", file=sys.stderr)
+                forget_access_token()
+                if not create_link_token():
+                    return 1
+                results = sync_transactions([cached_item()], db_file, 1)
+        print(json.dumps(results, indent=2))
+        return 1 if any("error" in result for result in results) else 0
+
+    if args.items:
+        results = fetch_all_items(items, MAX_WORKERS)
+        save_snapshot("accounts --items", results)
+        print(json.dumps(results, indent=2))
+        return 0
+
+    accounts_json_data = fetch_accounts_data(get_access_token())
+    if accounts_json_data is None:
+        return 1
+    save_snapshot("accounts", accounts_json_data)
+    # Print the final JSON data to stdout
+    print(json.dumps(accounts_json_data, indent=2))
+    return 0
+
 
 if __name__ == '__main__':
-    create_link_token()
-    accounts_json_data = fetch_accounts_data(ACCESS_TOKEN)
-    if accounts_json_data is not None:
-      # Print the final JSON data to stdout
-      print(json.dumps(accounts_json_data, indent=2))
+    sys.exit(main())
@@ -0,0 +1,243 @@
+import argparse
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import sys
+import threading
+from collections import Counter
+
+# A local stand-in for the Plaid API, enough for fetch_accounts.py's
+# sandbox token exchange and its /accounts/get, /item/get and
+# /transactions/sync calls:
+#
+#     python3 plaid_stub.py --port 8080
+#     PLAID_HOST=http://127.0.0.1:8080 python3 fetch_accounts.py --items items.json
+#
+# What it returns depends on the access token's prefix:
+#   access-flaky-*        503 for the first FLAKY_FAILURES requests, then OK
+#   access-ratelimited-*  429 RATE_LIMIT_EXCEEDED once, then OK
+#   access-invalid-*      400 INVALID_ACCESS_TOKEN, always
+#   access-expired-*      400 ITEM_LOGIN_REQUIRED, always
+#   access-mutating-*     400 TRANSACTIONS_SYNC_MUTATION_DURING_PAGINATION on
+#                         the first /transactions/sync page after the first
+#                         (a transaction is modified meanwhile), then OK
+#   anything else         OK
+# Requests per token are counted in server.requests, and per endpoint in
+# server.paths.
+#
+# /sandbox/public_token/create + /item/public_token/exchange hand out
+# access-sandbox-<n>-<last 4 characters of the institution id>, so every
+# exchange for an institution is a new token for the same item. Institution
+# ids starting with "ins_invalid" get an access-invalid-* token instead.
+#
+# Every item (item-<last 4 characters of the token>, so two tokens for the
+# same item share it) has two accounts and starts with TRANSACTIONS_PER_ITEM
+# transactions. Its transaction history is a list of ("added" | "modified" |
+# "removed", transaction) events; a /transactions/sync cursor is a position
+# in that list, and each page returns up to `count` events. Tests change an
+# item with add_transaction(), modify_transaction() and remove_transaction().
+
+FLAKY_FAILURES = 2
+TRANSACTIONS_PER_ITEM = 5
+
+
+def error_body(error_type, error_code, message):
+    return {"error_type": error_type, "error_code": error_code, "error_message": message,
+            "display_message": None, "request_id": "stub"}
+
+
+def item_id(token):
+    return f"item-{token[-4:]}"
+
+
+def item_body(token):
+    return {"item_id": item_id(token), "webhook": None, "error": None, "available_products": [],
+            "billed_products": ["transactions"], "consent_expiration_time": None, "update_type": "background"}
+
+
+def accounts_body(server, token, request):
+    suffix = token[-4:]
+    return 200, {
+        "accounts": [
+            {"account_id": f"{suffix}-checking", "mask": "0000", "name": "Checking", "official_name": None,
+             "type": "depository", "subtype": "checking",
+             "balances": {"available": 100.0, "current": 110.0, "limit": None,
+                          "iso_currency_code": "USD", "unofficial_currency_code": None}},
+            {"account_id": f"{suffix}-savings", "mask": "1111", "name": "Savings", "official_name": None,
+             "type": "depository", "subtype": "savings",
+             "balances": {"available": None, "current": 500.0, "limit": None,
+                          "iso_currency_code": "USD", "unofficial_currency_code": None}},
+        ],
+        "item": item_body(token),
+        "request_id": "stub",
+    }
+
+
+def public_token_body(server, token, request):
+    return 200, {"public_token": f"public-sandbox-{request['institution_id']}", "request_id": "stub"}
+
+
+def exchange_body(server, token, request):
+    institution = request["public_token"].removeprefix("public-sandbox-")
+    with server.lock:
+        server.exchanges += 1
+        n = server.exchanges
+    kind = "invalid" if institution.startswith("ins_invalid") else f"sandbox-{n}"
+    access_token = f"access-{kind}-{institution[-4:]}"
+    return 200, {"access_token": access_token, "item_id": item_id(access_token), "request_id": "stub"}
+
+
+def item_get_body(server, token, request):
+    return 200, {"item": item_body(token), "request_id": "stub"}
+
+
+def transaction_body(item, n, amount=None, name=None):
+    return {"transaction_id": f"{item}-txn-{n}", "account_id": f"{item[-4:]}-checking",
+            "amount": 10.0 * n if amount is None else amount, "iso_currency_code": "USD",
+            "unofficial_currency_code": None, "date": f"2024-01-{n % 28 + 1:02d}", "datetime": None,
+            "authorized_date": None, "authorized_datetime": None, "name": name or f"Purchase {n}",
+            "merchant_name": None, "pending": False, "pending_transaction_id": None, "account_owner": None,
+            "category": ["Shops"], "category_id": "19000000", "payment_channel": "in store",
+            "transaction_code": None, "transaction_type": "place",
+            "location": {"address": None, "city": None, "region": None, "postal_code": None, "country": None,
+                         "lat": None, "lon": None, "store_number": None},
+            "payment_meta": {"reference_number": None, "ppd_id": None, "payee": None, "by_order_of": None,
+                             "payer": None, "payment_method": None, "payment_processor": None, "reason": None}}
+
+
+def _events(server, item):
+    # Call with server.lock held.
+    if item not in server.events:
+        server.events[item] = [("added", transaction_body(item, n)) for n in range(1, TRANSACTIONS_PER_ITEM + 1)]
+    return server.events[item]
+
+
+def _current(events, transaction_id):
+    for kind, transaction in reversed(events):
+        if transaction["transaction_id"] == transaction_id:
+            if kind == "removed":
+                break
+            return transaction
+    raise KeyError(transaction_id)
+
+
+def add_transaction(server, item, **fields):
+    with server.lock:
+        events = _events(server, item)
+        added = sum(kind == "added" for kind, _ in events)
+        transaction = dict(transaction_body(item, added + 1), **fields)
+        events.append(("added", transaction))
+        return transaction
+
+
+def modify_transaction(server, item, transaction_id, **changes):
+    with server.lock:
+        events = _events(server, item)
+        transaction = dict(_current(events, transaction_id), **changes)
+        events.append(("modified", transaction))
+        return transaction
+
+
+def remove_transaction(server, item, transaction_id):
+    with server.lock:
+        events = _events(server, item)
+        events.append(("removed", _current(events, transaction_id)))
+
+
+def sync_body(server, token, request):
+    item = item_id(token)
+    cursor = request.get("cursor")
+    start = int(cursor.rpartition("-")[2]) if cursor else 0
+    if token.startswith("access-mutating-") and cursor:
+        with server.lock:
+            mutate = token not in server.mutated
+            server.mutated.add(token)
+        if mutate:
+            modify_transaction(server, item, f"{item}-txn-1", amount=1.0)
+            return 400, error_body("TRANSACTIONS_ERROR", "TRANSACTIONS_SYNC_MUTATION_DURING_PAGINATION",
+                                   "underlying transaction data changed since the last page was fetched")
+    with server.lock:
+        events = _events(server, item)
+        page = events[start:start + request.get("count", 100)]
+        end = start + len(page)
+        more = end < len(events)
+    return 200, {"transactions_update_status": "HISTORICAL_UPDATE_COMPLETE", "accounts": [],
+                 "added": [transaction for kind, transaction in page if kind == "added"],
+                 "modified": [transaction for kind, transaction in page if kind == "modified"],
+                 "removed": [{"transaction_id": transaction["transaction_id"], "account_id": transaction["account_id"]}
+                             for kind, transaction in page if kind == "removed"],
+                 "next_cursor": f"{item}-cursor-{end}", "has_more": more, "request_id": "stub"}
+
+
+ROUTES = {"/accounts/get": accounts_body, "/item/get": item_get_body, "/transactions/sync": sync_body,
+          "/sandbox/public_token/create": public_token_body, "/item/public_token/exchange": exchange_body}
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        request = json.loads(self.rfile.read(int(self.headers.get("Content-Length", 0))) or b"{}")
+        token = request.get("access_token", "")
+        with self.server.lock:
+            self.server.requests[token] += 1
+            self.server.paths[self.path] += 1
+            attempt = self.server.requests[token]
+
+        route = ROUTES.get(self.path)
+        if route is None:
+            return self.reply(404, error_body("INVALID_REQUEST", "NOT_FOUND", f"No stub for {self.path}"))
+
+        if token.startswith("access-invalid-"):
+            self.reply(400, error_body("INVALID_INPUT", "INVALID_ACCESS_TOKEN", "provided access token is in an invalid format"))
+        elif token.startswith("access-expired-"):
+            self.reply(400, error_body("ITEM_ERROR", "ITEM_LOGIN_REQUIRED", "the login details of this item have changed"))
+        elif token.startswith("access-flaky-") and attempt <= FLAKY_FAILURES:
+            self.reply(503, error_body("API_ERROR", "PLANNED_MAINTENANCE", "the stub is flaky"))
+        elif token.startswith("access-ratelimited-") and attempt == 1:
+            self.reply(429, error_body("RATE_LIMIT_EXCEEDED", "ACCOUNTS_LIMIT", "rate limit exceeded"))
+        else:
+            self.reply(*route(self.server, token, request))
+
+    def reply(self, status, body):
+        payload = json.dumps(body).encode('utf-8')
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        if self.server.verbose:
+            super().log_message(format, *args)
+
+
+def make_server(port=0, verbose=False):
+    # port=0 picks a free port; the URL is f"http://127.0.0.1:{server.server_port}".
+    server = ThreadingHTTPServer(("127.0.0.1", port), _Handler)
+    server.daemon_threads = True
+    server.requests = Counter()
+    server.paths = Counter()
+    server.exchanges = 0
+    server.events = {}
+    server.mutated = set()
+    server.lock = threading.Lock()
+    server.verbose = verbose
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a local stub of the Plaid endpoints fetch_accounts.py uses.")
+    parser.add_argument("--port", type=int, default=8080, help="Port to listen on (default: 8080).")
+    args = parser.parse_args(argv)
+
+    server = make_server(args.port, verbose=True)
+    print(f"Plaid stub listening on http://127.0.0.1:{server.server_port}", file=sys.stderr)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,27 @@
+import os
+import sys
+import threading
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import fetch_accounts  # noqa: E402
+import plaid_stub  # noqa: E402
+
+
+@pytest.fixture
+def stub(monkeypatch):
+    # A plaid_stub server on a free port, with fetch_accounts pointed at it
+    # and retry backoff switched off.
+    server = plaid_stub.make_server()
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    monkeypatch.setenv("PLAID_HOST", f"http://127.0.0.1:{server.server_port}")
+    monkeypatch.setenv("PLAID_CLIENT_ID", "stub")
+    monkeypatch.setenv("PLAID_SECRET", "stub")
+    monkeypatch.setattr(fetch_accounts, "_client", None)
+    monkeypatch.setattr(fetch_accounts, "BACKOFF_SECONDS", 0)
+    yield server
+    server.shutdown()
+    server.server_close()
@@ -0,0 +1,205 @@
+import json
+import os
+
+import pytest
+
+import fetch_accounts
+import plaid_stub
+import transactions_db
+
+
+def write_items(tmp_path, items):
+    path = tmp_path / "items.json"
+    path.write_text(json.dumps(items))
+    return str(path)
+
+
+def test_fetch_all_items_retries_and_reports_errors_per_item(stub):
+    items = [{"name": f"ok-{i}", "access_token": f"access-sandbox-{i:04d}"} for i in range(5)]
+    items += [{"name": "flaky", "access_token": "access-flaky-0001"},
+              {"name": "limited", "access_token": "access-ratelimited-0001"},
+              {"name": "invalid", "access_token": "access-invalid-0001"}]
+
+    results = fetch_accounts.fetch_all_items(items, 8)
+
+    assert [result["item"] for result in results] == [item["name"] for item in items]
+    assert all(len(result["accounts"]) == 2 for result in results[:7])
+    assert results[0]["accounts"][1] == {"name": "Savings", "subtype": "savings", "balance": 500.0, "currency": "USD"}
+    assert results[7]["error_code"] == "INVALID_ACCESS_TOKEN"
+    # 503 twice then OK; 429 once then OK; 400 is not retried.
+    assert stub.requests["access-flaky-0001"] == 3
+    assert stub.requests["access-ratelimited-0001"] == 2
+    assert stub.requests["access-invalid-0001"] == 1
+
+
+def test_fetch_item_gives_up_after_max_retries(stub, monkeypatch):
+    monkeypatch.setattr(fetch_accounts, "MAX_RETRIES", 1)
+
+    result = fetch_accounts.fetch_item({"name": "flaky", "access_token": "access-flaky-0002"})
+
+    assert result["error_code"] == "PLANNED_MAINTENANCE"
+    assert stub.requests["access-flaky-0002"] == 2
+
+
+def test_load_items_names_entries_and_rejects_missing_tokens(tmp_path):
+    items = fetch_accounts.load_items(write_items(tmp_path, ["access-sandbox-1", {"access_token": "access-sandbox-2"}]))
+    assert [item["name"] for item in items] == ["item-1", "item-2"]
+
+    with pytest.raises(ValueError, match="item 2 has no access_token"):
+        fetch_accounts.load_items(write_items(tmp_path, [{"name": "a", "access_token": "t"}, {"name": "b"}]))
+
+
+def test_main_reports_bad_items_file_without_fetching(tmp_path, stub, monkeypatch, capsys):
+    monkeypatch.setattr(fetch_accounts, "load_settings", lambda: None)
+
+    assert fetch_accounts.main(["--items", write_items(tmp_path, [{"name": "b"}])]) == 2
+
+    assert "item 1 has no access_token" in capsys.readouterr().err
+    assert not stub.requests
+
+
+def test_sync_transactions_reports_error_code(tmp_path, stub):
+    items = [{"name": "ok", "access_token": "access-sandbox-0001"},
+             {"name": "invalid", "access_token": "access-invalid-0002"}]
+
+    results = fetch_accounts.sync_transactions(items, str(tmp_path / "transactions.db"), 2)
+
+    assert results[0] == {"item": "ok", "added": 5, "modified": 0, "removed": 0, "initial_sync": True, "transactions": 5}
+    assert results[1]["error_code"] == "INVALID_ACCESS_TOKEN"
+
+
+def stored(db_file):
+    conn = transactions_db.connect(db_file)
+    try:
+        return {row[0]: row[1] for row in conn.execute("SELECT transaction_id, amount FROM transactions")}
+    finally:
+        conn.close()
+
+
+def test_sync_transactions_pages_and_reuses_cursor(tmp_path, stub, monkeypatch):
+    monkeypatch.setattr(fetch_accounts, "SYNC_PAGE_SIZE", 2)
+    db_file = str(tmp_path / "transactions.db")
+    items = [{"name": "ok", "access_token": "access-sandbox-0001"}]
+
+    first = fetch_accounts.sync_transactions(items, db_file, 1)
+    assert first[0] == {"item": "ok", "added": 5, "modified": 0, "removed": 0, "initial_sync": True, "transactions": 5}
+    syncs = stub.requests["access-sandbox-0001"]
+
+    second = fetch_accounts.sync_transactions(items, db_file, 1)
+    assert second[0] == {"item": "ok", "added": 0, "modified": 0, "removed": 0, "initial_sync": False, "transactions": 5}
+    # One /item/get and a single page from the saved cursor.
+    assert stub.requests["access-sandbox-0001"] - syncs == 2
+
+
+def test_sync_transactions_applies_modified_and_removed(tmp_path, stub, monkeypatch):
+    monkeypatch.setattr(fetch_accounts, "SYNC_PAGE_SIZE", 2)
+    db_file = str(tmp_path / "transactions.db")
+    items = [{"name": "ok", "access_token": "access-sandbox-0001"}]
+    fetch_accounts.sync_transactions(items, db_file, 1)
+
+    plaid_stub.modify_transaction(stub, "item-0001", "item-0001-txn-2", amount=99.5)
+    plaid_stub.remove_transaction(stub, "item-0001", "item-0001-txn-4")
+    plaid_stub.add_transaction(stub, "item-0001", amount=7.0)
+    result = fetch_accounts.sync_transactions(items, db_file, 1)
+
+    assert result[0] == {"item": "ok", "added": 1, "modified": 1, "removed": 1, "initial_sync": False, "transactions": 5}
+    amounts = stored(db_file)
+    assert amounts["item-0001-txn-2"] == 99.5
+    assert "item-0001-txn-4" not in amounts
+    assert amounts["item-0001-txn-6"] == 7.0
+
+
+def test_sync_transactions_restarts_after_mutation_during_pagination(tmp_path, stub, monkeypatch):
+    monkeypatch.setattr(fetch_accounts, "SYNC_PAGE_SIZE", 2)
+    db_file = str(tmp_path / "transactions.db")
+
+    result = fetch_accounts.sync_transactions([{"name": "m", "access_token": "access-mutating-0002"}], db_file, 1)
+
+    # The restart begins again from no cursor and sees the mutated transaction.
+    assert result[0]["added"] == 5 and result[0]["transactions"] == 5
+    assert stored(db_file)["item-0002-txn-1"] == 1.0
+    conn = transactions_db.connect(db_file)
+    assert transactions_db.get_cursor(conn, "item-0002") == "item-0002-cursor-6"
+    conn.close()
+
+
+def test_sync_transactions_keys_items_by_item_id(tmp_path, stub):
+    db_file = str(tmp_path / "transactions.db")
+    fetch_accounts.sync_transactions([{"name": "ok", "access_token": "access-sandbox-0003"}], db_file, 1)
+
+    # A re-exchanged token for the same item keeps its rows and cursor.
+    result = fetch_accounts.sync_transactions([{"name": "ok", "access_token": "access-rotated-0003"}], db_file, 1)
+
+    assert result[0]["initial_sync"] is False and result[0]["added"] == 0
+    conn = transactions_db.connect(db_file)
+    assert transactions_db.count_transactions(conn) == 5
+    assert transactions_db.count_transactions(conn, "item-0003") == 5
+    conn.close()
+
+
+def test_sync_transactions_moves_rows_keyed_by_token_hash(tmp_path, stub):
+    db_file = str(tmp_path / "transactions.db")
+    token = "access-sandbox-0004"
+    conn = transactions_db.connect(db_file)
+    added = [plaid_stub.transaction_body("item-0004", n) for n in range(1, 6)]
+    transactions_db.apply_changes(conn, fetch_accounts.legacy_item_key(token), "old", added, [], [],
+                                  "item-0004-cursor-5", "2024-01-01T00:00:00")
+    conn.close()
+
+    result = fetch_accounts.sync_transactions([{"name": "old", "access_token": token}], db_file, 1)
+
+    assert result[0] == {"item": "old", "added": 0, "modified": 0, "removed": 0, "initial_sync": False, "transactions": 5}
+
+
+@pytest.fixture
+def settings(tmp_path, stub, monkeypatch):
+    # Default-item runs: institution ins_109508, token cache and outputs in tmp_path.
+    monkeypatch.setenv("PLAID_INSTITUTION_ID", "ins_109508")
+    monkeypatch.setenv("PLAID_PRODUCTS", "transactions")
+    monkeypatch.setenv("PLAID_TOKEN_CACHE", str(tmp_path / "token_cache.json"))
+    monkeypatch.setattr(fetch_accounts, "SNAPSHOT_FILE", str(tmp_path / "snapshot.json"))
+    return tmp_path
+
+
+def cached_token():
+    return fetch_accounts.load_token_cache()["ins_109508:transactions"]
+
+
+def test_token_cache_skips_exchange_on_later_runs(settings, stub):
+    assert fetch_accounts.main([]) == 0
+    first = cached_token()
+    assert first == {"access_token": "access-sandbox-1-9508", "item_id": "item-9508", "created": first["created"]}
+    assert os.stat(settings / "token_cache.json").st_mode & 0o777 == 0o600
+
+    assert fetch_accounts.main([]) == 0
+    assert fetch_accounts.main(["sync-transactions", "--db", str(settings / "transactions.db")]) == 0
+
+    assert stub.paths["/item/public_token/exchange"] == 1
+    assert stub.requests["access-sandbox-1-9508"] == 3
+    assert cached_token() == first
+
+
+@pytest.mark.parametrize("command", [[], ["sync-transactions"]])
+@pytest.mark.parametrize("rejected", ["access-invalid-9508", "access-expired-9508"])
+def test_rejected_cached_token_is_exchanged_once(settings, stub, command, rejected):
+    fetch_accounts.load_settings()
+    fetch_accounts.cache_access_token(rejected, "item-9508")
+    if command:
+        command = command + ["--db", str(settings / "transactions.db")]
+
+    assert fetch_accounts.main(command) == 0
+
+    assert stub.requests[rejected] == 1
+    assert stub.paths["/item/public_token/exchange"] == 1
+    assert cached_token()["access_token"] == "access-sandbox-1-9508"
+
+
+def test_token_rejected_again_after_exchange_is_not_retried(settings, stub, monkeypatch):
+    monkeypatch.setenv("PLAID_INSTITUTION_ID", "ins_invalid_9508")
+    fetch_accounts.load_settings()
+    fetch_accounts.cache_access_token("access-expired-9508", "item-9508")
+
+    assert fetch_accounts.main([]) == 1
+
+    assert stub.paths["/item/public_token/exchange"] == 1
+    assert stub.requests["access-invalid-9508"] == 1
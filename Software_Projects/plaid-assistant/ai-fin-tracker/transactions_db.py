@@ -0,0 +1,95 @@
+import json
+import sqlite3
+
+# Local SQLite store for fetch_accounts.py's `sync-transactions` command.
+#
+# Plaid's /transactions/sync hands out a cursor per item; every call returns
+# only what was added, modified or removed since that cursor. Each item's
+# changes are applied together with its new cursor in one transaction, so a
+# crash can never leave the store ahead of or behind the saved cursor.
+# Items are keyed by Plaid's item_id, so a re-exchanged access token keeps
+# its item's transactions and cursor.
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sync_cursors (
+    item_key TEXT PRIMARY KEY,
+    item_name TEXT,
+    cursor TEXT NOT NULL,
+    synced_at TEXT NOT NULL
+);
+
+CREATE TABLE IF NOT EXISTS transactions (
+    transaction_id TEXT PRIMARY KEY,
+    item_key TEXT NOT NULL,
+    account_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    name TEXT,
+    merchant_name TEXT,
+    amount REAL NOT NULL,
+    iso_currency_code TEXT,
+    category TEXT,
+    pending INTEGER NOT NULL DEFAULT 0,
+    body TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_transactions_date ON transactions(date);
+CREATE INDEX IF NOT EXISTS idx_transactions_account_date ON transactions(account_id, date);
+"""
+
+UPSERT = """
+INSERT INTO transactions (transaction_id, item_key, account_id, date, name, merchant_name, amount,
+                          iso_currency_code, category, pending, body)
+VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT(transaction_id) DO UPDATE SET
+    item_key = excluded.item_key, account_id = excluded.account_id, date = excluded.date,
+    name = excluded.name, merchant_name = excluded.merchant_name, amount = excluded.amount,
+    iso_currency_code = excluded.iso_currency_code, category = excluded.category,
+    pending = excluded.pending, body = excluded.body
+"""
+
+
+def connect(db_file):
+    conn = sqlite3.connect(db_file)
+    conn.execute("PRAGMA journal_mode = WAL")
+    conn.executescript(SCHEMA)
+    return conn
+
+
+def get_cursor(conn, item_key):
+    row = conn.execute("SELECT cursor FROM sync_cursors WHERE item_key = ?", (item_key,)).fetchone()
+    return row[0] if row else None
+
+
+def rename_item(conn, old_key, new_key):
+    # Moves an item's cursor and transactions to new_key, unless new_key already has a cursor.
+    if old_key == new_key or get_cursor(conn, old_key) is None or get_cursor(conn, new_key) is not None:
+        return
+    with conn:
+        conn.execute("UPDATE sync_cursors SET item_key = ? WHERE item_key = ?", (new_key, old_key))
+        conn.execute("UPDATE transactions SET item_key = ? WHERE item_key = ?", (new_key, old_key))
+
+
+def _row(item_key, transaction):
+    category = (transaction.get("personal_finance_category") or {}).get("primary")
+    if not category and transaction.get("category"):
+        category = transaction["category"][0]
+    return (transaction["transaction_id"], item_key, transaction["account_id"], str(transaction["date"]),
+            transaction.get("name"), transaction.get("merchant_name"), transaction["amount"],
+            transaction.get("iso_currency_code"), category, int(bool(transaction.get("pending"))),
+            json.dumps(transaction, default=str))
+
+
+def apply_changes(conn, item_key, item_name, added, modified, removed, cursor, synced_at):
+    # added/modified are transaction dicts, removed is a list of transaction ids.
+    with conn:
+        conn.executemany(UPSERT, [_row(item_key, transaction) for transaction in added + modified])
+        conn.executemany("DELETE FROM transactions WHERE transaction_id = ?", [(tid,) for tid in removed])
+        conn.execute("INSERT INTO sync_cursors (item_key, item_name, cursor, synced_at) VALUES (?, ?, ?, ?) "
+                     "ON CONFLICT(item_key) DO UPDATE SET item_name = excluded.item_name, "
+                     "cursor = excluded.cursor, synced_at = excluded.synced_at",
+                     (item_key, item_name, cursor, synced_at))
+
+
+def count_transactions(conn, item_key=None):
+    if item_key is None:
+        return conn.execute("SELECT COUNT(*) FROM transactions").fetchone()[0]
+    return conn.execute("SELECT COUNT(*) FROM transactions WHERE item_key = ?", (item_key,)).fetchone()[0]